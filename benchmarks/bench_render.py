@@ -0,0 +1,494 @@
+"""Benchmarks for the render pipeline
+
+Run the benchmarks and save the results::
+
+    python -m benchmarks.bench_render --output before.json
+
+Then after making a change, run them again and compare with the previous results::
+
+    python -m benchmarks.bench_render --output after.json --compare before.json
+
+"""
+import argparse
+import dataclasses
+import gc
+import importlib.util
+import json
+import pathlib
+import sys
+import time
+import tracemalloc
+import typing
+
+from wtforms import Form
+from wtforms.fields import BooleanField
+from wtforms.fields import EmailField
+from wtforms.fields import FieldList
+from wtforms.fields import FormField
+from wtforms.fields import HiddenField
+from wtforms.fields import IntegerField
+from wtforms.fields import PasswordField
+from wtforms.fields import RadioField
+from wtforms.fields import SelectField
+from wtforms.fields import SelectMultipleField
+from wtforms.fields import StringField
+from wtforms.fields import SubmitField
+from wtforms.fields import TextAreaField
+from wtforms.widgets import CheckboxInput
+from wtforms.widgets import ListWidget
+
+from wtforms_bootstrap5 import LayoutProfiles
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5 import RendererRegistry
+from wtforms_bootstrap5.widgets import render_input
+
+
+@dataclasses.dataclass(frozen=True)
+class Benchmark:
+    name: str
+    # build the state needed by the benchmark, not included in the measurement
+    setup: typing.Callable[[], typing.Any]
+    # the code to measure, called with the value returned by setup
+    run: typing.Callable[[typing.Any], typing.Any]
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkResult:
+    name: str
+    # number of calls in each round
+    number: int
+    # best time per call in seconds among all rounds
+    best: float
+    # median time per call in seconds among all rounds
+    median: float
+    # peak memory allocated during a single call in bytes
+    peak_memory: int
+
+
+BENCHMARKS: typing.List[Benchmark] = []
+
+
+def benchmark(name: str, setup: typing.Callable[[], typing.Any]):
+    def decorator(run: typing.Callable[[typing.Any], typing.Any]):
+        BENCHMARKS.append(Benchmark(name=name, setup=setup, run=run))
+        return run
+
+    return decorator
+
+
+def make_form_cls(
+    field_count: int, choice_count: int = 20, name: str = "BenchmarkForm"
+) -> typing.Type[Form]:
+    """Build a form class with given number of fields in a mix of field types"""
+    choices = [(f"value-{i}", f"Choice <{i}>") for i in range(choice_count)]
+    field_factories = [
+        lambda i: StringField(f"Name {i}", description=f"Help message {i}"),
+        lambda i: EmailField(f"Email {i}", render_kw=dict(placeholder="Email")),
+        lambda i: PasswordField(f"Password {i}"),
+        lambda i: BooleanField(f"Agree {i}"),
+        lambda i: SelectField(f"Select {i}", choices=choices),
+        lambda i: IntegerField(f"Number {i}"),
+        lambda i: TextAreaField(f"Text {i}"),
+        lambda i: HiddenField(),
+        lambda i: SubmitField(f"Submit {i}"),
+    ]
+    attrs = {
+        f"field_{i}": field_factories[i % len(field_factories)](i)
+        for i in range(field_count)
+    }
+    return type(name, (Form,), attrs)
+
+
+def make_deep_field_cls(depth: int) -> typing.Type[StringField]:
+    """Build a field class with a deep hierarchy of mixins and diamonds"""
+    current = StringField
+    for level in range(depth):
+        mixin = type(f"Mixin{level}", (), {})
+        left = type(f"Left{level}", (current,), {})
+        right = type(f"Right{level}", (current, mixin), {})
+        current = type(f"Deep{level}", (left, right), {})
+    return current
+
+
+def _setup_form(field_count: int, choice_count: int = 20, native: bool = False):
+    def setup():
+        form_cls = make_form_cls(field_count=field_count, choice_count=choice_count)
+        form = form_cls()
+        for index, field in enumerate(form):
+            if index % 5 == 0:
+                field.errors = [f"Error {index}"]
+        context = RendererContext().default_field(native_input_enabled=native)
+        return context, form
+
+    return setup
+
+
+def _render(args):
+    context, form = args
+    return context.render(form)
+
+
+for _field_count in (10, 100, 1000):
+    benchmark(f"render_form[{_field_count}]", setup=_setup_form(_field_count))(_render)
+
+benchmark("render_form[100,native]", setup=_setup_form(100, native=True))(_render)
+benchmark("render_form[1000,native]", setup=_setup_form(1000, native=True))(_render)
+
+benchmark(
+    "render_form[100,select=2000]",
+    setup=_setup_form(100, choice_count=2000),
+)(_render)
+
+
+def _setup_deep_hierarchy():
+    attrs = {
+        f"field_{i}": make_deep_field_cls(depth=8 + i % 4)(f"Deep {i}")
+        for i in range(50)
+    }
+    form_cls = type("DeepForm", (Form,), attrs)
+    return RendererContext(), form_cls()
+
+
+benchmark("render_form[deep_hierarchy]", setup=_setup_deep_hierarchy)(_render)
+
+
+def _setup_select(choice_count: int, multiple: bool = False):
+    def setup():
+        choices = [(f"value-{i}", f"Choice <{i}>") for i in range(choice_count)]
+        field_cls = SelectMultipleField if multiple else SelectField
+        form_cls = type("SelectForm", (Form,), dict(select=field_cls(choices=choices)))
+        data = ["value-1", "value-2"] if multiple else "value-1"
+        return form_cls(data=dict(select=data)).select
+
+    return setup
+
+
+for _choice_count in (300, 20000):
+    for _multiple in (False, True):
+        _name = f"{'multiple' if _multiple else 'select'}={_choice_count}"
+        _setup = _setup_select(_choice_count, multiple=_multiple)
+        # the options are rendered by the wtforms widget every time
+        benchmark(f"select_widget[{_name}]", setup=_setup)(lambda field: field())
+        # the options are rendered from cache
+        benchmark(f"select_fast_path[{_name}]", setup=_setup)(
+            lambda field: render_input(field, {})
+        )
+
+
+class CheckboxListField(SelectMultipleField):
+    widget = ListWidget(prefix_label=False)
+    option_widget = CheckboxInput()
+
+
+def _setup_choice_list(choice_count: int, checkbox: bool = False, cached: bool = True):
+    def setup():
+        choices = [(f"value-{i}", f"Choice <{i}>") for i in range(choice_count)]
+        field_cls = CheckboxListField if checkbox else RadioField
+        if not cached:
+            # a custom option class is never cached
+            option_cls = type("Option", (field_cls._Option,), {})
+            field_cls = type("UncachedField", (field_cls,), dict(_Option=option_cls))
+        form_cls = type("ChoiceForm", (Form,), dict(choice=field_cls(choices=choices)))
+        data = ["value-1", "value-2"] if checkbox else "value-1"
+        return RendererContext(), form_cls(data=dict(choice=data))
+
+    return setup
+
+
+for _checkbox in (False, True):
+    _name = f"{'checkbox' if _checkbox else 'radio'}=300"
+    # every choice is rendered through the field and its label
+    benchmark(
+        f"choice_list_uncached[{_name}]",
+        setup=_setup_choice_list(300, checkbox=_checkbox, cached=False),
+    )(_render)
+    # the choices are rendered from cache
+    benchmark(
+        f"choice_list[{_name}]", setup=_setup_choice_list(300, checkbox=_checkbox)
+    )(_render)
+
+
+def _setup_choice_list_entries(
+    entry_count: int, choice_count: int, cached: bool = True
+):
+    def setup():
+        _, choice_form = _setup_choice_list(choice_count, cached=cached)()
+        attrs = dict(
+            items=FieldList(FormField(choice_form.__class__), min_entries=entry_count)
+        )
+        form_cls = type("ChoiceListForm", (Form,), attrs)
+        return RendererContext(), form_cls()
+
+    return setup
+
+
+# the entries have different ids and names but share the cached choices
+benchmark(
+    "choice_list_entries_uncached[300x100]",
+    setup=_setup_choice_list_entries(300, 100, cached=False),
+)(_render)
+benchmark("choice_list_entries[300x100]", setup=_setup_choice_list_entries(300, 100))(
+    _render
+)
+
+
+class LineItemForm(Form):
+    name = StringField("Name")
+    qty = IntegerField("Qty")
+    price = StringField("Price")
+
+
+def _setup_field_list(entry_count: int):
+    def setup():
+        attrs = dict(items=FieldList(FormField(LineItemForm), min_entries=entry_count))
+        form_cls = type("OrderForm", (Form,), attrs)
+        context = RendererContext().field("items-*-qty", label_class="visually-hidden")
+        return context, form_cls()
+
+    return setup
+
+
+for _entry_count in (100, 1000):
+    benchmark(
+        f"render_field_list[{_entry_count}]", setup=_setup_field_list(_entry_count)
+    )(_render)
+
+
+def _setup_registry(frozen: bool):
+    def setup():
+        registry = RendererRegistry()
+        classes = [make_deep_field_cls(depth=4) for _ in range(100)]
+        for cls in classes[::2]:
+            registry.add(renderer=lambda context, field: "", target_cls=cls)
+        registry.add(renderer=lambda context, field: "", target_cls=StringField)
+        return (registry.freeze() if frozen else registry), classes
+
+    return setup
+
+
+def _resolve_cold(args):
+    registry, classes = args
+    registry.cache_clear()
+    for cls in classes:
+        registry.resolve(cls)
+
+
+# lookups without the dispatch cache, following the class tree or the flat table
+benchmark("registry_lookup[tree]", setup=_setup_registry(frozen=False))(_resolve_cold)
+benchmark("registry_lookup[frozen]", setup=_setup_registry(frozen=True))(_resolve_cold)
+
+
+def _setup_context():
+    return make_form_cls(field_count=20)
+
+
+@benchmark("context_chain", setup=_setup_context)
+def _build_context(form_cls):
+    return (
+        RendererContext()
+        .form(action="/sign-up", form_class="my-form")
+        .default_field(
+            row_class="row mb-3",
+            label_class="form-label col-2",
+            field_wrapper_class="col-10",
+            field_wrapper_enabled=True,
+        )
+        .field("field_3", wrapper_class="offset-2", wrapper_enabled=True)
+        .field("field_8", field_wrapper_class="offset-2", field_wrapper_enabled=True)
+        .field("field_0", "field_1", "field_2", label_class="my-label")
+        .add_submit(label="Save")
+    )
+
+
+@benchmark("context_chain_and_render", setup=_setup_context)
+def _build_context_and_render(form_cls):
+    return _build_context(form_cls).render(form_cls())
+
+
+JINJA_EXPRESSION_TEMPLATE = """
+{{
+    RendererContext()
+    .form(action="/sign-up", form_class="my-form")
+    .default_field(
+        row_class="row mb-3",
+        label_class="form-label col-2",
+        field_wrapper_class="col-10",
+        field_wrapper_enabled=True,
+    )
+    .field("field_3", wrapper_class="offset-2", wrapper_enabled=True)
+    .add_submit(label="Save")
+    .render(form)
+}}
+"""
+JINJA_TAG_TEMPLATE = '{% bootstrap_form form with "horizontal" %}'
+JINJA_PROFILES = dict(
+    horizontal=dict(
+        form=dict(action="/sign-up", form_class="my-form"),
+        default_field=dict(
+            row_class="row mb-3",
+            label_class="form-label col-2",
+            field_wrapper_class="col-10",
+            field_wrapper_enabled=True,
+        ),
+        fields=dict(field_3=dict(wrapper_class="offset-2", wrapper_enabled=True)),
+        submit=dict(label="Save"),
+    )
+)
+
+
+def _setup_jinja(source: str, field_count: int):
+    def setup():
+        import jinja2
+
+        env = jinja2.Environment(
+            extensions=["wtforms_bootstrap5.jinja.BootstrapExtension"], autoescape=True
+        )
+        env.bootstrap_profiles = LayoutProfiles(JINJA_PROFILES)
+        env.globals["RendererContext"] = RendererContext
+        form = make_form_cls(field_count=field_count)()
+        return env.from_string(source), form
+
+    return setup
+
+
+def _render_template(args):
+    template, form = args
+    return template.render(form=form)
+
+
+if importlib.util.find_spec("jinja2") is not None:
+    for _field_count in (20, 100):
+        # options are resolved in the template for every render
+        benchmark(
+            f"jinja_expression[{_field_count}]",
+            setup=_setup_jinja(JINJA_EXPRESSION_TEMPLATE, _field_count),
+        )(_render_template)
+        # options are resolved once, then rendered with cached plan
+        benchmark(
+            f"jinja_tag[{_field_count}]",
+            setup=_setup_jinja(JINJA_TAG_TEMPLATE, _field_count),
+        )(_render_template)
+
+
+def _measure_peak_memory(bench: Benchmark, args: typing.Any) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        bench.run(args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmark(
+    bench: Benchmark, min_time: float = 0.2, rounds: int = 5
+) -> BenchmarkResult:
+    args = bench.setup()
+    # warm up and find out how many calls we need for each round
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            bench.run(args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / rounds or number >= 1_000_000:
+            break
+        number *= 2
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            bench.run(args)
+        timings.append((time.perf_counter() - start) / number)
+    timings.sort()
+    return BenchmarkResult(
+        name=bench.name,
+        number=number,
+        best=timings[0],
+        median=timings[len(timings) // 2],
+        peak_memory=_measure_peak_memory(bench, args),
+    )
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def _format_size(size: int) -> str:
+    for unit, scale in (("MiB", 1 << 20), ("KiB", 1 << 10)):
+        if size >= scale:
+            return f"{size / scale:.1f}{unit}"
+    return f"{size}B"
+
+
+def _format_change(current: float, previous: typing.Optional[float]) -> str:
+    if not previous:
+        return ""
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+def print_results(
+    results: typing.List[BenchmarkResult],
+    previous: typing.Optional[typing.Dict[str, typing.Dict]] = None,
+    file: typing.TextIO = sys.stdout,
+):
+    previous = previous or {}
+    header = f"{'benchmark':<34} {'best':>10} {'median':>10} {'peak mem':>10}"
+    if previous:
+        header += f" {'time':>9} {'mem':>9}"
+    print(header, file=file)
+    for result in results:
+        line = (
+            f"{result.name:<34} {_format_time(result.best):>10} "
+            f"{_format_time(result.median):>10} {_format_size(result.peak_memory):>10}"
+        )
+        if previous:
+            old = previous.get(result.name, {})
+            line += (
+                f" {_format_change(result.best, old.get('best')):>9}"
+                f" {_format_change(result.peak_memory, old.get('peak_memory')):>9}"
+            )
+        print(line, file=file)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-k", "--filter", help="only run benchmarks with name containing this value"
+    )
+    parser.add_argument(
+        "-o", "--output", type=pathlib.Path, help="save results as JSON"
+    )
+    parser.add_argument(
+        "-c", "--compare", type=pathlib.Path, help="compare with saved JSON results"
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="minimum time in seconds spent for measuring each benchmark",
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    for bench in BENCHMARKS:
+        if args.filter is not None and args.filter not in bench.name:
+            continue
+        results.append(run_benchmark(bench, min_time=args.min_time))
+
+    previous = None
+    if args.compare is not None:
+        previous = {item["name"]: item for item in json.loads(args.compare.read_text())}
+    print_results(results, previous=previous)
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps([dataclasses.asdict(result) for result in results], indent=2)
+        )
+
+
+if __name__ == "__main__":
+    main()
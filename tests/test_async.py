@@ -0,0 +1,128 @@
+import asyncio
+import typing
+
+import pytest
+from wtforms import Form
+from wtforms.fields import FieldList
+from wtforms.fields import FormField
+from wtforms.fields import SelectField
+from wtforms.fields import StringField
+
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.lazy import iter_lazy_values
+from wtforms_bootstrap5.lazy import resolve_lazy_values
+
+
+class Lookup:
+    """Fake async lookup service recording the number of concurrent calls"""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self.calls = 0
+
+    async def fetch(self, value: typing.Any) -> typing.Any:
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return value
+
+
+def make_form(lookup: Lookup, **kwargs) -> Form:
+    async def fetch_countries():
+        return await lookup.fetch([("fr", "France"), ("jp", "Japan")])
+
+    async def fetch_help():
+        return await lookup.fetch("Where you live")
+
+    async def fetch_label():
+        return await lookup.fetch("Your name")
+
+    class AddressForm(Form):
+        city = StringField("City", description=fetch_help)
+
+    class LazyForm(Form):
+        country = SelectField("Country")
+        name = StringField(fetch_label, description=fetch_help)
+        addresses = FieldList(FormField(AddressForm), min_entries=3)
+
+    form = LazyForm(**kwargs)
+    form.country.choices = fetch_countries
+    return form
+
+
+class EagerForm(Form):
+    country = SelectField("Country", choices=[("fr", "France"), ("jp", "Japan")])
+    name = StringField("Your name", description="Where you live")
+
+
+def test_render_async():
+    lookup = Lookup()
+    form = make_form(lookup, data=dict(country="jp"))
+    context = RendererContext()
+    html = asyncio.run(context.render_async(form))
+    # choices, label, description of name and description of each address
+    assert lookup.calls == 6
+    assert lookup.max_running == 6
+    assert list(iter_lazy_values(form)) == []
+    assert html == context.render(form)
+    assert context.render(form.country) == context.render(
+        EagerForm(data=dict(country="jp")).country
+    )
+    assert context.render(form.name) == context.render(EagerForm().name)
+    assert html.count("Where you live") == 4
+
+
+def test_render_async_concurrency():
+    lookup = Lookup()
+    form = make_form(lookup)
+    asyncio.run(resolve_lazy_values(form, concurrency=2))
+    assert lookup.calls == 6
+    assert lookup.max_running == 2
+    with pytest.raises(ValueError):
+        asyncio.run(resolve_lazy_values(form, concurrency=0))
+
+
+def test_aiter_render():
+    lookup = Lookup()
+    form = make_form(lookup)
+    context = RendererContext()
+
+    async def collect() -> typing.List[str]:
+        return [chunk async for chunk in context.aiter_render(form)]
+
+    chunks = asyncio.run(collect())
+    assert chunks[0] == '<form method="POST">'
+    assert "".join(chunks) == context.render(form)
+
+
+def test_render_async_field():
+    lookup = Lookup()
+    form = make_form(lookup)
+    context = RendererContext()
+    html = asyncio.run(context.render_async(form.name))
+    assert lookup.calls == 2
+    assert html == context.render(EagerForm().name)
+
+
+class CountryLookup:
+    """Fake lookup service called as an async function"""
+
+    def __init__(self, lookup: Lookup):
+        self.lookup = lookup
+
+    async def __call__(self) -> typing.List[typing.Tuple[str, str]]:
+        return await self.lookup.fetch([("fr", "France"), ("jp", "Japan")])
+
+
+def test_render_async_callable_object():
+    lookup = Lookup()
+    form = EagerForm(data=dict(country="jp"))
+    form.country.choices = CountryLookup(lookup)
+    assert [name for _, name, _ in iter_lazy_values(form)] == ["choices"]
+    context = RendererContext()
+    html = asyncio.run(context.render_async(form))
+    assert lookup.calls == 1
+    assert html == context.render(EagerForm(data=dict(country="jp")))
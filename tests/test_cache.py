@@ -0,0 +1,192 @@
+import pathlib
+
+from wtforms import Form
+from wtforms.csrf.core import CSRF
+from wtforms.fields import BooleanField
+from wtforms.fields import FieldList
+from wtforms.fields import FormField
+from wtforms.fields import SelectField
+from wtforms.fields import StringField
+
+from wtforms_bootstrap5 import DiskCacheBackend
+from wtforms_bootstrap5 import FragmentCache
+from wtforms_bootstrap5 import MemoryCacheBackend
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.fingerprint import fingerprint
+
+
+class MockForm(Form):
+    name = StringField("Name", description="Your name")
+    agree = BooleanField("Agree")
+    color = SelectField("Color", choices=[("r", "Red"), ("g", "Green")])
+
+
+class CounterCSRF(CSRF):
+    counter = 0
+
+    def generate_csrf_token(self, csrf_token_field):
+        CounterCSRF.counter += 1
+        return f"token-{CounterCSRF.counter}"
+
+
+class MockCSRFForm(MockForm):
+    class Meta:
+        csrf = True
+        csrf_class = CounterCSRF
+
+
+class ItemForm(Form):
+    qty = StringField("Qty")
+
+
+class OrderForm(Form):
+    items = FieldList(FormField(ItemForm), min_entries=2)
+
+
+def test_fragment_cache():
+    cache = FragmentCache()
+    context = RendererContext(fragment_cache=cache)
+    expected = RendererContext().render(MockForm())
+    assert context.render(MockForm()) == expected
+    # the form and each of its fields
+    assert cache.cache_info() == (0, 4, 0, 4)
+    assert context.render(MockForm()) == expected
+    assert cache.cache_info() == (1, 4, 0, 4)
+    assert "".join(context.iter_render(MockForm())) == expected
+    assert cache.cache_info() == (2, 4, 0, 4)
+
+    form = MockForm(data=dict(name="John"))
+    html = context.render(form)
+    assert html != expected
+    assert html == RendererContext().render(form)
+    # only the changed field is rendered again
+    assert cache.cache_info() == (4, 6, 0, 6)
+
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 0, 0)
+
+
+def test_fragment_cache_iter_render():
+    cache = FragmentCache()
+    context = RendererContext().use_cache(cache)
+    form = MockForm()
+    assert "".join(context.iter_render(form)) == RendererContext().render(form)
+    assert cache.cache_info() == (0, 4, 0, 4)
+    assert context.render(form) == RendererContext().render(form)
+    assert cache.cache_info() == (1, 4, 0, 4)
+
+
+def test_fragment_cache_csrf():
+    cache = FragmentCache()
+    context = RendererContext(fragment_cache=cache)
+    first_html = context.render(MockCSRFForm())
+    second_html = context.render(MockCSRFForm())
+    assert "token-1" in first_html
+    assert "token-2" in second_html
+    # the form and its CSRF token field bypass the cache, other fields are cached
+    assert cache.cache_info() == (3, 3, 4, 3)
+
+
+def test_fragment_cache_options():
+    cache = FragmentCache()
+    form = MockForm()
+    RendererContext(fragment_cache=cache).render(form)
+    html = (
+        RendererContext(fragment_cache=cache)
+        .field("name", label_class="my-label")
+        .render(form)
+    )
+    assert html == RendererContext().field("name", label_class="my-label").render(form)
+    assert 'class="my-label"' in html
+
+
+def test_fingerprint():
+    context = RendererContext()
+    form = MockForm()
+    key = fingerprint(context, form)
+    assert key == fingerprint(context, MockForm())
+    assert fingerprint(context, form.name) == fingerprint(context, MockForm().name)
+    assert fingerprint(context, form.name) != fingerprint(context, form.agree)
+
+    keys = {key}
+    form.name.errors = ["Invalid name"]
+    keys.add(fingerprint(context, form))
+    form.name.data = "John"
+    keys.add(fingerprint(context, form))
+    form.name.label.text = "Your name"
+    keys.add(fingerprint(context, form))
+    form.color.choices = [("b", "Blue")]
+    keys.add(fingerprint(context, form))
+    keys.add(fingerprint(context.form(form_class="my-form"), form))
+    keys.add(fingerprint(context.field("agree", label_class="my-label"), form))
+    keys.add(fingerprint(context.add_submit(), form))
+    assert len(keys) == 8
+    assert fingerprint(context, MockCSRFForm()) is None
+    assert fingerprint(context, MockCSRFForm().csrf_token) is None
+
+
+def test_memory_backend_lru():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", "A")
+    backend.set("b", "B")
+    assert backend.get("a") == "A"
+    backend.set("c", "C")
+    assert backend.get("b") is None
+    assert backend.get("a") == "A"
+    assert backend.get("c") == "C"
+    assert len(backend) == 2
+
+    backend = MemoryCacheBackend(max_size=10)
+    backend.set("a", "a" * 4)
+    backend.set("b", "b" * 4)
+    backend.set("c", "c" * 4)
+    assert backend.get("a") is None
+    assert backend.size == 8
+    # too big to be cached
+    backend.set("d", "d" * 11)
+    assert backend.get("d") is None
+    assert len(backend) == 2
+    backend.clear()
+    assert len(backend) == 0
+    assert backend.size == 0
+
+
+def test_disk_backend_lru(tmp_path: pathlib.Path):
+    backend = DiskCacheBackend(tmp_path, max_entries=2)
+    backend.set("a", "<p>A</p>")
+    backend.set("b", "<p>B</p>")
+    assert backend.get("a") == "<p>A</p>"
+    backend.set("c", "<p>C</p>")
+    assert backend.get("b") is None
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.html", "c.html"]
+
+    backend = DiskCacheBackend(tmp_path, max_size=10)
+    assert len(backend) == 1
+    assert backend.size == 8
+    assert backend.get("c") == "<p>C</p>"
+
+    backend.clear()
+    assert len(backend) == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_disk_backend_fragment_cache(tmp_path: pathlib.Path):
+    form = MockForm()
+    context = RendererContext(fragment_cache=FragmentCache(DiskCacheBackend(tmp_path)))
+    expected = context.render(form)
+    # a new process sharing the same directory
+    cache = FragmentCache(DiskCacheBackend(tmp_path))
+    context = RendererContext(fragment_cache=cache)
+    assert context.render(form) == expected
+    assert cache.cache_info() == (1, 0, 0, 4)
+
+
+def test_fingerprint_nested_fields():
+    context = RendererContext()
+    form = OrderForm()
+    key = fingerprint(context, form)
+    assert key == fingerprint(context, OrderForm())
+    form.items[1].form.qty.errors = ["Bad qty"]
+    assert fingerprint(context, form) != key
+    form = OrderForm()
+    assert fingerprint(context.field("items-*-qty", label_class="q"), form) != key
@@ -0,0 +1,194 @@
+import threading
+
+import pytest
+from wtforms import Form
+from wtforms.fields import EmailField
+from wtforms.fields import StringField
+
+from wtforms_bootstrap5 import FieldOptions
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.context import FormOptions
+from wtforms_bootstrap5.context import intern_options
+
+
+class MockForm(Form):
+    email = EmailField("Email")
+    name = StringField("Name")
+
+
+def test_field_options_are_shared():
+    context = RendererContext().default_field(row_attrs=dict(foo="bar"))
+    context.field("email", label_class="my-label")
+    assert context.field_options["email"].row_attrs == dict(foo="bar")
+    assert context.field_options["email"].label_class == "my-label"
+    copied = context.copy()
+    assert copied.field_options["email"] is context.field_options["email"]
+    copied.field("email", row_class="row")
+    assert context.field_options["email"].row_class == "mb-3"
+
+
+def test_in_place_modification():
+    context = RendererContext()
+    assert context.field("email", row_class="row") is context
+    assert context.default_field(row_class="row") is context
+    assert context.form(action="/") is context
+    assert context.add_submit() is context
+
+
+def test_freeze():
+    preset = RendererContext().field("email", row_class="row").freeze()
+    assert preset.frozen
+    assert preset.freeze() is preset
+
+    derived = preset.field("name", row_class="col").form(action="/sign-up")
+    assert derived is not preset
+    assert not derived.frozen
+    assert derived.field_options["email"] is preset.field_options["email"]
+    assert derived.field_options["name"].row_class == "col"
+    assert derived.form_options.action == "/sign-up"
+    # chained calls on the derived context don't copy it again
+    assert derived.add_submit() is derived
+
+    assert "name" not in preset.field_options
+    assert preset.form_options.action is None
+    assert not preset.extra_fields
+    assert preset.render(MockForm()) == RendererContext().field(
+        "email", row_class="row"
+    ).render(MockForm())
+
+
+def test_freeze_subclass():
+    class CustomContext(RendererContext):
+        def render(self, element):
+            return super().render(element).upper()
+
+    preset = CustomContext().field("email", row_class="row").freeze()
+    assert isinstance(preset, CustomContext)
+    derived = preset.field("name", row_class="col")
+    assert isinstance(derived, CustomContext)
+    assert derived.render(MockForm()) == derived.render(MockForm()).upper()
+
+
+def test_freeze_does_not_follow_original_context():
+    context = RendererContext()
+    preset = context.freeze()
+    context.field("email", row_class="row").add_submit()
+    assert not preset.field_options
+    assert not preset.extra_fields
+
+
+def test_preset_thread_safety():
+    preset = RendererContext().default_field(row_class="row").freeze()
+    errors = []
+
+    def worker(index: int):
+        try:
+            for _ in range(50):
+                html = (
+                    preset.field("name", row_class=f"row-{index}")
+                    .add_submit(label=f"Submit {index}")
+                    .render(MockForm())
+                )
+                assert f'class="row-{index}"' in html
+                assert f'value="Submit {index}"' in html
+                assert html.count("Submit") == 1
+        except AssertionError as error:  # pragma: no cover
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_intern_options():
+    options = intern_options(FieldOptions(row_attrs=dict(a="1", b="2")))
+    assert intern_options(FieldOptions(row_attrs=dict(b="2", a="1"))) is options
+    assert intern_options(FieldOptions(row_attrs=dict(a="1"))) is not options
+    assert intern_options(FormOptions()) is not intern_options(FieldOptions())
+    unhashable = FieldOptions(row_attrs=dict(a=["1"]))
+    assert intern_options(unhashable) is unhashable
+    # equal values of different types are rendered differently
+    assert intern_options(FieldOptions(row_attrs={"data-x": True})) is not (
+        intern_options(FieldOptions(row_attrs={"data-x": 1}))
+    )
+    assert intern_options(FieldOptions(wrapper_enabled=1)) is not (
+        intern_options(FieldOptions(wrapper_enabled=True))
+    )
+
+
+def test_interned_options_attribute_types():
+    class MockForm(Form):
+        name = StringField("Name")
+
+    context = RendererContext().default_field(row_attrs={"data-x": 1})
+    other_context = RendererContext().default_field(row_attrs={"data-x": True})
+    assert '<div class="mb-3" data-x="1">' in context.render(MockForm())
+    assert '<div class="mb-3" data-x>' in other_context.render(MockForm())
+    context = RendererContext().default_field(field_attrs={"disabled": True})
+    other_context = RendererContext().default_field(field_attrs={"disabled": 1})
+    assert 'class="form-control" disabled id="name"' in context.render(MockForm())
+    assert 'disabled="1"' in other_context.render(MockForm())
+
+
+def test_interned_context_options():
+    context = RendererContext().field("email", "name", row_class="row")
+    other_context = RendererContext().field("name", row_class="row")
+    assert context.field_options["email"] is context.field_options["name"]
+    assert context.field_options["name"] is other_context.field_options["name"]
+    assert context.default_field_options is other_context.default_field_options
+    assert context.form_options is other_context.form_options
+
+
+def test_options_tags():
+    options = FieldOptions(
+        row_class="row",
+        row_attrs=dict(data_foo="<bar>"),
+        wrapper_enabled=True,
+        help_class=None,
+    )
+    tags = options.tags
+    assert options.tags is tags
+    assert tags.row_open == '<div class="row" data-foo="&lt;bar&gt;">'
+    assert tags.row_close == "</div>"
+    assert tags.wrapper_open == '<div class="mb-3">'
+    assert tags.field_wrapper_open == ""
+    assert tags.field_wrapper_close == ""
+    assert tags.checkbox_wrapper_open == '<div class="form-check">'
+    assert tags.help_open == "<div>"
+    assert tags.error_open == '<div class="invalid-feedback">'
+
+    form_tags = FormOptions(action="/sign-up", form_class="my-form").tags
+    assert form_tags.form_open == (
+        '<form action="/sign-up" class="my-form" method="POST">'
+    )
+    assert form_tags.form_close == "</form>"
+    assert FormOptions(form_enabled=False).tags.form_open == ""
+
+
+def test_render_fields():
+    context = RendererContext().field("name", label_class="my-label").add_submit()
+    form = MockForm(data=dict(email="john@example.com"))
+    result = context.render_fields(form, "name", "submit")
+    assert list(result.fragments) == ["name", "submit"]
+    assert result.fragments["name"] == context.render(form.name)
+    assert 'class="my-label"' in result.fragments["name"]
+    assert 'type="submit"' in result.fragments["submit"]
+    assert result.changed == ("name", "submit")
+
+    full = context.render_fields(form)
+    assert list(full.fragments) == ["email", "name", "submit"]
+    assert "".join(full.fragments.values()) in context.render(form).replace("\n", "")
+
+    form.name.errors = ["Invalid name"]
+    result = context.render_fields(
+        form, "email", "name", "submit", previous_fingerprints=full.fingerprints
+    )
+    assert result.changed == ("name",)
+    assert result.fingerprints["email"] == full.fingerprints["email"]
+    assert "Invalid name" in result.fragments["name"]
+
+    with pytest.raises(ValueError):
+        context.render_fields(form, "missing")
@@ -0,0 +1,185 @@
+import collections
+import copy
+import random
+import typing
+
+import pytest
+from wtforms import Form
+from wtforms.fields import BooleanField
+from wtforms.fields import EmailField
+from wtforms.fields import HiddenField
+from wtforms.fields import IntegerField
+from wtforms.fields import PasswordField
+from wtforms.fields import SelectField
+from wtforms.fields import StringField
+from wtforms.fields import TextAreaField
+
+from wtforms_bootstrap5 import fingerprint as fingerprint_module
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5 import RendererRegistry
+from wtforms_bootstrap5.renderers import render_field
+from wtforms_bootstrap5.renderers import render_form
+
+# Small value spaces, so that random configs often share the same values
+LABELS = ["Name", "A & B", "<Label>"]
+DESCRIPTIONS = ["", "Help", "<b>Help</b>"]
+CHOICES = [[("a", "A"), ("b", "B")], [("a", "A"), ("c", "<C>")]]
+FIELD_KINDS: typing.Dict[str, typing.Tuple[typing.Type, typing.List[typing.Any]]] = {
+    "string": (StringField, [None, "x", "<y>"]),
+    "email": (EmailField, [None, "a@b.com"]),
+    "password": (PasswordField, [None, "secret"]),
+    "integer": (IntegerField, [None, 1, 2]),
+    "boolean": (BooleanField, [False, True]),
+    "select": (SelectField, [None, "a", "c"]),
+    "textarea": (TextAreaField, [None, "x\r\ny"]),
+    "hidden": (HiddenField, [None, "token"]),
+}
+FIELD_OPTIONS = dict(
+    label_class=["form-label", "my-label"],
+    row_class=["mb-3", "row"],
+    label_first=[True, False],
+    field_attrs=[{}, dict(autocomplete="off")],
+    native_input_enabled=[False, True],
+)
+FORM_OPTIONS = dict(action=[None, "/submit"], form_class=[None, "my-form"])
+FIELD_NAMES = ["first", "second", "third"]
+
+
+def random_field_config(rng: random.Random) -> typing.Dict[str, typing.Any]:
+    kind = rng.choice(list(FIELD_KINDS))
+    return dict(
+        kind=kind,
+        label=rng.choice(LABELS),
+        description=rng.choice(DESCRIPTIONS),
+        choices=rng.randrange(len(CHOICES)),
+        data=rng.choice(FIELD_KINDS[kind][1]),
+        errors=rng.choice([[], ["Bad"], ["<Bad>", "Worse"]]),
+    )
+
+
+def random_config(rng: random.Random) -> typing.Dict[str, typing.Any]:
+    return dict(
+        fields={name: random_field_config(rng) for name in FIELD_NAMES},
+        form_options={key: rng.choice(values) for key, values in FORM_OPTIONS.items()},
+        default_field_options={
+            key: rng.choice(values)
+            for key, values in FIELD_OPTIONS.items()
+            if rng.random() < 0.3
+        },
+        field_options={
+            name: {
+                key: rng.choice(values)
+                for key, values in FIELD_OPTIONS.items()
+                if rng.random() < 0.3
+            }
+            for name in FIELD_NAMES
+            if rng.random() < 0.3
+        },
+        submit=rng.choice([None, "Save", "<Go>"]),
+    )
+
+
+def mutate_config(
+    rng: random.Random, config: typing.Dict[str, typing.Any]
+) -> typing.Dict[str, typing.Any]:
+    config = copy.deepcopy(config)
+    field = config["fields"][rng.choice(FIELD_NAMES)]
+    kind = rng.choice(["field", "data", "errors", "options", "form", "submit"])
+    if kind == "field":
+        config["fields"][rng.choice(FIELD_NAMES)] = random_field_config(rng)
+    elif kind == "data":
+        field["data"] = rng.choice(FIELD_KINDS[field["kind"]][1])
+    elif kind == "errors":
+        field["errors"] = rng.choice([[], ["Bad"], ["Other"]])
+    elif kind == "options":
+        key = rng.choice(list(FIELD_OPTIONS))
+        options = config["field_options"].setdefault(rng.choice(FIELD_NAMES), {})
+        options[key] = rng.choice(FIELD_OPTIONS[key])
+    elif kind == "form":
+        key = rng.choice(list(FORM_OPTIONS))
+        config["form_options"][key] = rng.choice(FORM_OPTIONS[key])
+    else:
+        config["submit"] = rng.choice([None, "Save", "<Go>"])
+    return config
+
+
+def build(
+    config: typing.Dict[str, typing.Any],
+    registry: typing.Optional[RendererRegistry] = None,
+) -> typing.Tuple[RendererContext, Form]:
+    attrs = {}
+    data = {}
+    for name, field_config in config["fields"].items():
+        field_cls = FIELD_KINDS[field_config["kind"]][0]
+        kwargs = dict(description=field_config["description"])
+        if field_cls is SelectField:
+            kwargs["choices"] = CHOICES[field_config["choices"]]
+        attrs[name] = field_cls(field_config["label"], **kwargs)
+        data[name] = field_config["data"]
+    form = type("PropertyForm", (Form,), attrs)(data=data)
+    for name, field_config in config["fields"].items():
+        form[name].errors = list(field_config["errors"])
+
+    context = RendererContext() if registry is None else RendererContext(registry)
+    context.form(**config["form_options"])
+    context.default_field(**config["default_field_options"])
+    for name, options in config["field_options"].items():
+        context.field(name, **options)
+    if config["submit"] is not None:
+        context.add_submit(label=config["submit"])
+    return context, form
+
+
+def test_fingerprint_is_stable():
+    rng = random.Random(17)
+    for _ in range(50):
+        config = random_config(rng)
+        first_context, first_form = build(config)
+        second_context, second_form = build(config)
+        assert first_context.fingerprint(first_form) is not None
+        assert first_context.fingerprint(first_form) == second_context.fingerprint(
+            second_form
+        )
+        for name in FIELD_NAMES:
+            assert first_context.fingerprint(
+                first_form[name]
+            ) == second_context.fingerprint(second_form[name])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_fingerprint_changes_with_output(seed: int):
+    """Property: same fingerprint implies same rendered HTML"""
+    rng = random.Random(seed)
+    html_by_fingerprint: typing.Dict[str, typing.Set[str]] = collections.defaultdict(
+        set
+    )
+    for _ in range(100):
+        config = random_config(rng)
+        for current in (config, mutate_config(rng, config)):
+            context, form = build(current)
+            html_by_fingerprint[context.fingerprint(form)].add(context.render(form))
+            for name in FIELD_NAMES:
+                field = form[name]
+                html_by_fingerprint[context.fingerprint(field)].add(
+                    context.render(field)
+                )
+    for fingerprint, htmls in html_by_fingerprint.items():
+        assert len(htmls) == 1, fingerprint
+
+
+def test_fingerprint_registry_version():
+    config = random_config(random.Random(0))
+    registry = RendererRegistry()
+    registry.add(renderer=render_form, target_cls=Form)
+    registry.add(renderer=render_field, target_cls=StringField)
+    context, form = build(config, registry=registry)
+    fingerprint = context.fingerprint(form)
+    registry.add(renderer=render_field, target_cls=IntegerField)
+    assert context.fingerprint(form) != fingerprint
+
+
+def test_fingerprint_package_version(monkeypatch: pytest.MonkeyPatch):
+    context, form = build(random_config(random.Random(0)))
+    fingerprint = context.fingerprint(form)
+    monkeypatch.setattr(fingerprint_module, "PACKAGE_VERSION", "999.0.0")
+    assert context.fingerprint(form) != fingerprint
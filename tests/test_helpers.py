@@ -1,3 +1,4 @@
+from wtforms_bootstrap5.helpers import primary_base_classes
 from wtforms_bootstrap5.helpers import traverse_base_classes
 
 
@@ -47,3 +48,27 @@ def test_mixedin_traverse_base_classes():
             A,
         ),
     ]
+
+
+def test_primary_base_classes():
+    class A:
+        pass
+
+    class B(A):
+        pass
+
+    class MixedIn:
+        pass
+
+    class C(MixedIn, B):
+        pass
+
+    class D(B, MixedIn):
+        pass
+
+    assert primary_base_classes(cls=A) == (A,)
+    assert primary_base_classes(cls=C) == (C, MixedIn)
+    assert primary_base_classes(cls=D) == (D, B, A)
+    assert primary_base_classes(cls=object) == tuple()
+    for cls in (A, B, C, D):
+        assert primary_base_classes(cls=cls) == traverse_base_classes(cls=cls)[0]
@@ -0,0 +1,108 @@
+import typing
+
+from wtforms import Form
+from wtforms.fields import BooleanField
+from wtforms.fields import HiddenField
+from wtforms.fields import StringField
+
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.instrumentation import RenderEvent
+from wtforms_bootstrap5.instrumentation import RenderStatsCollector
+from wtforms_bootstrap5.registry import FormElement
+from wtforms_bootstrap5.registry import FormElementRenderer
+
+
+class MockForm(Form):
+    name = StringField("Name")
+    agree = BooleanField("Agree")
+    token = HiddenField()
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.calls: typing.List[typing.Tuple[str, typing.Any]] = []
+
+    def begin(self, element: FormElement, renderer: FormElementRenderer) -> None:
+        self.calls.append(("begin", element))
+
+    def end(self, event: RenderEvent) -> None:
+        self.calls.append(("end", event))
+
+
+def test_observer():
+    observer = RecordingObserver()
+    context = RendererContext(observer=observer)
+    form = MockForm()
+    html = context.render(form)
+    assert html == RendererContext().render(form)
+    assert [(kind, type(value).__name__) for kind, value in observer.calls] == [
+        ("begin", "MockForm"),
+        ("begin", "StringField"),
+        ("end", "RenderEvent"),
+        ("begin", "BooleanField"),
+        ("end", "RenderEvent"),
+        ("begin", "HiddenField"),
+        ("end", "RenderEvent"),
+        ("end", "RenderEvent"),
+    ]
+    events = [value for kind, value in observer.calls if kind == "end"]
+    form_event = events[-1]
+    assert form_event.element is form
+    assert form_event.renderer.__name__ == "render_form"
+    assert form_event.size == len(html)
+    assert form_event.elapsed >= sum(event.elapsed for event in events[:-1])
+    assert 0 <= form_event.self_elapsed <= form_event.elapsed
+    assert events[0].size == len(RendererContext().render(form.name))
+    assert events[0].renderer.__name__ == "render_field"
+    assert events[2].renderer.__name__ == "render_hidden"
+
+
+def test_observer_iter_render():
+    observer = RecordingObserver()
+    context = RendererContext().observe(observer)
+    form = MockForm()
+    html = "".join(context.iter_render(form))
+    events = [value for kind, value in observer.calls if kind == "end"]
+    assert len(events) == 4
+    assert events[-1].size == len(html)
+
+
+def test_observer_compiled_form():
+    observer = RecordingObserver()
+    context = RendererContext(observer=observer)
+    compiled = context.compile(MockForm)
+    form = MockForm()
+    html = compiled.render(form)
+    compiled_calls = [(kind, type(value)) for kind, value in observer.calls]
+    events = [value for kind, value in observer.calls if kind == "end"]
+    assert [event.element.name for event in events[:-1]] == ["name", "agree", "token"]
+    # the form is reported the same way as rendering without compiling
+    form_event = events[-1]
+    assert form_event.element is form
+    assert form_event.renderer.__name__ == "render_form"
+    assert form_event.size == len(html)
+    assert form_event.elapsed >= sum(event.elapsed for event in events[:-1])
+    observer.calls.clear()
+    context.render(form)
+    assert [(kind, type(value)) for kind, value in observer.calls] == compiled_calls
+
+
+def test_stats_collector():
+    collector = RenderStatsCollector()
+    context = RendererContext(observer=collector)
+    for _ in range(3):
+        context.render(MockForm())
+    stats = collector.export()
+    renderers = stats["renderers"]
+    assert renderers["wtforms_bootstrap5.renderers.render_form"]["count"] == 3
+    assert renderers["wtforms_bootstrap5.renderers.render_field"]["count"] == 6
+    assert renderers["wtforms_bootstrap5.renderers.render_hidden"]["count"] == 3
+    element_types = stats["element_types"]
+    assert element_types["StringField"]["count"] == 3
+    assert element_types["MockForm"]["total_size"] > 0
+    assert (
+        element_types["MockForm"]["self_time"]
+        <= element_types["MockForm"]["total_time"]
+    )
+    collector.reset()
+    assert collector.export() == dict(renderers={}, element_types={})
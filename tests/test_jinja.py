@@ -0,0 +1,109 @@
+import pathlib
+
+import pytest
+from wtforms import Form
+from wtforms.fields import BooleanField
+from wtforms.fields import StringField
+
+from wtforms_bootstrap5 import LayoutProfiles
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5 import RendererRegistry
+from wtforms_bootstrap5.renderers import render_field
+from wtforms_bootstrap5.renderers import render_form
+
+jinja2 = pytest.importorskip("jinja2")
+
+from wtforms_bootstrap5.jinja import BootstrapExtension  # noqa: E402
+
+EXTENSION = "wtforms_bootstrap5.jinja.BootstrapExtension"
+PROFILES = LayoutProfiles(
+    dict(
+        horizontal=dict(
+            default_field=dict(row_class="row mb-3", label_class="form-label col-2"),
+            submit=True,
+        )
+    )
+)
+
+
+class MockForm(Form):
+    name = StringField("Name")
+    agree = BooleanField("Agree")
+
+
+def make_env(**kwargs) -> jinja2.Environment:
+    env = jinja2.Environment(extensions=[EXTENSION], autoescape=True, **kwargs)
+    env.bootstrap_profiles = PROFILES
+    return env
+
+
+def get_extension(env: jinja2.Environment) -> BootstrapExtension:
+    return env.extensions[EXTENSION]
+
+
+def test_bootstrap_form():
+    env = make_env()
+    template = env.from_string(
+        "<h1>{{ title }}</h1>"
+        "{% bootstrap_form form %}"
+        '{% bootstrap_form form with "horizontal" %}'
+        "{% bootstrap_form form with context %}"
+    )
+    context = RendererContext().default_field(label_class="my-label")
+    for data in (dict(name="<John>"), dict(name="Jane", agree=True)):
+        form = MockForm(data=data)
+        html = template.render(title="<New>", form=form, context=context)
+        assert html == "".join(
+            [
+                "<h1>&lt;New&gt;</h1>",
+                RendererContext().render(form),
+                PROFILES["horizontal"].render(form),
+                context.render(form),
+            ]
+        )
+    # plans of the frozen contexts are compiled once, the one not frozen is
+    # rendered without plan
+    assert get_extension(env).cache_info() == (2, 2, 2)
+    get_extension(env).cache_clear()
+    assert get_extension(env).cache_info() == (0, 0, 0)
+
+
+def test_unknown_layout():
+    env = make_env()
+    with pytest.raises(jinja2.TemplateSyntaxError, match="Unknown layout profile"):
+        env.from_string('{% bootstrap_form form with "vertical" %}')
+    with pytest.raises(jinja2.TemplateSyntaxError, match="Layout must be"):
+        env.from_string("{% bootstrap_form form with 1 %}")
+
+
+def test_custom_form_renderer():
+    registry = RendererRegistry()
+    registry.add(renderer=render_field, target_cls=StringField)
+    registry.add(renderer=render_field, target_cls=BooleanField)
+    registry.add(
+        renderer=lambda context, form: render_form(context, form), target_cls=MockForm
+    )
+    env = make_env()
+    env.bootstrap_context = RendererContext(registry).freeze()
+    form = MockForm()
+    template = env.from_string("{% bootstrap_form form %}")
+    assert template.render(form=form) == env.bootstrap_context.render(form)
+    assert template.render(form=form) == env.bootstrap_context.render(form)
+    assert get_extension(env).cache_info() == (1, 1, 1)
+
+
+def test_bytecode_cache(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    loader = jinja2.DictLoader(dict(page='{% bootstrap_form form with "horizontal" %}'))
+    bytecode_cache = jinja2.FileSystemBytecodeCache(str(tmp_path))
+    form = MockForm()
+    env = make_env(loader=loader, bytecode_cache=bytecode_cache)
+    html = env.get_template("page").render(form=form)
+    assert list(tmp_path.iterdir())
+
+    def fail_parse(self, parser):
+        raise AssertionError("template should be loaded from bytecode cache")
+
+    monkeypatch.setattr(BootstrapExtension, "parse", fail_parse)
+    env = make_env(loader=loader, bytecode_cache=bytecode_cache)
+    assert env.get_template("page").render(form=form) == html
+    assert html == PROFILES["horizontal"].render(form)
@@ -0,0 +1,113 @@
+from markupsafe import Markup
+from wtforms import Form
+from wtforms.fields import StringField
+from wtforms.fields.core import Label
+
+from wtforms_bootstrap5 import LABEL_CACHE
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.labels import LabelCache
+
+
+class LazyText:
+    """Fake lazy translated string"""
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class UpperLabel(Label):
+    def __call__(self, text=None, **kwargs):
+        return super().__call__(text=self.text.upper(), **kwargs)
+
+
+class MockForm(Form):
+    name = StringField("Name")
+
+
+def test_label_cache():
+    cache = LabelCache()
+    form = MockForm()
+    html = cache.render(form.name, {"for": "name", "class": "form-label"})
+    assert html == '<label class="form-label" for="name">Name</label>'
+    assert cache.render(form.name, {"for": "name", "class": "form-label"}) is html
+    assert cache.render(MockForm().name, {"for": "name", "class": "form-label"}) is html
+    assert cache.cache_info() == (2, 1, 0, 1)
+
+    # changing label of an instance gets a different entry
+    other_form = MockForm()
+    other_form.name.label = Label("name", "<Full name>")
+    assert cache.render(other_form.name, {"for": "name"}) == (
+        '<label for="name">&lt;Full name&gt;</label>'
+    )
+    other_form.name.label.text = Markup("<b>Full name</b>")
+    assert cache.render(other_form.name, {"for": "name"}) == (
+        '<label for="name"><b>Full name</b></label>'
+    )
+    assert cache.cache_info() == (2, 3, 0, 3)
+
+    # lazy text and custom label class are never cached
+    other_form.name.label.text = LazyText("Nom")
+    assert cache.render(other_form.name, {"for": "name"}) == (
+        '<label for="name">Nom</label>'
+    )
+    other_form.name.label.text.value = "Name"
+    assert cache.render(other_form.name, {"for": "name"}) == (
+        '<label for="name">Name</label>'
+    )
+    other_form.name.label = UpperLabel("name", "Name")
+    assert cache.render(other_form.name, {"for": "name"}) == (
+        '<label for="name">NAME</label>'
+    )
+    assert cache.cache_info() == (2, 3, 3, 3)
+
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 0, 0)
+
+
+def test_label_cache_shared_between_fields():
+    class OtherForm(Form):
+        other_name = StringField("Name")
+
+    cache = LabelCache()
+    html = cache.render(MockForm().name, {"for": "name"})
+    assert cache.render(OtherForm().other_name, {"for": "name"}) is html
+    # without `for`, the label is rendered with the id of its field
+    assert cache.render(MockForm().name, {}) == '<label for="name">Name</label>'
+    assert cache.render(OtherForm().other_name, {}) == (
+        '<label for="other_name">Name</label>'
+    )
+    assert cache.cache_info() == (1, 3, 0, 3)
+
+
+def test_label_cache_attribute_types():
+    cache = LabelCache()
+    form = MockForm()
+    assert cache.render(form.name, {"for": "name", "data-k": 1}) == (
+        '<label data-k="1" for="name">Name</label>'
+    )
+    assert cache.render(form.name, {"for": "name", "data-k": True}) == (
+        '<label data-k for="name">Name</label>'
+    )
+    assert cache.cache_info().misses == 2
+
+
+def test_label_cache_max_entries():
+    cache = LabelCache(max_entries=2)
+    form = MockForm()
+    for field_id in ("a", "b", "c"):
+        cache.render(form.name, {"for": field_id})
+    assert cache.cache_info().currsize == 1
+
+
+def test_render_with_label_cache():
+    LABEL_CACHE.cache_clear()
+    context = RendererContext()
+    html = context.render(MockForm())
+    assert context.render(MockForm()) == html
+    assert LABEL_CACHE.cache_info()[:2] == (1, 1)
+    form = MockForm()
+    form.name.label.text = "Other"
+    assert context.render(form) == str(html).replace(">Name<", ">Other<")
@@ -0,0 +1,218 @@
+import io
+import typing
+
+import pytest
+from lxml import etree
+from markupsafe import Markup
+from wtforms import Field
+from wtforms import Form
+from wtforms.fields import BooleanField
+from wtforms.fields import EmailField
+from wtforms.fields import FieldList
+from wtforms.fields import FormField
+from wtforms.fields import HiddenField
+from wtforms.fields import IntegerField
+from wtforms.fields import PasswordField
+from wtforms.fields import SelectField
+from wtforms.fields import StringField
+from wtforms.fields import SubmitField
+
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5 import RendererRegistry
+from wtforms_bootstrap5.renderers import render_field
+from wtforms_bootstrap5.renderers import render_form
+
+
+class MockForm(Form):
+    email = EmailField("Email", render_kw=dict(placeholder="Foobar"))
+    password = PasswordField("Password", description="Your super secret password")
+    city = SelectField("City", choices=["Los Angle", "San Francisco", "New York"])
+    agree_terms = BooleanField("I agrees to terms and service")
+    submit = SubmitField()
+    csrf_token = HiddenField()
+
+
+class MultiDict(dict):
+    def getlist(self, key: str) -> typing.List[str]:
+        if key not in self:
+            return []
+        return [self[key]]
+
+
+def make_contexts() -> typing.List[RendererContext]:
+    return [
+        RendererContext(),
+        RendererContext().form(form_enabled=False),
+        RendererContext()
+        .form(action="/sign-up", form_class="my-form", form_attrs=dict(x="1"))
+        .default_field(
+            row_class="row mb-3",
+            label_class="form-label col-2",
+            field_wrapper_class="col-10",
+            field_wrapper_enabled=True,
+        )
+        .field(
+            "agree_terms",
+            wrapper_class="offset-2",
+            wrapper_enabled=True,
+            field_wrapper_enabled=False,
+        )
+        .field("submit", field_wrapper_class="offset-2", field_wrapper_enabled=True)
+        .field("email", label_first=False, row_attrs=dict(data_x="<&>"))
+        .field("password", label_enabled=False, error_separator=", ")
+        .add_submit("save", label="Save"),
+    ]
+
+
+@pytest.mark.parametrize("context", make_contexts())
+@pytest.mark.parametrize(
+    "formdata",
+    [
+        None,
+        dict(email="a@b.com", city="New York", agree_terms="y", csrf_token="TOKEN"),
+    ],
+)
+def test_compiled_render_matches_render(
+    context: RendererContext, formdata: typing.Optional[dict]
+):
+    compiled = context.compile(MockForm)
+    for with_errors in (False, True):
+        form = MockForm(formdata=MultiDict(formdata) if formdata else None)
+        if with_errors:
+            form.email.errors = ["Bad email", "<script>"]
+            form.agree_terms.errors = ["Required"]
+        html = compiled.render(form)
+        assert isinstance(html, Markup)
+        assert html == context.render(form)
+        buffer = io.StringIO()
+        compiled.render_to(form, buffer.write)
+        assert buffer.getvalue() == html
+
+
+def test_compiled_render_with_changed_label():
+    context = RendererContext()
+    compiled = context.compile(MockForm)
+    form = MockForm()
+    form.email.label.text = "Your email"
+    form.password.description = "Changed"
+    html = compiled.render(form)
+    assert "Your email" in html
+    assert "Changed" in html
+    assert html == context.render(form)
+
+
+def test_compiled_render_not_affected_by_context_changes():
+    context = RendererContext()
+    compiled = context.compile(MockForm)
+    expected = context.render(MockForm())
+    context.default_field(row_class="row").add_submit("extra")
+    assert compiled.render(MockForm()) == expected
+
+
+def test_compiled_render_custom_renderer():
+    def render_string(context: RendererContext, element: Field) -> Markup:
+        return Markup(f"<custom>{element.name}</custom>")
+
+    registry = RendererRegistry()
+    registry.add(renderer=render_form, target_cls=Form)
+    registry.add(renderer=render_field, target_cls=Field)
+    registry.add(renderer=render_string, target_cls=StringField)
+
+    class StringForm(Form):
+        name = StringField("Name")
+        agree = BooleanField("Agree")
+
+    context = RendererContext(registry=registry)
+    compiled = context.compile(StringForm())
+    assert compiled.fields["name"].layout is None
+    assert compiled.fields["agree"].layout is not None
+    form = StringForm()
+    assert compiled.render(form) == context.render(form)
+
+
+def test_compiled_render_other_form_class():
+    class OtherForm(Form):
+        name = StringField("Name")
+
+    compiled = RendererContext().compile(MockForm)
+    with pytest.raises(ValueError):
+        compiled.render(OtherForm())
+
+
+def test_render_many(parse_html: typing.Callable[[str], etree._ElementTree]):
+    class OtherForm(Form):
+        name = StringField("Name")
+
+    context = RendererContext().add_submit("save")
+    forms = [MockForm(), OtherForm(), MockForm()]
+    forms[2].email.errors = ["Bad email"]
+    results = list(context.render_many(forms))
+    assert len(results) == 3
+    tree = parse_html("".join(results))
+    ids = tree.xpath("//*[@id]/@id")
+    assert len(ids) == len(set(ids))
+    assert tree.xpath('//input[@id="0-email"]')
+    assert tree.xpath('//label[@for="0-email"]')
+    assert tree.xpath('//input[@id="1-name"]')
+    assert tree.xpath('//input[@id="2-save"]')
+    assert tree.xpath('//label[@for="2-email"]/following-sibling::input[@id="2-email"]')
+    # ids of the forms are restored after rendering
+    assert forms[0].email.id == "email"
+
+    for form, html in zip(forms, context.render_many(forms, id_prefix=None)):
+        assert html == context.render(form)
+
+
+def test_render_many_nested(parse_html: typing.Callable[[str], etree._ElementTree]):
+    class ItemForm(Form):
+        qty = IntegerField("Qty")
+
+    class RowForm(Form):
+        items = FieldList(FormField(ItemForm), min_entries=2)
+
+    forms = [RowForm(), RowForm()]
+    tree = parse_html("".join(RendererContext().render_many(forms)))
+    ids = tree.xpath("//*[@id]/@id")
+    assert len(ids) == len(set(ids))
+    assert tree.xpath('//label[@for="1-items-0-qty"]')
+    assert tree.xpath('//input[@id="1-items-0-qty"]/@name') == ["items-0-qty"]
+    # ids of the nested entries are restored after rendering
+    assert forms[0].items[0].qty.id == "items-0-qty"
+
+
+def test_render_many_custom_renderer(
+    parse_html: typing.Callable[[str], etree._ElementTree]
+):
+    class OtherForm(Form):
+        name = StringField("Name")
+
+    registry = RendererRegistry()
+    registry.add(renderer=render_field, target_cls=StringField)
+    registry.add(
+        renderer=lambda context, form: Markup(
+            "".join(["<section>", *render_form(context, form), "</section>"])
+        ),
+        target_cls=OtherForm,
+    )
+    context = RendererContext(registry=registry)
+    forms = [OtherForm(), OtherForm()]
+    results = list(context.render_many(forms))
+    tree = parse_html("".join(results))
+    assert tree.xpath("//section/form/div/input/@id") == ["0-name", "1-name"]
+    assert tree.xpath("//label/@for") == ["0-name", "1-name"]
+    # ids of the forms are restored after rendering
+    assert forms[0].name.id == "name"
+    assert results[0] == str(context.render(forms[0])).replace('"name"', '"0-name"', 2)
+    assert list(context.render_many(forms, id_prefix=None)) == [
+        context.render(form) for form in forms
+    ]
+
+
+def test_compiled_render_id_prefix():
+    context = RendererContext()
+    compiled = context.compile(MockForm)
+    form = MockForm()
+    html = compiled.render(form, id_prefix="row-1-")
+    for field in form:
+        field.id = f"row-1-{field.id}"
+    assert html == context.render(form)
@@ -0,0 +1,102 @@
+import json
+import pathlib
+
+import pytest
+from wtforms import Form
+from wtforms.fields import PasswordField
+from wtforms.fields import StringField
+
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.prerender import main
+from wtforms_bootstrap5.prerender import prerender
+from wtforms_bootstrap5.prerender import PrerenderSpec
+
+MODULE = __name__
+
+HORIZONTAL = RendererContext().default_field(row_class="row mb-3").add_submit().freeze()
+LAYOUTS = dict(plain=RendererContext().freeze(), compact=RendererContext().freeze())
+
+PROFILES_JSON = json.dumps(dict(inline=dict(default_field=dict(row_enabled=False))))
+
+
+class LoginForm(Form):
+    email = StringField("Email")
+    password = PasswordField("Password")
+
+
+class SearchForm(Form):
+    query = StringField("Query")
+
+
+def make_spec(tmp_path: pathlib.Path) -> PrerenderSpec:
+    profiles_path = tmp_path / "profiles.json"
+    profiles_path.write_text(PROFILES_JSON)
+    return PrerenderSpec(
+        forms=(MODULE,),
+        layouts=(f"{MODULE}:HORIZONTAL", f"{MODULE}:LAYOUTS"),
+        profiles=(str(profiles_path),),
+    )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_prerender(tmp_path: pathlib.Path, jobs: int):
+    output_dir = tmp_path / "build"
+    result = prerender(make_spec(tmp_path), output_dir=output_dir, jobs=jobs)
+    assert len(result.written) == 8
+    assert result.unchanged == ()
+    manifest = json.loads((output_dir / "manifest.json").read_text())
+    name = f"{MODULE}.LoginForm.HORIZONTAL.html"
+    assert manifest["fragments"][name]["form"] == f"{MODULE}.LoginForm"
+    assert manifest["fragments"][name]["layout"] == "HORIZONTAL"
+    assert (output_dir / name).read_text() == HORIZONTAL.render(LoginForm())
+    assert (output_dir / f"{MODULE}.SearchForm.inline.html").read_text() == (
+        RendererContext().default_field(row_enabled=False).render(SearchForm())
+    )
+
+    # nothing changed, nothing is written
+    mtime = (output_dir / name).stat().st_mtime_ns
+    result = prerender(make_spec(tmp_path), output_dir=output_dir, jobs=jobs)
+    assert result.written == ()
+    assert len(result.unchanged) == 8
+    assert (output_dir / name).stat().st_mtime_ns == mtime
+
+    # fragments are compared with the manifest instead of the files
+    (output_dir / name).write_text("outdated")
+    spec = PrerenderSpec(
+        forms=(f"{MODULE}:LoginForm",), layouts=(f"{MODULE}:HORIZONTAL",)
+    )
+    result = prerender(spec, output_dir=output_dir, jobs=jobs)
+    assert result.written == ()
+    assert result.unchanged == (name,)
+    assert len(result.removed) == 7
+    assert sorted(path.name for path in output_dir.iterdir()) == [
+        "manifest.json",
+        name,
+    ]
+
+
+def test_prerender_rewrites_changed_fragment(tmp_path: pathlib.Path):
+    spec = PrerenderSpec(forms=(f"{MODULE}:SearchForm",))
+    prerender(spec, output_dir=tmp_path, jobs=1)
+    name = f"{MODULE}.SearchForm.default.html"
+    (tmp_path / name).unlink()
+    result = prerender(spec, output_dir=tmp_path, jobs=1)
+    assert result.written == (name,)
+    assert (tmp_path / name).read_text() == RendererContext().render(SearchForm())
+
+
+def test_prerender_invalid_refs(tmp_path: pathlib.Path):
+    with pytest.raises(ValueError, match="not a form class"):
+        prerender(PrerenderSpec(forms=(f"{MODULE}:MODULE",)), output_dir=tmp_path)
+    with pytest.raises(ValueError, match="Duplicate layout name"):
+        prerender(
+            PrerenderSpec(
+                forms=(MODULE,), layouts=(f"{MODULE}:LAYOUTS", f"{MODULE}:LAYOUTS")
+            ),
+            output_dir=tmp_path,
+        )
+
+
+def test_main(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture):
+    main(["-f", f"{MODULE}:SearchForm", "-o", str(tmp_path), "-j", "1"])
+    assert capsys.readouterr().out == "1 written, 0 unchanged, 0 removed\n"
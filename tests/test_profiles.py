@@ -0,0 +1,119 @@
+import json
+import pathlib
+
+import pytest
+from wtforms import Form
+from wtforms.fields import BooleanField
+from wtforms.fields import StringField
+
+from wtforms_bootstrap5 import LayoutProfiles
+from wtforms_bootstrap5 import ProfileError
+from wtforms_bootstrap5 import RendererContext
+
+PROFILES_TOML = """
+[horizontal]
+submit = { label = "Save" }
+
+[horizontal.form]
+action = "/save"
+form_attrs = { novalidate = true }
+
+[horizontal.default_field]
+row_class = "row mb-3"
+label_class = "form-label col-2"
+field_wrapper_class = "col-10"
+field_wrapper_enabled = true
+
+[horizontal.fields.submit]
+field_wrapper_class = "offset-2"
+
+[compact]
+extends = "horizontal"
+
+[compact.default_field]
+row_class = "row mb-1"
+
+[compact.fields.submit]
+field_wrapper_enabled = false
+"""
+
+
+class MockForm(Form):
+    name = StringField("Name")
+    agree = BooleanField("Agree")
+
+
+def horizontal_context(row_class: str = "row mb-3") -> RendererContext:
+    return (
+        RendererContext()
+        .form(action="/save", form_attrs=dict(novalidate=True))
+        .default_field(
+            row_class=row_class,
+            label_class="form-label col-2",
+            field_wrapper_class="col-10",
+            field_wrapper_enabled=True,
+        )
+        .field("submit", field_wrapper_class="offset-2")
+        .add_submit(label="Save")
+    )
+
+
+def test_load_profiles(tmp_path: pathlib.Path):
+    toml_path = tmp_path / "profiles.toml"
+    toml_path.write_text(PROFILES_TOML)
+    json_path = tmp_path / "extra.json"
+    json_path.write_text(
+        json.dumps(dict(inline=dict(default_field=dict(row_enabled=False))))
+    )
+    profiles = LayoutProfiles.load(toml_path, json_path)
+    assert list(profiles) == ["horizontal", "compact", "inline"]
+    assert "compact" in profiles
+    assert profiles.get("missing") is None
+
+    form = MockForm()
+    horizontal = profiles["horizontal"]
+    assert horizontal.frozen
+    assert horizontal is profiles["horizontal"]
+    assert horizontal.render(form) == horizontal_context().render(form)
+
+    compact = profiles["compact"]
+    expected = (
+        # inherited default options apply to the inherited field options
+        horizontal_context(row_class="row mb-1").field(
+            "submit", field_wrapper_class="offset-2", field_wrapper_enabled=False
+        )
+    )
+    assert compact.render(form) == expected.render(form)
+    assert profiles["inline"].render(form) == (
+        RendererContext().default_field(row_enabled=False).render(form)
+    )
+    # presets are shared, deriving from them doesn't change them
+    html = horizontal.render(form)
+    horizontal.field("name", label_class="other").render(form)
+    assert horizontal.render(form) == html
+
+
+@pytest.mark.parametrize(
+    "profiles, message",
+    [
+        (dict(a=dict(layout={})), "unknown keys layout"),
+        (dict(a=dict(form=dict(colour="red"))), "unknown option 'colour'"),
+        (dict(a=dict(default_field=dict(row_enabled="yes"))), "invalid value"),
+        (dict(a=dict(default_field=dict(label_class=1))), "invalid value"),
+        (dict(a=dict(fields=dict(name=dict(row_attrs=[])))), "fields.name"),
+        (dict(a=dict(extends="b")), "unknown profile 'b'"),
+        (dict(a=dict(extends="b"), b=dict(extends="a")), "a -> b -> a"),
+        (dict(a=dict(submit="Save")), "submit"),
+    ],
+)
+def test_invalid_profiles(profiles: dict, message: str):
+    with pytest.raises(ProfileError, match=message):
+        LayoutProfiles(profiles)
+
+
+def test_base_context():
+    base = RendererContext().default_field(label_class="my-label")
+    profiles = LayoutProfiles(dict(plain={}), base=base)
+    form = MockForm()
+    assert profiles["plain"].render(form) == base.render(form)
+    assert not base.frozen
@@ -0,0 +1,168 @@
+import typing
+from random import Random
+
+import pytest
+from wtforms import Field
+from wtforms import Form
+from wtforms import StringField
+
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.helpers import primary_base_classes
+from wtforms_bootstrap5.helpers import traverse_base_classes
+from wtforms_bootstrap5.registry import ClassMetadata
+from wtforms_bootstrap5.registry import DEFAULT_REGISTRY
+from wtforms_bootstrap5.registry import RendererRegistry
+
+
+def mock_renderer(context, element):
+    return "MOCK"
+
+
+def other_renderer(context, element):
+    return "OTHER"
+
+
+def test_resolve():
+    registry = RendererRegistry()
+    registry.add(renderer=mock_renderer, target_cls=Field)
+    assert registry.resolve(StringField) is mock_renderer
+    assert registry.resolve(Field) is mock_renderer
+    assert registry.resolve(Form) is None
+
+
+def test_resolve_cache():
+    registry = RendererRegistry()
+    registry.add(renderer=mock_renderer, target_cls=Field)
+    assert registry.cache_info() == (0, 0, 0)
+    registry.resolve(StringField)
+    assert registry.cache_info() == (0, 1, 1)
+    registry.resolve(StringField)
+    registry.resolve(StringField)
+    assert registry.cache_info() == (2, 1, 1)
+    registry.resolve(Form)
+    assert registry.cache_info() == (2, 2, 2)
+    registry.cache_clear()
+    assert registry.cache_info() == (0, 0, 0)
+
+
+def test_resolve_cache_invalidated_by_add():
+    registry = RendererRegistry()
+    registry.add(renderer=mock_renderer, target_cls=Field)
+    version = registry.version
+    assert registry.resolve(StringField) is mock_renderer
+    registry.add(renderer=other_renderer, target_cls=StringField)
+    assert registry.version > version
+    assert registry.cache_info().currsize == 0
+    assert registry.resolve(StringField) is other_renderer
+
+
+class ReferenceRegistry:
+    """The original registry building a tree with every base class path"""
+
+    def __init__(self):
+        self.class_metadata = ClassMetadata(cls=object)
+
+    def add(self, renderer, target_cls):
+        for path in traverse_base_classes(cls=target_cls):
+            current_metadata = self.class_metadata
+            for cls in reversed(path):
+                if cls not in current_metadata.subclasses:
+                    current_metadata.subclasses[cls] = ClassMetadata(cls=cls)
+                current_metadata = current_metadata.subclasses[cls]
+            current_metadata.renderers.append(renderer)
+
+    def resolve(self, cls):
+        for path in traverse_base_classes(cls=cls):
+            current_metadata = self.class_metadata
+            metadatas = [current_metadata]
+            for base_cls in reversed(path):
+                if base_cls not in current_metadata.subclasses:
+                    break
+                current_metadata = current_metadata.subclasses[base_cls]
+                metadatas.append(current_metadata)
+            for metadata in reversed(metadatas):
+                for renderer in metadata.renderers:
+                    return renderer
+            return None
+
+
+def make_diamond_hierarchy(depth: int, seed: int) -> typing.List[typing.Type]:
+    """Build a stack of diamonds, each level doubles the number of base class paths"""
+    random = Random(seed)
+    classes = [Field]
+    current = Field
+    for level in range(depth):
+        mixin_base = type(f"MixinBase{level}", (), {})
+        left = type(f"Left{level}", (current,), {})
+        right_bases = (mixin_base, current)
+        if random.random() < 0.5:
+            right_bases = (current, mixin_base)
+        right = type(f"Right{level}", right_bases, {})
+        bases = (left, right) if random.random() < 0.5 else (right, left)
+        current = type(f"Bottom{level}", bases, {})
+        classes.extend([mixin_base, left, right, current])
+    return classes
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_resolve_matches_reference_on_diamonds(seed: int):
+    random = Random(seed)
+    classes = make_diamond_hierarchy(depth=8, seed=seed)
+    registry = RendererRegistry()
+    reference = ReferenceRegistry()
+    registry.add(renderer=mock_renderer, target_cls=object)
+    reference.add(renderer=mock_renderer, target_cls=object)
+    for index, cls in enumerate(random.sample(classes, k=len(classes) // 3)):
+
+        def renderer(context, element, index=index):
+            return index
+
+        registry.add(renderer=renderer, target_cls=cls)
+        reference.add(renderer=renderer, target_cls=cls)
+        frozen = registry.freeze()
+        for target_cls in classes:
+            assert registry.resolve(target_cls) is reference.resolve(target_cls)
+            assert frozen.resolve(target_cls) is reference.resolve(target_cls)
+
+
+def test_resolve_cost_is_linear():
+    classes = make_diamond_hierarchy(depth=12, seed=0)
+    bottom = classes[-1]
+    # every diamond doubles the number of paths
+    assert len(traverse_base_classes(cls=bottom)) >= 2**12
+    assert len(primary_base_classes(cls=bottom)) < len(bottom.__mro__)
+    registry = RendererRegistry()
+    registry.add(renderer=mock_renderer, target_cls=bottom)
+    assert registry.resolve(bottom) is mock_renderer
+
+
+def test_freeze():
+    registry = RendererRegistry()
+    registry.add(renderer=mock_renderer, target_cls=Field)
+    frozen = registry.freeze()
+    assert not hasattr(frozen, "__dict__")
+    assert registry.freeze() is frozen
+    assert frozen.freeze() is frozen
+    assert frozen.version == registry.version
+    assert frozen.resolve(StringField) is mock_renderer
+    assert frozen.resolve(Form) is None
+    assert frozen.cache_info() == (0, 2, 2)
+
+    with pytest.raises(TypeError, match="frozen registry"):
+        frozen.add(renderer=other_renderer, target_cls=StringField)
+    # adding to the builder doesn't change the snapshot taken before
+    registry.add(renderer=other_renderer, target_cls=StringField)
+    assert frozen.resolve(StringField) is mock_renderer
+    assert registry.freeze() is not frozen
+    assert registry.freeze().resolve(StringField) is other_renderer
+
+
+def test_render_with_frozen_registry():
+    class MockForm(Form):
+        name = StringField("Name")
+
+    form = MockForm()
+    context = RendererContext(DEFAULT_REGISTRY.freeze()).add_submit()
+    expected = RendererContext().add_submit()
+    assert context.render(form) == expected.render(form)
+    assert context.compile(MockForm).render(form) == expected.render(form)
@@ -1,16 +1,30 @@
+import io
 import typing
 
 import pytest
 from lxml import etree
+from markupsafe import Markup
+from wtforms import Field
 from wtforms.fields import BooleanField
 from wtforms.fields import EmailField
+from wtforms.fields import FieldList
+from wtforms.fields import FormField
 from wtforms.fields import HiddenField
+from wtforms.fields import IntegerField
 from wtforms.fields import PasswordField
+from wtforms.fields import RadioField
 from wtforms.fields import SelectField
+from wtforms.fields import SelectMultipleField
+from wtforms.fields import StringField
 from wtforms.fields import SubmitField
 from wtforms.form import Form
+from wtforms.widgets import CheckboxInput
+from wtforms.widgets import ListWidget
 
 from wtforms_bootstrap5.context import RendererContext
+from wtforms_bootstrap5.registry import register
+from wtforms_bootstrap5.registry import RendererRegistry
+from wtforms_bootstrap5.widgets import clear_choice_tables
 
 
 class MockForm(Form):
@@ -22,6 +36,28 @@ class MockForm(Form):
     csrf_token = HiddenField()
 
 
+class LineItemForm(Form):
+    name = StringField("Name")
+    qty = IntegerField("Qty")
+
+
+class OrderForm(Form):
+    items = FieldList(FormField(LineItemForm), label="Items", min_entries=3)
+    tags = FieldList(StringField("Tag"), min_entries=2)
+
+
+class ChoicesForm(Form):
+    size = RadioField("Size", choices=[("s", "Small"), ("m", "<Medium>")])
+    tags = SelectMultipleField(
+        "Tags",
+        choices=[(1, "A"), (2, "B"), (3, "C")],
+        coerce=int,
+        widget=ListWidget(prefix_label=False),
+        option_widget=CheckboxInput(),
+    )
+    colors = SelectMultipleField("Colors", choices=["red", "blue"])
+
+
 @pytest.fixture
 def renderer_context() -> RendererContext:
     return RendererContext()
@@ -199,3 +235,193 @@ def test_add_field_with_options(
     tree = parse_html(html)
     # Notice: lxml parser will add html and body automatically in the tree
     assert tree.xpath('/html/body/form/div[@class="mb-5"]/input[@name="submit"]')
+
+
+def test_iter_render(
+    renderer_context: RendererContext,
+    form: MockForm,
+):
+    chunks = list(renderer_context.add_submit("save").iter_render(form))
+    assert chunks[0] == '<form method="POST">'
+    assert chunks[-1] == "</form>"
+    assert len(chunks) > len(form._fields) + 2
+    assert "".join(chunks) == renderer_context.render(form)
+
+
+def test_iter_render_field(
+    renderer_context: RendererContext,
+    form: MockForm,
+):
+    chunks = list(renderer_context.iter_render(form.email))
+    assert chunks == [renderer_context.render(form.email)]
+
+
+def test_render_to(
+    renderer_context: RendererContext,
+    form: MockForm,
+):
+    chunks = []
+    renderer_context.render_to(form, chunks.append)
+    assert chunks == list(renderer_context.iter_render(form))
+    buffer = io.StringIO()
+    renderer_context.render_to(form.email, buffer.write)
+    assert buffer.getvalue() == renderer_context.render(form.email)
+
+
+def test_generator_renderer(
+    form: MockForm,
+):
+    registry = RendererRegistry()
+
+    @register(target_cls=Form, registry=registry)
+    def render_form(context: RendererContext, element: Form) -> typing.Iterator[str]:
+        yield "<form>"
+        for field in element:
+            yield from context.iter_render(field)
+        yield "</form>"
+
+    @register(target_cls=Field, registry=registry)
+    def render_field(context: RendererContext, element: Field) -> Markup:
+        return Markup(f"<i>{element.name}</i>")
+
+    context = RendererContext(registry=registry)
+    html = context.render(form)
+    assert isinstance(html, Markup)
+    assert html == (
+        "<form><i>email</i><i>password</i><i>city</i><i>agree_terms</i>"
+        "<i>submit</i><i>csrf_token</i></form>"
+    )
+    assert "".join(context.iter_render(form)) == html
+    chunks = []
+    context.render_to(form, chunks.append)
+    assert chunks[:2] == ["<form>", "<i>email</i>"]
+    assert "".join(chunks) == html
+
+
+def test_field_list(parse_html: typing.Callable[[str], etree._ElementTree]):
+    form = OrderForm()
+    form.items[1].form.qty.errors = ["Bad qty"]
+    form.tags.errors = ["Too many tags"]
+    html = (
+        RendererContext()
+        .field("items-*-qty", label_class="qty-label")
+        .field("items-2-qty", label_class="last-qty-label")
+        .render(form)
+    )
+    tree = parse_html(html)
+    items = tree.xpath('/html/body/form/div/fieldset[@id="items"]')[0]
+    assert items.xpath("legend/text()") == ["Items"]
+    assert items.xpath("div/fieldset/@id") == ["items-0", "items-1", "items-2"]
+    assert items.xpath("div/fieldset/div/input/@name") == [
+        f"items-{index}-{name}" for index in range(3) for name in ("name", "qty")
+    ]
+    assert items.xpath("div/fieldset/div/label/@class") == [
+        "form-label",
+        "qty-label",
+        "form-label",
+        "qty-label",
+        "form-label",
+        "last-qty-label",
+    ]
+    assert items.xpath(
+        'div/fieldset[@id="items-1"]/div/div[@class="invalid-feedback"]/text()'
+    ) == ["Bad qty"]
+    tags = tree.xpath('/html/body/form/div/fieldset[@id="tags"]')[0]
+    assert tags.xpath("div/input/@name") == ["tags-0", "tags-1"]
+    assert tags.xpath('div[@class="invalid-feedback"]/text()') == ["Too many tags"]
+
+
+def test_field_list_streaming():
+    class LargeOrderForm(Form):
+        items = FieldList(FormField(LineItemForm), min_entries=2000)
+
+    form = LargeOrderForm()
+    context = RendererContext()
+    chunks = context.iter_render(form)
+    # entries are rendered one at a time instead of building the whole subtree
+    head = "".join(next(chunks) for _ in range(20))
+    assert 'name="items-0-name"' in head
+    assert "items-1999" not in head
+    html = head + "".join(chunks)
+    assert html == context.render(form)
+    assert html.count("<fieldset") == 2001
+
+
+def test_choice_list(parse_html: typing.Callable[[str], etree._ElementTree]):
+    form = ChoicesForm(data=dict(size="m", tags=[1, 3]))
+    form.size.errors = ["Bad size"]
+    html = RendererContext().field("tags", checkbox_inline_enabled=True).render(form)
+    tree = parse_html(html)
+    size = tree.xpath('/html/body/form/div/fieldset[@id="size"]')[0]
+    assert size.xpath("legend/text()") == ["Size"]
+    assert size.xpath('div[@class="form-check"]/input/@id') == ["size-0", "size-1"]
+    assert size.xpath("div/input/@class") == ["form-check-input is-invalid"] * 2
+    assert size.xpath("div/input[@checked]/@value") == ["m"]
+    assert size.xpath("div/label/@for") == ["size-0", "size-1"]
+    assert size.xpath("div/label/text()") == ["Small", "<Medium>"]
+    # errors are next to the last input, so that Bootstrap shows them
+    assert size.xpath('div[2]/div[@class="invalid-feedback"]/text()') == ["Bad size"]
+
+    tags = tree.xpath('/html/body/form/div/fieldset[@id="tags"]')[0]
+    assert tags.xpath("div/@class") == ["form-check form-check-inline"] * 3
+    assert tags.xpath("div/input/@type") == ["checkbox"] * 3
+    assert tags.xpath("div/input[@checked]/@value") == ["1", "3"]
+    # select multiple fields with the default widget are rendered as select
+    assert tree.xpath('//select[@name="colors"]/@class') == ["form-select"]
+
+
+def test_choice_list_without_wrapper(
+    parse_html: typing.Callable[[str], etree._ElementTree]
+):
+    form = ChoicesForm()
+    form.size.errors = ["Bad size"]
+    context = RendererContext().default_field(checkbox_wrapper_enabled=False)
+    tree = parse_html(context.render(form.size))
+    assert tree.xpath("//fieldset/input/@value") == ["s", "m"]
+    assert tree.xpath('//fieldset/div[@class="invalid-feedback"]/text()') == [
+        "Bad size"
+    ]
+
+
+def test_choice_list_compiled():
+    form = ChoicesForm(data=dict(size="s", tags=[2], colors=["blue"]))
+    context = RendererContext()
+    compiled_form = context.compile(ChoicesForm)
+    assert compiled_form.fields["size"].layout is None
+    assert compiled_form.fields["colors"].layout is not None
+    assert compiled_form.render(form) == context.render(form)
+
+
+def test_choice_list_attribute_types():
+    form = ChoicesForm()
+    context = RendererContext().field("size", field_attrs={"data-k": 1})
+    other_context = RendererContext().field("size", field_attrs={"data-k": True})
+    assert 'data-k="1"' in context.render(form.size)
+    html = other_context.render(form.size)
+    assert "data-k " in html
+    assert 'data-k="1"' not in html
+
+
+def test_choice_list_entries(parse_html: typing.Callable[[str], etree._ElementTree]):
+    # the entries share the cached choices of each field
+    clear_choice_tables()
+    form_cls = type(
+        "ChoicesListForm",
+        (Form,),
+        dict(items=FieldList(FormField(ChoicesForm), min_entries=3)),
+    )
+    form = form_cls(data=dict(items=[dict(size="s"), dict(size="m"), {}]))
+    tree = parse_html(RendererContext().render(form))
+    assert tree.xpath('//fieldset[@id="items-1-size"]/div/input/@id') == [
+        "items-1-size-0",
+        "items-1-size-1",
+    ]
+    assert (
+        tree.xpath('//fieldset[@id="items-1-size"]/div/input/@name')
+        == ["items-1-size"] * 2
+    )
+    assert tree.xpath('//fieldset[@id="items-1-size"]/div/label/@for') == [
+        "items-1-size-0",
+        "items-1-size-1",
+    ]
+    assert tree.xpath("//input[@checked]/@id") == ["items-0-size-0", "items-1-size-1"]
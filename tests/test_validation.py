@@ -0,0 +1,97 @@
+import typing
+
+from lxml import etree
+from wtforms import Form
+from wtforms import validators
+from wtforms.fields import BooleanField
+from wtforms.fields import EmailField
+from wtforms.fields import IntegerField
+from wtforms.fields import StringField
+from wtforms.fields import TextAreaField
+
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.validation import clear_cache
+from wtforms_bootstrap5.validation import client_validation_attrs
+from wtforms_bootstrap5.validation import VALIDATION_ATTRIBUTES
+from wtforms_bootstrap5.validation import validation_attributes
+
+
+class Even:
+    def __call__(self, form, field):
+        if field.data % 2:
+            raise validators.ValidationError("Must be even")
+
+
+class StrictLength(validators.Length):
+    pass
+
+
+class MockForm(Form):
+    name = StringField(
+        "Name", validators=[validators.InputRequired(), validators.Length(2, 20)]
+    )
+    email = StringField("Email", validators=[validators.Email()])
+    other_email = EmailField("Other email", validators=[validators.Email()])
+    website = StringField("Website", validators=[validators.URL()])
+    code = StringField("Code", validators=[validators.Regexp(r"[A-Z]{3}\d+")])
+    python_code = StringField(
+        "Python code", validators=[validators.Regexp(r"(?P<prefix>[A-Z]+)\Z")]
+    )
+    age = IntegerField("Age", validators=[validators.NumberRange(min=18)])
+    count = IntegerField("Count", validators=[Even()])
+    bio = TextAreaField("Bio", validators=[StrictLength(max=200)])
+    agree = BooleanField("Agree", validators=[validators.DataRequired()])
+
+
+def test_client_validation_attrs():
+    form = MockForm()
+    assert client_validation_attrs(form.name) == dict(
+        required=True, minlength=2, maxlength=20
+    )
+    assert client_validation_attrs(form.email) == dict(type="email")
+    assert client_validation_attrs(form.other_email) == {}
+    assert client_validation_attrs(form.website) == dict(type="url")
+    assert client_validation_attrs(form.code) == dict(pattern=r"(?:[A-Z]{3}\d+).*")
+    assert client_validation_attrs(form.python_code) == {}
+    assert client_validation_attrs(form.age) == dict(min=18)
+    assert client_validation_attrs(form.count) == {}
+    assert client_validation_attrs(form.bio) == dict(maxlength=200)
+    assert client_validation_attrs(form.agree) == dict(required=True)
+    # computed once and shared by all instances of the form class
+    assert client_validation_attrs(MockForm().name) is client_validation_attrs(
+        form.name
+    )
+
+
+def test_custom_validator_attributes():
+    @validation_attributes(Even)
+    def even_attributes(validator: Even) -> typing.Dict[str, typing.Any]:
+        return dict(step=2)
+
+    try:
+        assert client_validation_attrs(MockForm().count) == dict(step=2)
+    finally:
+        del VALIDATION_ATTRIBUTES[Even]
+        clear_cache()
+
+
+def test_render_client_validation(
+    parse_html: typing.Callable[[str], etree._ElementTree],
+):
+    form = MockForm()
+    assert RendererContext().render(form) == RendererContext().default_field(
+        client_validation_enabled=False
+    ).render(form)
+    context = (
+        RendererContext()
+        .default_field(client_validation_enabled=True)
+        .field("website", field_attrs=dict(type="text"))
+    )
+    for html in (context.render(form), context.compile(MockForm).render(form)):
+        tree = parse_html(html)
+        assert tree.xpath('//input[@name="email"]/@type') == ["email"]
+        assert tree.xpath('//input[@name="website"]/@type') == ["text"]
+        assert tree.xpath('//input[@name="code"]/@pattern') == [r"(?:[A-Z]{3}\d+).*"]
+        assert tree.xpath('//input[@name="age"]/@min') == ["18"]
+        assert tree.xpath('//textarea[@name="bio"]/@maxlength') == ["200"]
+    assert context.fingerprint(form) != RendererContext().fingerprint(form)
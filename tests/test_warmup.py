@@ -0,0 +1,81 @@
+import gc
+import tracemalloc
+
+import pytest
+from wtforms import Form
+from wtforms.fields import FieldList
+from wtforms.fields import FormField
+from wtforms.fields import SelectField
+from wtforms.fields import StringField
+from wtforms.fields import TextAreaField
+
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5 import RendererRegistry
+from wtforms_bootstrap5.renderers import render_field
+from wtforms_bootstrap5.renderers import render_form
+from wtforms_bootstrap5.widgets import clear_option_tables
+from wtforms_bootstrap5.widgets import get_option_table
+
+
+class AddressForm(Form):
+    city = StringField("City")
+
+
+class ProfileForm(Form):
+    name = StringField("Name")
+    country = SelectField("Country", choices=[("fr", "France"), ("jp", "Japan")])
+    bio = TextAreaField("Bio")
+    addresses = FieldList(FormField(AddressForm), min_entries=2)
+
+
+class CustomForm(Form):
+    name = StringField("Name")
+
+
+def test_warm():
+    clear_option_tables()
+    context = RendererContext().add_submit()
+    report = context.warm(ProfileForm, AddressForm)
+    assert report.form_count == 2
+    # 4 fields, 2 address forms with a city each and the submit button, plus the
+    # city and the submit button of the address form
+    assert report.field_count == 11
+    assert report.duration > 0
+    assert report.peak_memory >= report.memory
+    assert set(report.compiled_forms) == {ProfileForm, AddressForm}
+
+    registry_info = context.registry.cache_info()
+    form = ProfileForm(data=dict(country="jp"))
+    assert get_option_table(form.country) is get_option_table(
+        ProfileForm(meta=dict(csrf=False)).country
+    )
+    assert report.compiled_forms[ProfileForm].render(form) == context.render(form)
+    # everything was resolved by the warm-up
+    assert context.registry.cache_info().misses == registry_info.misses
+
+
+def test_warm_without_reset_peak(monkeypatch: pytest.MonkeyPatch):
+    # tracemalloc.reset_peak is not available on Python 3.8
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    report = RendererContext().warm(ProfileForm)
+    assert report.field_count == 8
+    assert report.peak_memory >= report.memory
+
+
+def test_warm_custom_renderer():
+    registry = RendererRegistry()
+    registry.add(renderer=render_field, target_cls=StringField)
+    registry.add(
+        renderer=lambda context, form: render_form(context, form), target_cls=CustomForm
+    )
+    report = RendererContext(registry).warm(CustomForm)
+    assert report.field_count == 1
+    assert report.compiled_forms == {}
+
+
+def test_warm_freeze_gc():
+    try:
+        RendererContext().warm(ProfileForm, freeze_gc=True)
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
@@ -0,0 +1,325 @@
+import typing
+
+import pytest
+from markupsafe import Markup
+from wtforms import Form
+from wtforms import validators
+from wtforms.fields import BooleanField
+from wtforms.fields import DateField
+from wtforms.fields import DecimalField
+from wtforms.fields import EmailField
+from wtforms.fields import HiddenField
+from wtforms.fields import IntegerField
+from wtforms.fields import IntegerRangeField
+from wtforms.fields import PasswordField
+from wtforms.fields import RadioField
+from wtforms.fields import SearchField
+from wtforms.fields import SelectField
+from wtforms.fields import SelectMultipleField
+from wtforms.fields import StringField
+from wtforms.fields import SubmitField
+from wtforms.fields import TelField
+from wtforms.fields import TextAreaField
+from wtforms.fields import URLField
+from wtforms.meta import DefaultMeta
+from wtforms.widgets import NumberInput
+from wtforms.widgets import PasswordInput
+from wtforms.widgets import TextInput
+
+from wtforms_bootstrap5 import RendererContext
+from wtforms_bootstrap5.widgets import clear_choice_tables
+from wtforms_bootstrap5.widgets import clear_option_tables
+from wtforms_bootstrap5.widgets import get_option_table
+from wtforms_bootstrap5.widgets import render_choices
+from wtforms_bootstrap5.widgets import render_input
+from wtforms_bootstrap5.widgets import render_widget
+
+COUNTRIES = [(f"c{i}", f"Country <{i}> & co") for i in range(300)]
+
+
+class MockForm(Form):
+    country = SelectField("Country", choices=COUNTRIES)
+    plain = SelectField("Plain", choices=["a", "b<", "c&"])
+    number = SelectField(
+        "Number",
+        choices=[(i, f"#{i}") for i in range(10)],
+        coerce=int,
+        validators=[validators.InputRequired()],
+    )
+    grouped = SelectField(
+        "Grouped",
+        choices={"Europe": [("fr", "France"), ("de", "Germany")], "Asia": ["jp"]},
+    )
+    tags = SelectMultipleField(
+        "Tags", choices=[("a", "A"), ("b", "B"), ("c", "C")], render_kw=dict(size=3)
+    )
+    grouped_tags = SelectMultipleField(
+        "Grouped tags", choices={"One": [("a", "A"), ("b", "B")], "Two": [("c", "C")]}
+    )
+    with_kw = SelectField(
+        "With kw", choices=[("a", "A", dict(disabled=True)), ("b", "B", {})]
+    )
+    empty = SelectField("Empty", choices=[])
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        dict(
+            country="c42",
+            plain="b<",
+            number=7,
+            grouped="jp",
+            tags=["a", "c"],
+            grouped_tags=["b", "c"],
+            with_kw="a",
+        ),
+        dict(number=99, tags=[], grouped_tags=["x"]),
+    ],
+)
+@pytest.mark.parametrize(
+    "kwargs", [{}, dict(class_="form-select", data_foo="bar", id="custom-id")]
+)
+def test_render_input(data: dict, kwargs: dict):
+    form = MockForm(data=data)
+    for field in form:
+        assert render_input(field, dict(kwargs)) == field(**kwargs)
+        # rendered again from cache
+        html = render_input(field, dict(kwargs))
+        assert isinstance(html, Markup)
+        assert html == field(**kwargs)
+
+
+def test_option_table_cache():
+    clear_option_tables()
+    first_form = MockForm()
+    second_form = MockForm()
+    table = get_option_table(first_form.country)
+    assert table is not None
+    assert get_option_table(second_form.country) is table
+    # static choices are copied for each form instance, changing them on the instance
+    # only affects the instance
+    second_form.country.choices = COUNTRIES[:10]
+    assert get_option_table(second_form.country) is not table
+    assert render_input(second_form.country, {}).count("<option") == 10
+    # render_kw of choices cannot be cached
+    assert get_option_table(first_form.with_kw) is None
+
+
+def test_render_input_fallback():
+    class CustomMeta(DefaultMeta):
+        def render_field(self, field, render_kw):
+            return Markup("<custom>")
+
+    class CustomMetaForm(MockForm):
+        Meta = CustomMeta
+
+    class CustomSelectField(SelectField):
+        def iter_choices(self):
+            yield ("x", "X", False, {})
+
+    class CustomFieldForm(Form):
+        country = CustomSelectField("Country", choices=COUNTRIES)
+
+    form = CustomMetaForm()
+    assert render_input(form.country, {}) == Markup("<custom>")
+    form = CustomFieldForm()
+    assert render_input(form.country, {}) == form.country()
+    assert render_input(form.country, {}).count("<option") == 1
+
+
+class MultiDict(dict):
+    def getlist(self, key: str) -> typing.List[str]:
+        return self[key]
+
+
+class CustomInput(TextInput):
+    def __call__(self, field, **kwargs):
+        return Markup("<custom-input>")
+
+
+class InputForm(Form):
+    name = StringField(
+        "Name", validators=[validators.InputRequired(), validators.Length(2, 20)]
+    )
+    email = EmailField("Email", render_kw=dict(placeholder="Email", data_x="<y>"))
+    password = PasswordField("Password")
+    visible_password = PasswordField("Password", widget=PasswordInput(hide_value=False))
+    age = IntegerField("Age", validators=[validators.NumberRange(0, 150)])
+    price = DecimalField("Price")
+    ranged = IntegerRangeField("Range", widget=NumberInput(step=5, min=0, max=100))
+    token = HiddenField()
+    bio = TextAreaField("Bio", validators=[validators.Optional()])
+    agree = BooleanField("Agree")
+    birthday = DateField("Birthday")
+    website = URLField("Website")
+    phone = TelField("Phone")
+    query = SearchField("Search")
+    submit = SubmitField("Save & <go>")
+    custom = StringField("Custom", widget=CustomInput())
+    disabled = StringField("Disabled", render_kw=dict(disabled=True))
+
+
+INPUT_FORMDATA = dict(
+    name=['John "<Doe>"'],
+    email=["a&b@example.com"],
+    password=["secret"],
+    visible_password=["secret"],
+    age=["abc"],
+    price=["1.50"],
+    ranged=["15"],
+    token=["<token>"],
+    bio=["Line 1\r\n<b>Line 2</b>"],
+    agree=["y"],
+    birthday=["2022-01-02"],
+    website=["https://example.com/?a=1&b=2"],
+    phone=["+1 234"],
+    query=["'quoted'"],
+    custom=["value"],
+    disabled=["value"],
+)
+
+
+@pytest.mark.parametrize("formdata", [None, INPUT_FORMDATA])
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        dict(class_="form-control is-invalid", data_foo="bar", aria_label="x"),
+        dict(id="custom-id", value="<override>", required=False, checked=False),
+    ],
+)
+def test_native_input(formdata: typing.Optional[dict], kwargs: dict):
+    form = InputForm(formdata=MultiDict(formdata) if formdata else None)
+    form.validate()
+    for field in form:
+        html = render_input(field, dict(kwargs), native=True)
+        assert isinstance(html, Markup)
+        assert html == field(**kwargs), field.name
+        html = render_widget(field, dict(kwargs), native=True)
+        assert html == field.widget(field, **kwargs), field.name
+
+
+def test_native_input_golden():
+    form = InputForm(formdata=MultiDict(INPUT_FORMDATA))
+    assert render_input(form.name, dict(class_="form-control"), native=True) == (
+        '<input class="form-control" id="name" maxlength="20" minlength="2" '
+        'name="name" required type="text" value="John &#34;&lt;Doe&gt;&#34;">'
+    )
+    assert render_input(form.password, {}, native=True) == (
+        '<input id="password" name="password" type="password" value="">'
+    )
+    assert render_input(form.agree, {}, native=True) == (
+        '<input checked id="agree" name="agree" type="checkbox" value="y">'
+    )
+    assert render_input(form.bio, {}, native=True) == (
+        '<textarea id="bio" name="bio">\r\nLine 1\r\n&lt;b&gt;Line 2&lt;/b&gt;'
+        "</textarea>"
+    )
+    assert render_widget(form.submit, {}, native=True) == (
+        '<input id="submit" name="submit" type="submit" value="Save &amp; &lt;go&gt;">'
+    )
+    assert render_input(form.custom, {}, native=True) == "<custom-input>"
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_native_input_form(compiled: bool):
+    form = InputForm(formdata=MultiDict(INPUT_FORMDATA))
+    form.validate()
+    context = RendererContext().add_submit()
+    native_context = RendererContext().default_field(native_input_enabled=True)
+    native_context.add_submit()
+    if compiled:
+        html = native_context.compile(InputForm).render(form)
+    else:
+        html = native_context.render(form)
+    assert html == context.render(form)
+
+
+class UncachedRadioField(RadioField):
+    class _Option(RadioField._Option):
+        pass
+
+
+class RadioForm(Form):
+    size = RadioField(
+        "Size",
+        choices=[(str(i), f"Size <{i}>") for i in range(300)],
+        validators=[validators.InputRequired()],
+    )
+    uncached_size = UncachedRadioField(
+        "Size",
+        choices=[(str(i), f"Size <{i}>") for i in range(300)],
+        validators=[validators.InputRequired()],
+    )
+
+
+def render_choice(choice) -> str:
+    return f"{choice(**{'class': 'form-check-input'})}{choice.label()}"
+
+
+def render_all(field) -> typing.List[str]:
+    return [render_choice(choice) for choice in field]
+
+
+@pytest.mark.parametrize("data", [None, "0", "42", "299", "missing"])
+def test_render_choices(data: typing.Optional[str]):
+    clear_choice_tables()
+    for prefix in ("", "a&b", ""):
+        form = RadioForm(data=dict(size=data, uncached_size=data), prefix=prefix)
+        html = render_choices(form.size, render_choice, key="test")
+        assert html == render_all(form.size)
+        uncached_html = render_choices(form.uncached_size, render_choice, key="test")
+        assert [item.replace("uncached_size", "size") for item in uncached_html] == html
+        assert sum("checked" in item for item in html) == (
+            0 if data in (None, "missing") else 1
+        )
+
+
+def test_choice_table_cache():
+    clear_choice_tables()
+    calls = []
+
+    def counting_render_choice(choice) -> str:
+        calls.append(choice.id)
+        return render_choice(choice)
+
+    render_choices(RadioForm().size, counting_render_choice, key="test")
+    # checked and unchecked HTML of each choice
+    assert len(calls) == 600
+    render_choices(RadioForm(data=dict(size="1")).size, counting_render_choice, "test")
+    assert len(calls) == 600
+    # fields with different ids and names share the same choices
+    form = RadioForm(prefix="other")
+    assert render_choices(form.size, counting_render_choice, key="test") == (
+        render_all(form.size)
+    )
+    assert len(calls) == 600
+    for i in range(20):
+        form = RadioForm(data=dict(size=str(i)), prefix=f"form-{i}")
+        assert render_choices(form.size, counting_render_choice, key="test") == (
+            render_all(form.size)
+        )
+    assert len(calls) == 600
+    # different rendering options or choices are cached separately
+    render_choices(RadioForm().size, counting_render_choice, key="other")
+    assert len(calls) == 1200
+    form = RadioForm()
+    form.size.choices = [("a", "A")]
+    assert render_choices(form.size, counting_render_choice, key="test") == (
+        render_all(form.size)
+    )
+    assert len(calls) == 1202
+
+
+def test_choice_table_render_kw_types():
+    clear_choice_tables()
+    form = RadioForm()
+    form.size.render_kw = {"data-k": 1}
+    assert 'data-k="1"' in render_choices(form.size, render_choice, key="test")[0]
+    form = RadioForm()
+    form.size.render_kw = {"data-k": True}
+    html = render_choices(form.size, render_choice, key="test")
+    assert html == render_all(form.size)
+    assert 'data-k="1"' not in html[0]
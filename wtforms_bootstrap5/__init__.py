@@ -1,6 +1,19 @@
 from . import renderers as _renderers  # noqa: F401
+from .cache import DiskCacheBackend  # noqa: F401
+from .cache import FragmentCache  # noqa: F401
+from .cache import MemoryCacheBackend  # noqa: F401
 from .context import FieldOptions  # noqa: F401
+from .context import PartialRender  # noqa: F401
 from .context import RendererContext  # noqa: F401
+from .instrumentation import RenderEvent  # noqa: F401
+from .instrumentation import RenderStatsCollector  # noqa: F401
+from .labels import LABEL_CACHE  # noqa: F401
+from .labels import LabelCacheInfo  # noqa: F401
+from .layout import CompiledForm  # noqa: F401
+from .profiles import LayoutProfiles  # noqa: F401
+from .profiles import ProfileError  # noqa: F401
 from .registry import DEFAULT_REGISTRY  # noqa: F401
 from .registry import FormElement  # noqa: F401
+from .registry import FrozenRendererRegistry  # noqa: F401
 from .registry import RendererRegistry  # noqa: F401
+from .warmup import WarmUpReport  # noqa: F401
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import collections
+import os
+import pathlib
+import tempfile
+import threading
+import typing
+
+from markupsafe import Markup
+
+from .fingerprint import fingerprint
+from .registry import FormElement
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .context import RendererContext
+
+
+class CacheBackend(typing.Protocol):
+    def get(self, key: str) -> typing.Optional[str]:
+        ...
+
+    def set(self, key: str, value: str) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+
+class FragmentCacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    # number of renders skipped the cache because the element cannot be fingerprinted
+    bypasses: int
+    # number of cached fragments
+    currsize: int
+
+
+class MemoryCacheBackend:
+    """In-process cache backend, least recently used fragments are evicted once there
+    are more than `max_entries` fragments or their total size exceeds `max_size`
+    bytes
+    """
+
+    def __init__(self, max_entries: int = 1024, max_size: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[
+            str, typing.Tuple[str, int]
+        ] = collections.OrderedDict()
+
+    def get(self, key: str) -> typing.Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_size:
+            return
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.size -= old_entry[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheBackend:
+    """Local disk cache backend, each fragment is stored as a file in the given
+    directory. Least recently used fragments are evicted once there are more than
+    `max_entries` fragments or their total size exceeds `max_size` bytes
+    """
+
+    suffix = ".html"
+
+    def __init__(
+        self,
+        directory: typing.Union[str, os.PathLike],
+        max_entries: int = 10000,
+        max_size: int = 256 * 1024 * 1024,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[str, int] = collections.OrderedDict()
+        existing_files = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            stat = path.stat()
+            existing_files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(existing_files):
+            self._entries[key] = size
+            self.size += size
+        with self._lock:
+            self._evict()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self.size > self.max_size:
+            key, size = self._entries.popitem(last=False)
+            self.size -= size
+            self._path(key).unlink(missing_ok=True)
+
+    def get(self, key: str) -> typing.Optional[str]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            value = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self.size -= size
+            return None
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        data = value.encode("utf-8")
+        if len(data) > self.max_size:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fo:
+                fo.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            old_size = self._entries.pop(key, None)
+            if old_size is not None:
+                self.size -= old_size
+            self._entries[key] = len(data)
+            self.size += len(data)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in self._entries:
+                self._path(key).unlink(missing_ok=True)
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FragmentCache:
+    """Cache of rendered forms and fields, keyed by the fingerprint of everything
+    affecting the rendered HTML. Elements which cannot be fingerprinted safely, such
+    as CSRF token fields, are always rendered without the cache.
+    """
+
+    def __init__(self, backend: typing.Optional[CacheBackend] = None):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self._hits = 0
+        self._misses = 0
+        self._bypasses = 0
+
+    def render(
+        self,
+        context: RendererContext,
+        element: FormElement,
+        render: typing.Callable[[FormElement], Markup],
+    ) -> Markup:
+        key = fingerprint(context, element)
+        if key is None:
+            self._bypasses += 1
+            return render(element)
+        html = self.backend.get(key)
+        if html is not None:
+            self._hits += 1
+            return Markup(html)
+        self._misses += 1
+        html = render(element)
+        self.backend.set(key, str(html))
+        return html
+
+    def iter_render(
+        self,
+        context: RendererContext,
+        element: FormElement,
+        iter_render: typing.Callable[[FormElement], typing.Iterator[str]],
+    ) -> typing.Iterator[str]:
+        key = fingerprint(context, element)
+        if key is None:
+            self._bypasses += 1
+            yield from iter_render(element)
+            return
+        html = self.backend.get(key)
+        if html is not None:
+            self._hits += 1
+            yield Markup(html)
+            return
+        self._misses += 1
+        chunks = []
+        for chunk in iter_render(element):
+            chunks.append(chunk)
+            yield chunk
+        self.backend.set(key, "".join(chunks))
+
+    def cache_info(self) -> FragmentCacheInfo:
+        return FragmentCacheInfo(
+            hits=self._hits,
+            misses=self._misses,
+            bypasses=self._bypasses,
+            currsize=len(self.backend),
+        )
+
+    def cache_clear(self):
+        self.backend.clear()
+        self._hits = 0
+        self._misses = 0
+        self._bypasses = 0
@@ -1,16 +1,62 @@
 from __future__ import annotations
 
+import contextlib
 import dataclasses
+import functools
+import hashlib
+import re
+import threading
+import types
 import typing
+import weakref
 
 from markupsafe import Markup
+from wtforms import Field
+from wtforms import Form
 from wtforms import SubmitField
 from wtforms.fields.core import UnboundField
 
-from .helpers import traverse_base_classes
+from .cache import FragmentCache
+from .fingerprint import fingerprint as compute_fingerprint
+from .helpers import close_tag
+from .helpers import open_tag
+from .helpers import typed_items
+from .instrumentation import iter_observed
+from .instrumentation import RenderObserver
+from .layout import CompiledForm
+from .layout import COMPILERS
+from .layout import prefixed_id
+from .lazy import resolve_lazy_values
+from .registry import AnyRendererRegistry
 from .registry import DEFAULT_REGISTRY
 from .registry import FormElement
-from .registry import RendererRegistry
+from .registry import FormElementRenderer
+from .warmup import warm_up
+from .warmup import WarmUpReport
+
+
+@dataclasses.dataclass(frozen=True)
+class FormTags:
+    form_open: str
+    form_close: str
+
+
+@dataclasses.dataclass(frozen=True)
+class FieldTags:
+    row_open: str
+    row_close: str
+    wrapper_open: str
+    wrapper_close: str
+    field_wrapper_open: str
+    field_wrapper_close: str
+    checkbox_wrapper_open: str
+    checkbox_wrapper_close: str
+    choice_wrapper_open: str
+    choice_wrapper_close: str
+    help_open: str
+    help_close: str
+    error_open: str
+    error_close: str
 
 
 @dataclasses.dataclass(frozen=True)
@@ -28,6 +74,26 @@ class FormOptions:
     # Enable form or not
     form_enabled: bool = True
 
+    @functools.cached_property
+    def tags(self) -> FormTags:
+        """Rendered opening and closing tags, generated once per options object"""
+        base_attrs = {}
+        if self.action is not None:
+            base_attrs["action"] = self.action
+        if self.method is not None:
+            base_attrs["method"] = self.method
+        if self.enctype is not None:
+            base_attrs["enctype"] = self.enctype
+        return FormTags(
+            form_open=open_tag(
+                enabled=self.form_enabled,
+                class_name=self.form_class,
+                attrs=dict(base_attrs, **self.form_attrs),
+                tag="form",
+            ),
+            form_close=close_tag(enabled=self.form_enabled, tag="form"),
+        )
+
 
 @dataclasses.dataclass(frozen=True)
 class FieldOptions:
@@ -58,6 +124,11 @@ class FieldOptions:
     field_attrs: typing.Dict[str, str] = dataclasses.field(default_factory=dict)
     # invalid class for validation
     field_invalid_class: typing.Optional[str] = "is-invalid"
+    # generate common input elements directly instead of calling WTForms widgets,
+    # the HTML is the same
+    native_input_enabled: bool = False
+    # add HTML5 validation attributes derived from the field's validators
+    client_validation_enabled: bool = False
 
     # class for submit field input element
     submit_field_class: typing.Optional[str] = "btn btn-primary"
@@ -75,6 +146,11 @@ class FieldOptions:
     )
     # enable checkbox wrapper
     checkbox_wrapper_enabled: bool = True
+    # class added to the checkbox wrapper div of each choice in radio and checkbox
+    # lists, for laying out the choices inline
+    checkbox_inline_class: typing.Optional[str] = "form-check-inline"
+    # lay out the choices of radio and checkbox lists inline
+    checkbox_inline_enabled: bool = False
 
     # class for select input element
     select_field_class: typing.Optional[str] = "form-select"
@@ -103,6 +179,96 @@ class FieldOptions:
     # enable help message
     help_enabled: bool = True
 
+    @functools.cached_property
+    def tags(self) -> FieldTags:
+        """Rendered opening and closing tags, generated once per options object"""
+        choice_wrapper_class = self.checkbox_wrapper_class
+        if self.checkbox_inline_enabled and self.checkbox_inline_class is not None:
+            choice_wrapper_class = " ".join(
+                filter(None, [choice_wrapper_class, self.checkbox_inline_class])
+            )
+        return FieldTags(
+            row_open=open_tag(
+                enabled=self.row_enabled,
+                class_name=self.row_class,
+                attrs=self.row_attrs,
+            ),
+            row_close=close_tag(enabled=self.row_enabled),
+            wrapper_open=open_tag(
+                enabled=self.wrapper_enabled,
+                class_name=self.wrapper_class,
+                attrs=self.wrapper_attrs,
+            ),
+            wrapper_close=close_tag(enabled=self.wrapper_enabled),
+            field_wrapper_open=open_tag(
+                enabled=self.field_wrapper_enabled,
+                class_name=self.field_wrapper_class,
+                attrs=self.field_wrapper_attrs,
+            ),
+            field_wrapper_close=close_tag(enabled=self.field_wrapper_enabled),
+            checkbox_wrapper_open=open_tag(
+                enabled=self.checkbox_wrapper_enabled,
+                class_name=self.checkbox_wrapper_class,
+                attrs=self.checkbox_wrapper_attrs,
+            ),
+            checkbox_wrapper_close=close_tag(enabled=self.checkbox_wrapper_enabled),
+            choice_wrapper_open=open_tag(
+                enabled=self.checkbox_wrapper_enabled,
+                class_name=choice_wrapper_class,
+                attrs=self.checkbox_wrapper_attrs,
+            ),
+            choice_wrapper_close=close_tag(enabled=self.checkbox_wrapper_enabled),
+            help_open=open_tag(
+                enabled=True, class_name=self.help_class, attrs=self.help_attrs
+            ),
+            help_close=close_tag(enabled=True),
+            error_open=open_tag(
+                enabled=True, class_name=self.error_class, attrs=self.error_attrs
+            ),
+            error_close=close_tag(enabled=True),
+        )
+
+
+Options = typing.TypeVar("Options", FormOptions, FieldOptions)
+
+_interned_options: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+_interned_options_lock = threading.Lock()
+
+
+def _options_key(options: Options) -> typing.Hashable:
+    values = []
+    for field in dataclasses.fields(options):
+        value = getattr(options, field.name)
+        if isinstance(value, dict):
+            value = frozenset(typed_items(value))
+        values.append((value.__class__, value))
+    key = (options.__class__, tuple(values))
+    hash(key)
+    return key
+
+
+def intern_options(options: Options) -> Options:
+    """Return the canonical object equal to given options, so that equal options
+    share the same object and its cached tags
+
+    :param options: the form or field options to intern
+    :return: the interned options, or the given one if it's not hashable
+    """
+    try:
+        key = _options_key(options)
+    except TypeError:
+        return options
+    with _interned_options_lock:
+        interned = _interned_options.get(key)
+        if interned is None:
+            _interned_options[key] = options
+            interned = options
+    return interned
+
+
+# Index of FieldList entries in field names, such as `1` in `items-1-qty`
+_ENTRY_INDEX = re.compile(r"(?<=-)\d+(?=-|$)")
+
 
 @dataclasses.dataclass(frozen=True)
 class ExtraField:
@@ -110,60 +276,345 @@ class ExtraField:
     field: UnboundField
 
 
+@dataclasses.dataclass(frozen=True)
+class PartialRender:
+    # rendered HTML of each requested field, in the requested order
+    fragments: typing.Dict[str, Markup]
+    # digest of each rendered HTML, to be passed back for the next render
+    fingerprints: typing.Dict[str, str]
+    # names of fields with rendered HTML different from the previous render
+    changed: typing.Tuple[str, ...]
+
+
 class RendererContext:
     def __init__(
         self,
-        registry: RendererRegistry = DEFAULT_REGISTRY,
+        registry: AnyRendererRegistry = DEFAULT_REGISTRY,
         submit_field_cls: typing.Type = SubmitField,
         default_form_options: FormOptions = FormOptions(),
         default_field_options: FieldOptions = FieldOptions(),
+        observer: typing.Optional[RenderObserver] = None,
+        fragment_cache: typing.Optional[FragmentCache] = None,
     ):
-        self.form_options = default_form_options
-        self.default_field_options = default_field_options
+        self.form_options = intern_options(default_form_options)
+        self.default_field_options = intern_options(default_field_options)
         self.registry = registry
         self.field_options: typing.Dict[str, FieldOptions] = {}
         self.submit_field_cls = submit_field_cls
-        self.extra_fields: typing.List[UnboundField] = []
+        self.extra_fields: typing.List[ExtraField] = []
+        # Frozen context is never modified, calling the option methods returns a
+        # modified copy instead
+        self.frozen: bool = False
+        # Observer to be notified for every rendered element
+        self.observer: typing.Optional[RenderObserver] = observer
+        # Cache of rendered forms and fields
+        self.fragment_cache: typing.Optional[FragmentCache] = fragment_cache
 
     def form(self, **kwargs) -> RendererContext:
-        old_options = dataclasses.asdict(self.form_options)
-        self.form_options = FormOptions(**dict(old_options, **kwargs))
-        return self
+        context = self._writable()
+        context.form_options = intern_options(
+            dataclasses.replace(context.form_options, **kwargs)
+        )
+        return context
 
     def field(self, *names: str, **kwargs: str) -> RendererContext:
+        context = self._writable()
         for name in names:
-            old_options = dataclasses.asdict(
-                self.field_options.get(name, self.default_field_options)
+            context.field_options[name] = intern_options(
+                dataclasses.replace(
+                    context.field_options.get(name, context.default_field_options),
+                    **kwargs,
+                )
             )
-            self.field_options[name] = FieldOptions(**dict(old_options, **kwargs))
-        return self
+        return context
+
+    def resolve_field_options(self, name: str) -> FieldOptions:
+        """Find the options for the field with given name. For entries of FieldList,
+        the options can be set with `*` in place of the entry index, such as
+        `items-*-qty`, options set for the exact name take precedence.
+
+        :param name: the name of field
+        :return: the field options
+        """
+        options = self.field_options.get(name)
+        if options is not None:
+            return options
+        if self.field_options:
+            pattern = _ENTRY_INDEX.sub("*", name)
+            if pattern != name:
+                options = self.field_options.get(pattern)
+                if options is not None:
+                    return options
+        return self.default_field_options
 
     def default_field(self, **kwargs: str) -> RendererContext:
-        self.default_field_options = FieldOptions(
-            **dict(dataclasses.asdict(self.default_field_options), **kwargs)
+        context = self._writable()
+        context.default_field_options = intern_options(
+            dataclasses.replace(context.default_field_options, **kwargs)
         )
-        return self
+        return context
 
     def add_field(self, name: str, field: UnboundField) -> RendererContext:
-        self.extra_fields.append(ExtraField(name=name, field=field))
-        return self
+        context = self._writable()
+        context.extra_fields.append(ExtraField(name=name, field=field))
+        return context
 
     def add_submit(self, name="submit", **kwargs) -> RendererContext:
         return self.add_field(name, self.submit_field_cls(**kwargs))
 
-    def render(self, element: FormElement) -> Markup:
-        base_class_paths: typing.List[typing.Tuple] = traverse_base_classes(
-            cls=element.__class__
+    def observe(self, observer: typing.Optional[RenderObserver]) -> RendererContext:
+        context = self._writable()
+        context.observer = observer
+        return context
+
+    def use_cache(
+        self, fragment_cache: typing.Optional[FragmentCache]
+    ) -> RendererContext:
+        context = self._writable()
+        context.fragment_cache = fragment_cache
+        return context
+
+    def copy(self) -> RendererContext:
+        """Make a copy of this context, changing the copy won't affect this one.
+        Option objects are immutable, so they are shared instead of copied.
+
+        :return: the copied context
+        """
+        context = self.__class__.__new__(self.__class__)
+        context.__dict__.update(self.__dict__)
+        context.field_options = dict(self.field_options)
+        context.extra_fields = list(self.extra_fields)
+        context.frozen = False
+        return context
+
+    def freeze(self) -> RendererContext:
+        """Make an immutable preset of this context. It's safe to share the preset
+        between threads, calling option methods such as `field` on it returns a new
+        context derived from the preset instead of modifying it.
+
+        :return: the frozen context
+        """
+        if self.frozen:
+            return self
+        context = self.copy()
+        context.field_options = types.MappingProxyType(context.field_options)
+        context.extra_fields = tuple(context.extra_fields)
+        context.frozen = True
+        return context
+
+    def _writable(self) -> RendererContext:
+        if self.frozen:
+            return self.copy()
+        return self
+
+    def compile(self, form: typing.Union[typing.Type[Form], Form]) -> CompiledForm:
+        """Compile the layout of given form class with the current options, so that
+        the static parts of the HTML are only generated once
+
+        :param form: the form class or a form instance used as the prototype
+        :return: the compiled form layout for rendering instances of the form class
+        """
+        if isinstance(form, type):
+            form = form()
+        renderer = self.registry.resolve(form.__class__)
+        compiler = COMPILERS.get(renderer)
+        if compiler is None:
+            raise ValueError(f"Cannot compile layout for {form.__class__}")
+        return compiler(self.freeze(), form)
+
+    def warm(
+        self, *form_classes: typing.Type[Form], freeze_gc: bool = False
+    ) -> WarmUpReport:
+        """Precompute everything needed for rendering given form classes, call it in
+        the master process before forking workers, so that the workers share the
+        precomputed structures with copy-on-write memory pages
+
+        :param form_classes: the form classes to warm up
+        :param freeze_gc: call `gc.freeze` after warming up, so that the garbage
+            collector won't touch the precomputed objects in the workers
+        :return: report of the warm-up with duration, memory usage and the compiled
+            layouts
+        """
+        return warm_up(self, form_classes, freeze_gc=freeze_gc)
+
+    def render_many(
+        self, forms: typing.Iterable[Form], id_prefix: typing.Optional[str] = "{index}-"
+    ) -> typing.Iterator[Markup]:
+        """Render many forms, the renderers and options are resolved only once for
+        each form class and field, then shared by all the forms of the same class.
+        Forms with a custom renderer which cannot be compiled are rendered one by one.
+
+        :param forms: the forms to render
+        :param id_prefix: format of the prefix added to field ids, with the index of
+            form as `index`, so that repeated fields stay unique in the page. Pass in
+            None to keep the ids as they are.
+        :return: iterator of rendered HTML of each form
+        """
+        compiled_forms: typing.Dict[typing.Type, typing.Optional[CompiledForm]] = {}
+        for index, form in enumerate(forms):
+            try:
+                compiled_form = compiled_forms[form.__class__]
+            except KeyError:
+                try:
+                    compiled_form = self.compile(form)
+                except ValueError:
+                    # the form has a custom renderer without a compiler
+                    compiled_form = None
+                compiled_forms[form.__class__] = compiled_form
+            prefix = id_prefix.format(index=index) if id_prefix is not None else ""
+            if compiled_form is not None:
+                yield compiled_form.render(form, id_prefix=prefix)
+                continue
+            with contextlib.ExitStack() as stack:
+                for field in form:
+                    stack.enter_context(prefixed_id(field, prefix))
+                html = self._render(form)
+            yield html
+
+    def render_fields(
+        self,
+        form: Form,
+        *names: str,
+        previous_fingerprints: typing.Optional[typing.Mapping[str, str]] = None,
+    ) -> PartialRender:
+        """Render only the given fields of a form with the same options as rendering
+        the whole form, and find out which of them changed since the previous render
+
+        :param form: the form containing the fields
+        :param names: names of the fields to render, including the extra fields
+            added with `add_field`. All fields are rendered if not provided.
+        :param previous_fingerprints: the `fingerprints` of a previous render, fields
+            missing from it are considered as changed
+        :return: the rendered fields with their fingerprints
+        """
+        fields: typing.Dict[str, Field] = dict(form._fields)
+        for extra_field in self.extra_fields:
+            fields[extra_field.name] = extra_field.field.bind(
+                form=form, name=extra_field.name
+            )
+        if not names:
+            names = tuple(fields)
+        previous_fingerprints = previous_fingerprints or {}
+        fragments: typing.Dict[str, Markup] = {}
+        fingerprints: typing.Dict[str, str] = {}
+        changed: typing.List[str] = []
+        for name in names:
+            field = fields.get(name)
+            if field is None:
+                raise ValueError(f"Cannot find field {name} in {form.__class__}")
+            html = self.render(field)
+            digest = hashlib.sha256(str(html).encode("utf-8")).hexdigest()
+            fragments[name] = html
+            fingerprints[name] = digest
+            if previous_fingerprints.get(name) != digest:
+                changed.append(name)
+        return PartialRender(
+            fragments=fragments, fingerprints=fingerprints, changed=tuple(changed)
         )
-        for path in base_class_paths:
-            current_metadata = self.registry.class_metadata
-            metadatas = [current_metadata]
-            for cls in reversed(path):
-                if cls not in current_metadata.subclasses:
-                    break
-                current_metadata = current_metadata.subclasses[cls]
-                metadatas.append(current_metadata)
-            for metadata in reversed(metadatas):
-                for renderer in metadata.renderers:
-                    return renderer(self, element)
+
+    def fingerprint(self, element: FormElement) -> typing.Optional[str]:
+        """Compute a stable digest of everything affecting the rendered HTML of given
+        element without rendering it, such as the form and field classes, resolved
+        options, extra fields, data, errors and the registry version. It can be used
+        as an ETag for HTTP caching.
+
+        :param element: the form or field to render
+        :return: hex digest, or None if the element cannot be fingerprinted safely,
+            such as a form with a CSRF token field
+        """
+        return compute_fingerprint(self, element)
+
+    def render(self, element: FormElement) -> Markup:
+        if self.fragment_cache is not None:
+            return self.fragment_cache.render(self, element, self._render)
+        return self._render(element)
+
+    def iter_render(self, element: FormElement) -> typing.Iterator[str]:
+        """Render given element and yield the HTML chunks as soon as they are ready
+
+        :param element: the form or field to render
+        :return: iterator of HTML chunks, joining them produces the same HTML as
+            `render`
+        """
+        if self.fragment_cache is not None:
+            return self.fragment_cache.iter_render(self, element, self._iter_render)
+        return self._iter_render(element)
+
+    def render_to(
+        self, element: FormElement, write: typing.Callable[[str], typing.Any]
+    ):
+        """Render given element into a sink, each chunk of HTML is passed to `write`
+        as soon as it's ready, without building the whole HTML in memory
+
+        :param element: the form or field to render
+        :param write: the callable accepting HTML chunks, such as the `write` method
+            of a file or `io.StringIO`
+        """
+        for chunk in self.iter_render(element):
+            write(chunk)
+
+    async def render_async(self, element: FormElement, concurrency: int = 10) -> Markup:
+        """Resolve the awaitable or async function choices, descriptions and label
+        texts of given element concurrently, then render it
+
+        :param element: the form or field to render, the lazy values are replaced
+            with the resolved ones in place
+        :param concurrency: max number of values to be resolved at the same time
+        :return: the rendered HTML
+        """
+        await resolve_lazy_values(element, concurrency=concurrency)
+        return self.render(element)
+
+    async def aiter_render(
+        self, element: FormElement, concurrency: int = 10
+    ) -> typing.AsyncIterator[str]:
+        """Async iterator variant of `render_async` for streaming responses, the HTML
+        chunks are yielded as soon as they are ready after resolving the lazy values
+
+        :param element: the form or field to render
+        :param concurrency: max number of values to be resolved at the same time
+        :return: async iterator of HTML chunks
+        """
+        await resolve_lazy_values(element, concurrency=concurrency)
+        for chunk in self.iter_render(element):
+            yield chunk
+
+    def _render(self, element: FormElement) -> Markup:
+        renderer = self._resolve_renderer(element)
+        if self.observer is not None:
+            return Markup(
+                "".join(
+                    iter_observed(
+                        self.observer,
+                        element=element,
+                        renderer=renderer,
+                        render=lambda: renderer(self, element),
+                    )
+                )
+            )
+        result = renderer(self, element)
+        if isinstance(result, str):
+            return result
+        return Markup("".join(result))
+
+    def _iter_render(self, element: FormElement) -> typing.Iterator[str]:
+        renderer = self._resolve_renderer(element)
+        if self.observer is not None:
+            yield from iter_observed(
+                self.observer,
+                element=element,
+                renderer=renderer,
+                render=lambda: renderer(self, element),
+            )
+            return
+        result = renderer(self, element)
+        if isinstance(result, str):
+            yield result
+        else:
+            yield from result
+
+    def _resolve_renderer(self, element: FormElement) -> FormElementRenderer:
+        renderer = self.registry.resolve(element.__class__)
+        if renderer is None:
             raise ValueError(f"Cannot find renderer for {element}")
+        return renderer
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import decimal
+import enum
+import hashlib
+import importlib.metadata
+import typing
+import uuid
+
+import wtforms
+from wtforms import Field
+from wtforms import FieldList
+from wtforms import Form
+from wtforms import FormField
+from wtforms.csrf.core import CSRFTokenField
+from wtforms.meta import DefaultMeta
+
+from .instrumentation import renderer_name
+from .registry import FormElement
+from .validation import client_validation_attrs
+
+
+def _package_version() -> typing.Optional[str]:
+    try:
+        return importlib.metadata.version("wtforms-bootstrap5")
+    except importlib.metadata.PackageNotFoundError:
+        # running from a source tree without installing
+        return None
+
+
+# Version of this package, upgrading it may change the rendered HTML
+PACKAGE_VERSION = _package_version()
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .context import RendererContext
+
+# Value types we know how to turn into stable tokens
+_PRIMITIVE_TYPES = (
+    str,
+    int,
+    float,
+    type(None),
+    decimal.Decimal,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    uuid.UUID,
+)
+# Field attributes which may affect the rendered HTML
+_FIELD_ATTRIBUTES = (
+    "name",
+    "id",
+    "type",
+    "description",
+    "render_kw",
+    "errors",
+    "data",
+    "raw_data",
+    "choices",
+    "coerce",
+    "checked",
+    "format",
+    "validate_choice",
+)
+# Field types defined outside of WTForms which are known to be safe to fingerprint,
+# i.e, their rendered HTML only depends on the attributes above
+FINGERPRINTABLE_FIELD_TYPES: typing.Set[typing.Type] = set()
+
+
+class UnfingerprintableError(ValueError):
+    pass
+
+
+def _type_token(cls: typing.Type) -> str:
+    qualname = cls.__qualname__
+    if "<" in qualname:
+        # local classes or lambdas cannot be told apart by name
+        raise UnfingerprintableError(f"Cannot fingerprint local object {cls!r}")
+    return f"{cls.__module__}.{qualname}"
+
+
+def value_token(value: typing.Any) -> typing.Any:
+    """Convert given value into a token made of primitive values and tuples, which
+    has a stable repr across processes
+
+    :param value: the value to convert
+    :return: the token
+    :raises UnfingerprintableError: if the value cannot be converted safely
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, _PRIMITIVE_TYPES):
+        # Markup and str are not the same for rendering
+        if isinstance(value, str) and value.__class__ is not str:
+            return (_type_token(value.__class__), str(value))
+        return value
+    if isinstance(value, enum.Enum):
+        return (_type_token(value.__class__), value.name)
+    if isinstance(value, (list, tuple)):
+        return tuple(value_token(item) for item in value)
+    if isinstance(value, dict):
+        return (
+            "dict",
+            tuple((value_token(key), value_token(item)) for key, item in value.items()),
+        )
+    if isinstance(value, (set, frozenset)):
+        return ("set", tuple(sorted(repr(value_token(item)) for item in value)))
+    if isinstance(value, type) or (callable(value) and hasattr(value, "__qualname__")):
+        return ("callable", _type_token(value))
+    raise UnfingerprintableError(f"Cannot fingerprint value {value!r}")
+
+
+def options_token(options: typing.Any) -> typing.Tuple:
+    return (_type_token(options.__class__),) + tuple(
+        (field.name, value_token(getattr(options, field.name)))
+        for field in dataclasses.fields(options)
+    )
+
+
+def is_fingerprintable(field: Field) -> bool:
+    """Check if given field's rendered HTML can be safely identified by its
+    fingerprint
+
+    :param field: the field to check
+    :return: True if the field can be fingerprinted
+    """
+    if isinstance(field, CSRFTokenField):
+        return False
+    meta = getattr(field, "meta", None)
+    render_field = getattr(getattr(meta, "render_field", None), "__func__", None)
+    if meta is not None and render_field is not DefaultMeta.render_field:
+        # custom meta may render anything
+        return False
+    for obj in (field, field.widget):
+        cls = obj.__class__
+        if cls in FINGERPRINTABLE_FIELD_TYPES:
+            continue
+        if not cls.__module__.startswith("wtforms."):
+            return False
+    return True
+
+
+def _widget_token(widget: typing.Any) -> typing.Tuple:
+    return (_type_token(widget.__class__), value_token(vars(widget)))
+
+
+def field_token(context: RendererContext, field: Field) -> typing.Tuple:
+    """Build the token of everything affecting the rendered HTML of given field
+
+    :param context: the context rendering the field
+    :param field: the field to render
+    :return: the token
+    :raises UnfingerprintableError: if the field cannot be fingerprinted safely
+    """
+    if not is_fingerprintable(field):
+        raise UnfingerprintableError(f"Cannot fingerprint field {field.name}")
+    renderer = context.registry.resolve(field.__class__)
+    options = context.resolve_field_options(field.name)
+    attributes = [
+        (name, value_token(getattr(field, name)))
+        for name in _FIELD_ATTRIBUTES
+        if hasattr(field, name)
+    ]
+    label = field.label
+    option_widget = getattr(field, "option_widget", None)
+    validation_attrs = None
+    if options.client_validation_enabled:
+        validation_attrs = value_token(client_validation_attrs(field))
+    nested_fields = None
+    if isinstance(field, (FieldList, FormField)):
+        nested_fields = tuple(field_token(context, entry) for entry in field)
+    return (
+        _type_token(field.__class__),
+        renderer_name(renderer) if renderer is not None else None,
+        options_token(options),
+        tuple(attributes),
+        value_token(label.text) if label is not None else None,
+        value_token(field._value()) if hasattr(field, "_value") else None,
+        value_token(sorted(vars(field.flags).items())),
+        _widget_token(field.widget),
+        _widget_token(option_widget) if option_widget is not None else None,
+        validation_attrs,
+        nested_fields,
+    )
+
+
+def form_token(context: RendererContext, form: Form) -> typing.Tuple:
+    """Build the token of everything affecting the rendered HTML of given form,
+    including the extra fields added to the context
+
+    :param context: the context rendering the form
+    :param form: the form to render
+    :return: the token
+    :raises UnfingerprintableError: if any field cannot be fingerprinted safely
+    """
+    renderer = context.registry.resolve(form.__class__)
+    extra_fields = [
+        extra_field.field.bind(form=form, name=extra_field.name)
+        for extra_field in context.extra_fields
+    ]
+    return (
+        _type_token(form.__class__),
+        renderer_name(renderer) if renderer is not None else None,
+        options_token(context.form_options),
+        tuple(field_token(context, field) for field in form._fields.values()),
+        tuple(field_token(context, field) for field in extra_fields),
+    )
+
+
+def fingerprint(context: RendererContext, element: FormElement) -> typing.Optional[str]:
+    """Compute the digest of everything affecting the rendered HTML of given element
+
+    :param context: the context rendering the element
+    :param element: the form or field to render
+    :return: hex digest, or None if the element cannot be fingerprinted safely
+    """
+    try:
+        if isinstance(element, Form):
+            token = form_token(context, element)
+        else:
+            token = field_token(context, element)
+    except UnfingerprintableError:
+        return None
+    token = (PACKAGE_VERSION, wtforms.__version__, context.registry.version, token)
+    return hashlib.sha256(repr(token).encode("utf-8")).hexdigest()
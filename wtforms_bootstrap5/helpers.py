@@ -1,5 +1,11 @@
 import typing
 
+from wtforms import Field
+from wtforms import FieldList
+from wtforms import Form
+from wtforms import FormField
+from wtforms.widgets import html_params as raw_html_params
+
 
 def _traverse_base_classes(
     cls: typing.Type,
@@ -29,3 +35,91 @@ def traverse_base_classes(cls: typing.Type) -> typing.List[typing.Tuple]:
         all_paths=all_paths,
     )
     return all_paths
+
+
+def primary_base_classes(cls: typing.Type) -> typing.Tuple:
+    """Follow the first base class of given class until reaching object.
+
+    This is the first path returned by `traverse_base_classes`, but it only takes
+    linear time to build no matter how many mixins are in the class hierarchy.
+
+    :param cls: the class to traverse
+    :returns: the classes from the given class to the one right before object
+    """
+    path = []
+    while cls is not object:
+        path.append(cls)
+        cls = cls.__bases__[0]
+    return tuple(path)
+
+
+def html_params(**kwargs) -> str:
+    if not kwargs:
+        return ""
+    return " " + raw_html_params(**kwargs)
+
+
+def open_tag(
+    enabled: bool,
+    class_name: typing.Optional[str],
+    attrs: typing.Dict[str, str],
+    tag: str = "div",
+) -> str:
+    """Optionally generate opening tag with given class and attributes
+
+    :param enabled: tag enabled or not
+    :param class_name: class value of the tag
+    :param attrs: attributes of the tag
+    :param tag: type of tag, `div` will be used by default
+    :return: the opening tag or an empty string if not enabled
+    """
+    if not enabled:
+        return ""
+    kwargs = {}
+    if class_name is not None:
+        kwargs["class"] = class_name
+    kwargs.update(attrs)
+    return f"<{tag}{html_params(**kwargs)}>"
+
+
+def close_tag(enabled: bool, tag: str = "div") -> str:
+    """Optionally generate closing tag
+
+    :param enabled: tag enabled or not
+    :param tag: type of tag, `div` will be used by default
+    :return: the closing tag or an empty string if not enabled
+    """
+    if not enabled:
+        return ""
+    return f"</{tag}>"
+
+
+def typed_items(
+    mapping: typing.Mapping[str, typing.Any]
+) -> typing.Tuple[typing.Tuple[str, typing.Type, typing.Any], ...]:
+    """Items of given mapping with the type of each value, for building cache keys.
+    `True`, `1` and `1.0` are equal with the same hash but rendered differently
+    as attributes, the type keeps them apart
+
+    :param mapping: the mapping such as attributes of an element
+    :return: tuple of key, value type and value
+    """
+    return tuple((key, value.__class__, value) for key, value in mapping.items())
+
+
+def iter_nested_fields(element: typing.Union[Form, Field]) -> typing.Iterator[Field]:
+    """Iterate fields of given form or field, including the nested entries of
+    FieldList and FormField
+
+    :param element: the form or field to iterate
+    :return: iterator of fields, each field comes before its nested entries
+    """
+    if isinstance(element, Form):
+        fields: typing.Iterable[Field] = element._fields.values()
+    else:
+        fields = (element,)
+    for field in fields:
+        yield field
+        if isinstance(field, (FieldList, FormField)):
+            for entry in field:
+                yield from iter_nested_fields(entry)
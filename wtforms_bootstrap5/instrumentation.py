@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+import typing
+
+from .registry import FormElement
+from .registry import FormElementRenderer
+
+
+@dataclasses.dataclass(frozen=True)
+class RenderEvent:
+    # the rendered form or field
+    element: FormElement
+    # the renderer chosen for the element
+    renderer: FormElementRenderer
+    # seconds spent in rendering the element, including nested elements
+    elapsed: float
+    # seconds spent in rendering the element, excluding nested elements
+    self_elapsed: float
+    # number of characters in the rendered HTML
+    size: int
+
+
+class RenderObserver(typing.Protocol):
+    def begin(self, element: FormElement, renderer: FormElementRenderer) -> None:
+        ...
+
+    def end(self, event: RenderEvent) -> None:
+        ...
+
+
+@dataclasses.dataclass
+class RenderStats:
+    count: int = 0
+    total_time: float = 0.0
+    self_time: float = 0.0
+    total_size: int = 0
+
+    def add(self, event: RenderEvent):
+        self.count += 1
+        self.total_time += event.elapsed
+        self.self_time += event.self_elapsed
+        self.total_size += event.size
+
+
+def renderer_name(renderer: FormElementRenderer) -> str:
+    module = getattr(renderer, "__module__", None)
+    name = getattr(renderer, "__qualname__", None) or repr(renderer)
+    if module is None:
+        return name
+    return f"{module}.{name}"
+
+
+class RenderStatsCollector:
+    """Observer aggregating render stats per renderer and per element type"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.renderers: typing.Dict[str, RenderStats] = {}
+        self.element_types: typing.Dict[str, RenderStats] = {}
+
+    def begin(self, element: FormElement, renderer: FormElementRenderer) -> None:
+        pass
+
+    def end(self, event: RenderEvent) -> None:
+        renderer_key = renderer_name(event.renderer)
+        element_key = event.element.__class__.__name__
+        with self._lock:
+            stats = self.renderers.get(renderer_key)
+            if stats is None:
+                stats = self.renderers[renderer_key] = RenderStats()
+            stats.add(event)
+            stats = self.element_types.get(element_key)
+            if stats is None:
+                stats = self.element_types[element_key] = RenderStats()
+            stats.add(event)
+
+    def export(self) -> typing.Dict[str, typing.Dict[str, typing.Dict[str, float]]]:
+        """Export the stats as plain dict for feeding into metrics systems
+
+        :return: dict with `renderers` and `element_types` keys, each of them maps
+            the name to the stats
+        """
+        with self._lock:
+            return dict(
+                renderers={
+                    key: dataclasses.asdict(stats)
+                    for key, stats in self.renderers.items()
+                },
+                element_types={
+                    key: dataclasses.asdict(stats)
+                    for key, stats in self.element_types.items()
+                },
+            )
+
+    def reset(self):
+        with self._lock:
+            self.renderers.clear()
+            self.element_types.clear()
+
+
+# Stack of time spent in nested elements for the render slices currently running
+# in each thread
+_nested_elapsed = threading.local()
+
+
+def iter_observed(
+    observer: RenderObserver,
+    element: FormElement,
+    renderer: FormElementRenderer,
+    render: typing.Callable[[], typing.Union[str, typing.Iterable[str]]],
+) -> typing.Iterator[str]:
+    """Call given render function and yield the rendered chunks, report the time
+    spent and output size to the observer once it's done.
+
+    Only the time spent in producing chunks is measured, the time the consumer spends
+    between chunks is not included.
+    """
+    observer.begin(element, renderer)
+    try:
+        stack = _nested_elapsed.stack
+    except AttributeError:
+        stack = _nested_elapsed.stack = []
+    elapsed = 0.0
+    nested_elapsed = 0.0
+    size = 0
+
+    def run_slice(step: typing.Callable[[], typing.Any]) -> typing.Any:
+        nonlocal elapsed, nested_elapsed
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return step()
+        finally:
+            slice_elapsed = time.perf_counter() - start
+            nested_elapsed += stack.pop()
+            elapsed += slice_elapsed
+            if stack:
+                stack[-1] += slice_elapsed
+
+    result = run_slice(render)
+    if isinstance(result, str):
+        size = len(result)
+        yield result
+    else:
+        iterator = iter(result)
+        while True:
+            try:
+                chunk = run_slice(lambda: next(iterator))
+            except StopIteration:
+                break
+            size += len(chunk)
+            yield chunk
+    observer.end(
+        RenderEvent(
+            element=element,
+            renderer=renderer,
+            elapsed=elapsed,
+            self_elapsed=elapsed - nested_elapsed,
+            size=size,
+        )
+    )
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+import typing
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+from markupsafe import Markup
+from wtforms import Form
+
+from .context import RendererContext
+from .layout import CompiledForm
+
+# Max number of cached render plans
+MAX_RENDER_PLANS = 1024
+
+
+class RenderPlanCacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    currsize: int
+
+
+class BootstrapExtension(Extension):
+    tags = {"bootstrap_form"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(
+            # the context used by tags without a layout
+            bootstrap_context=RendererContext().freeze(),
+            # map from layout name to frozen context, such as LayoutProfiles
+            bootstrap_profiles={},
+        )
+        self._plans: typing.Dict[
+            typing.Tuple[RendererContext, typing.Type], typing.Optional[CompiledForm]
+        ] = {}
+        self._plans_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        form = parser.parse_expression()
+        if parser.stream.skip_if("name:with"):
+            layout = parser.parse_expression()
+        else:
+            layout = nodes.Const(None)
+        # layout given by name is resolved when compiling the template, so that a
+        # typo fails early instead of at rendering
+        if isinstance(layout, nodes.Const) and layout.value is not None:
+            if not isinstance(layout.value, str):
+                parser.fail("Layout must be a profile name or a context", lineno)
+            if layout.value not in self.environment.bootstrap_profiles:
+                parser.fail(f"Unknown layout profile {layout.value!r}", lineno)
+        call = self.call_method("_render", [form, layout], lineno=lineno)
+        return nodes.Output([call], lineno=lineno)
+
+    def _resolve_context(
+        self, layout: typing.Union[None, str, RendererContext]
+    ) -> RendererContext:
+        if layout is None:
+            return self.environment.bootstrap_context
+        if isinstance(layout, str):
+            return self.environment.bootstrap_profiles[layout]
+        return layout
+
+    def _render(
+        self, form: Form, layout: typing.Union[None, str, RendererContext]
+    ) -> Markup:
+        context = self._resolve_context(layout)
+        # a context which is not frozen may change between renders
+        if not context.frozen:
+            return context.render(form)
+        key = (context, form.__class__)
+        try:
+            plan = self._plans[key]
+        except KeyError:
+            self._misses += 1
+            plan = self._compile(context, form)
+            with self._plans_lock:
+                if len(self._plans) >= MAX_RENDER_PLANS:
+                    self._plans.clear()
+                self._plans[key] = plan
+        else:
+            self._hits += 1
+        if plan is None:
+            return context.render(form)
+        return plan.render(form)
+
+    @staticmethod
+    def _compile(context: RendererContext, form: Form) -> typing.Optional[CompiledForm]:
+        try:
+            return context.compile(form)
+        except ValueError:
+            # the form has a custom renderer without a compiler
+            return None
+
+    def cache_info(self) -> RenderPlanCacheInfo:
+        return RenderPlanCacheInfo(
+            hits=self._hits, misses=self._misses, currsize=len(self._plans)
+        )
+
+    def cache_clear(self):
+        with self._plans_lock:
+            self._plans.clear()
+        self._hits = 0
+        self._misses = 0
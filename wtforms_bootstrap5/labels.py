@@ -0,0 +1,86 @@
+import threading
+import typing
+
+from markupsafe import Markup
+from wtforms import Field
+from wtforms.fields.core import Label
+
+from .helpers import typed_items
+
+# Max number of cached label markups
+MAX_CACHED_LABELS = 4096
+
+
+class LabelCacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    # labels rendered without the cache, such as the ones with lazy text
+    bypasses: int
+    currsize: int
+
+
+class LabelCache:
+    def __init__(self, max_entries: int = MAX_CACHED_LABELS):
+        self.max_entries = max_entries
+        self._labels: typing.Dict[typing.Hashable, Markup] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bypasses = 0
+
+    def render(
+        self, field: Field, label_kwargs: typing.Dict[str, typing.Any]
+    ) -> Markup:
+        """Render the label of given field with given attributes, the markup is
+        cached by label text and attributes, so changing the label of a field
+        instance gets a different entry, and fields with the same label share one
+
+        :param field: the field to render label for
+        :param label_kwargs: the attributes of label element
+        :return: the rendered label
+        """
+        label = field.label
+        text = label.text
+        # subclass of Label may render differently, lazy text may change with
+        # locale while keeping the same object
+        if label.__class__ is not Label or text.__class__ not in (str, Markup):
+            self._bypasses += 1
+            return label(**label_kwargs)
+        # Markup and str with the same value are equal but escaped differently
+        key: typing.Tuple = (text.__class__, text, typed_items(label_kwargs))
+        if "for" not in label_kwargs and "for_" not in label_kwargs:
+            # the label defaults to the field id bound when the field is created
+            key = (label.field_id, *key)
+        try:
+            html = self._labels.get(key)
+        except TypeError:
+            self._bypasses += 1
+            return label(**label_kwargs)
+        if html is not None:
+            self._hits += 1
+            return html
+        self._misses += 1
+        html = label(**label_kwargs)
+        with self._lock:
+            if len(self._labels) >= self.max_entries:
+                self._labels.clear()
+            self._labels[key] = html
+        return html
+
+    def cache_info(self) -> LabelCacheInfo:
+        return LabelCacheInfo(
+            hits=self._hits,
+            misses=self._misses,
+            bypasses=self._bypasses,
+            currsize=len(self._labels),
+        )
+
+    def cache_clear(self):
+        with self._lock:
+            self._labels.clear()
+        self._hits = 0
+        self._misses = 0
+        self._bypasses = 0
+
+
+LABEL_CACHE = LabelCache()
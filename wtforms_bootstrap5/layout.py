@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import typing
+
+from markupsafe import escape
+from markupsafe import Markup
+from wtforms import Field
+from wtforms import Form
+
+from .helpers import iter_nested_fields
+from .instrumentation import iter_observed
+from .registry import FormElementRenderer
+from .widgets import render_input
+from .widgets import render_widget
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .context import ExtraField
+    from .context import RendererContext
+
+
+# Placeholder of field id in precomputed HTML, the id is filled in when rendering,
+# so that the same layout works for fields with different ids
+FIELD_ID_PLACEHOLDER = "\x00field-id\x00"
+
+
+@dataclasses.dataclass(frozen=True)
+class FieldLayout:
+    """Precomputed HTML skeleton of a field, only the dynamic parts (input element
+    and error messages) are rendered with the bound field
+    """
+
+    # class of the field this layout was compiled for
+    field_cls: typing.Type
+    # label text and description the static parts were rendered with
+    label_text: typing.Optional[str]
+    description: str
+    # static HTML before and after the input element, they may contain
+    # FIELD_ID_PLACEHOLDER
+    prefix: str
+    suffix: str
+    # static HTML right after the input element, such as help message
+    help_html: str = ""
+    # keyword arguments for rendering the input element
+    input_kwargs: typing.Dict[str, typing.Any] = dataclasses.field(default_factory=dict)
+    # keyword arguments for rendering the input element when there are errors
+    invalid_input_kwargs: typing.Dict[str, typing.Any] = dataclasses.field(
+        default_factory=dict
+    )
+    # render input element with `field.widget` directly instead of calling field
+    use_widget: bool = False
+    # generate common input elements directly instead of calling WTForms widgets
+    native_input: bool = False
+    # render error messages or not
+    errors_enabled: bool = False
+    error_open: str = ""
+    error_close: str = ""
+    error_separator: str = " "
+    _prefix_parts: typing.List[str] = dataclasses.field(init=False, repr=False)
+    _suffix_parts: typing.List[str] = dataclasses.field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "_prefix_parts", self.prefix.split(FIELD_ID_PLACEHOLDER)
+        )
+        object.__setattr__(
+            self, "_suffix_parts", self.suffix.split(FIELD_ID_PLACEHOLDER)
+        )
+
+    def matches(self, field: Field) -> bool:
+        """Check if the static parts of this layout still apply to given field
+
+        :param field: bound field to render
+        :return: True if the layout can be used for rendering the field
+        """
+        label = field.label
+        return (
+            field.__class__ is self.field_cls
+            and (label.text if label is not None else None) == self.label_text
+            and field.description == self.description
+        )
+
+    def render(self, field: Field) -> Markup:
+        errors = field.errors if self.errors_enabled else None
+        kwargs = self.invalid_input_kwargs if errors else self.input_kwargs
+        if self.use_widget:
+            input_html = render_widget(field, kwargs, native=self.native_input)
+        else:
+            input_html = render_input(field, kwargs, native=self.native_input)
+        field_id = str(escape(field.id))
+        parts = [field_id.join(self._prefix_parts), input_html, self.help_html]
+        if errors:
+            parts.append(self.error_open)
+            parts.append(escape(self.error_separator.join(errors)))
+            parts.append(self.error_close)
+        parts.append(field_id.join(self._suffix_parts))
+        return Markup("".join(parts))
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledField:
+    name: str
+    renderer: FormElementRenderer
+    # None means the renderer cannot be compiled, it's called for every render
+    layout: typing.Optional[FieldLayout]
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledForm:
+    """Reusable layout of a form class compiled with fixed renderer context options"""
+
+    form_cls: typing.Type
+    context: RendererContext
+    # the renderer the form is compiled from, reported to the observer
+    renderer: FormElementRenderer
+    open_tag: str
+    close_tag: str
+    separator: str
+    fields: typing.Dict[str, CompiledField]
+    extra_fields: typing.Tuple[typing.Tuple[ExtraField, CompiledField], ...]
+
+    def render_field(self, field: Field) -> Markup:
+        compiled_field = self.fields.get(field.name)
+        if compiled_field is None:
+            return self.context.render(field)
+        return self._render_compiled(compiled_field, field)
+
+    def _render_compiled(self, compiled_field: CompiledField, field: Field) -> Markup:
+        layout = compiled_field.layout
+        if layout is None or not layout.matches(field):
+            return self.context.render(field)
+        observer = self.context.observer
+        if observer is not None:
+            return Markup(
+                "".join(
+                    iter_observed(
+                        observer,
+                        element=field,
+                        renderer=compiled_field.renderer,
+                        render=lambda: layout.render(field),
+                    )
+                )
+            )
+        return layout.render(field)
+
+    def render(self, form: Form, id_prefix: str = "") -> Markup:
+        return Markup("".join(self.iter_render(form, id_prefix=id_prefix)))
+
+    def render_to(
+        self,
+        form: Form,
+        write: typing.Callable[[str], typing.Any],
+        id_prefix: str = "",
+    ):
+        """Render given form instance with the compiled layout into a sink
+
+        :param form: the form to render
+        :param write: the callable accepting HTML chunks
+        :param id_prefix: prefix to add to the id of every field
+        """
+        for chunk in self.iter_render(form, id_prefix=id_prefix):
+            write(chunk)
+
+    def iter_render(self, form: Form, id_prefix: str = "") -> typing.Iterator[str]:
+        """Render given form instance with the compiled layout
+
+        :param form: the form to render, it needs to be an instance of the compiled
+            form class
+        :param id_prefix: prefix to add to the id of every field, so that the ids
+            stay unique when the same form is rendered many times in a page
+        :return: iterator of HTML chunks
+        """
+        if form.__class__ is not self.form_cls:
+            raise ValueError(
+                f"Layout compiled for {self.form_cls} cannot render {form.__class__}"
+            )
+        observer = self.context.observer
+        if observer is not None:
+            return iter_observed(
+                observer,
+                element=form,
+                renderer=self.renderer,
+                render=lambda: self._iter_render(form, id_prefix),
+            )
+        return self._iter_render(form, id_prefix)
+
+    def _iter_render(self, form: Form, id_prefix: str) -> typing.Iterator[str]:
+        yield self.open_tag
+        for index, field in enumerate(form._fields.values()):
+            if index:
+                yield self.separator
+            with prefixed_id(field, id_prefix):
+                html = self.render_field(field)
+            yield html
+        for index, (extra_field, compiled_field) in enumerate(
+            self.extra_fields, start=len(form._fields)
+        ):
+            if index:
+                yield self.separator
+            field = extra_field.field.bind(form=form, name=extra_field.name)
+            field.id = f"{id_prefix}{field.id}"
+            yield self._render_compiled(compiled_field, field)
+        yield self.close_tag
+
+
+@contextlib.contextmanager
+def prefixed_id(field: Field, id_prefix: str) -> typing.Iterator[None]:
+    """Temporarily add prefix to the id of given field, including the nested
+    entries of FieldList and FormField
+
+    :param field: the field to change id
+    :param id_prefix: the prefix to add
+    """
+    if not id_prefix:
+        yield
+        return
+    fields = list(iter_nested_fields(field))
+    original_ids = [nested_field.id for nested_field in fields]
+    for nested_field, original_id in zip(fields, original_ids):
+        nested_field.id = f"{id_prefix}{original_id}"
+    try:
+        yield
+    finally:
+        for nested_field, original_id in zip(fields, original_ids):
+            nested_field.id = original_id
+
+
+# Compiler takes the context and a prototype element and returns the compiled layout
+FormElementCompiler = typing.Callable[["RendererContext", typing.Any], typing.Any]
+# Map from renderer to the compiler producing its precomputed layout
+COMPILERS: typing.Dict[FormElementRenderer, FormElementCompiler] = {}
+
+
+def compiles(renderer: FormElementRenderer):
+    """Register decorated function as the compiler of given renderer
+
+    :param renderer: the renderer the compiler produces layouts for
+    """
+
+    def decorator(compiler: FormElementCompiler) -> FormElementCompiler:
+        COMPILERS[renderer] = compiler
+        return compiler
+
+    return decorator
+
+
+def compile_field(context: RendererContext, field: Field) -> CompiledField:
+    renderer = context.registry.resolve(field.__class__)
+    if renderer is None:
+        raise ValueError(f"Cannot find renderer for {field}")
+    compiler = COMPILERS.get(renderer)
+    layout = compiler(context, field) if compiler is not None else None
+    return CompiledField(name=field.name, renderer=renderer, layout=layout)
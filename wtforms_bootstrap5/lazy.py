@@ -0,0 +1,68 @@
+import asyncio
+import inspect
+import typing
+
+from .helpers import iter_nested_fields
+from .registry import FormElement
+
+# Attributes of a field which may be set to an awaitable or an async function
+_LAZY_FIELD_ATTRIBUTES = ("choices", "description")
+
+
+def _is_async_callable(value: typing.Any) -> bool:
+    # objects with `async def __call__`, such as lookup services, are callable the
+    # same way as async functions
+    return inspect.iscoroutinefunction(value) or inspect.iscoroutinefunction(
+        getattr(value, "__call__", None)
+    )
+
+
+def _is_lazy(value: typing.Any) -> bool:
+    return inspect.isawaitable(value) or _is_async_callable(value)
+
+
+def iter_lazy_values(
+    element: FormElement,
+) -> typing.Iterator[typing.Tuple[typing.Any, str, typing.Any]]:
+    """Find the lazy choices, descriptions and label texts of given element and its
+    nested fields
+
+    :param element: the form or field to look into
+    :return: iterator of (object, attribute name, lazy value) tuples
+    """
+    for field in iter_nested_fields(element):
+        for name in _LAZY_FIELD_ATTRIBUTES:
+            value = getattr(field, name, None)
+            if _is_lazy(value):
+                yield field, name, value
+        label = field.label
+        if label is not None and _is_lazy(label.text):
+            yield label, "text", label.text
+
+
+async def resolve_lazy_values(element: FormElement, concurrency: int = 10):
+    """Resolve the lazy choices, descriptions and label texts of given element and
+    its nested fields concurrently, then replace them with the resolved values in
+    place, so that the element can be rendered or validated as usual.
+
+    The lazy values can either be awaitable objects, or async functions or objects
+    with an async `__call__` method taking no arguments. Notice that WTForms builds the choices when the field is bound, so
+    lazy choices need to be set on the bound field, such as
+    `form.country.choices = fetch_countries`.
+
+    :param element: the form or field with lazy values
+    :param concurrency: max number of values to be resolved at the same time
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency limit must be at least 1")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(obj: typing.Any, name: str, value: typing.Any):
+        async with semaphore:
+            if _is_async_callable(value):
+                value = value()
+            setattr(obj, name, await value)
+
+    await asyncio.gather(
+        *(resolve(obj, name, value) for obj, name, value in iter_lazy_values(element))
+    )
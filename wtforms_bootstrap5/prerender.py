@@ -0,0 +1,282 @@
+import argparse
+import collections.abc
+import concurrent.futures
+import dataclasses
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pathlib
+import sys
+import typing
+
+from wtforms import Form
+
+from .context import RendererContext
+from .profiles import LayoutProfiles
+
+# Name of the manifest file in the output directory
+MANIFEST_NAME = "manifest.json"
+# Name of the layout used when no layout is given
+DEFAULT_LAYOUT_NAME = "default"
+
+
+@dataclasses.dataclass(frozen=True)
+class PrerenderSpec:
+    # references to form classes as `module:ClassName`, or `module` for all the
+    # form classes defined in the module
+    forms: typing.Tuple[str, ...]
+    # references to layouts as `module:attr`, the attribute is either a context or
+    # a mapping from layout name to context such as `LayoutProfiles`
+    layouts: typing.Tuple[str, ...] = ()
+    # paths of TOML or JSON layout profile files
+    profiles: typing.Tuple[str, ...] = ()
+
+
+@dataclasses.dataclass(frozen=True)
+class PrerenderResult:
+    # file names of the fragments written because they are new or changed
+    written: typing.Tuple[str, ...]
+    # file names of the fragments left untouched because they are the same
+    unchanged: typing.Tuple[str, ...]
+    # file names of the fragments from the previous build which are gone
+    removed: typing.Tuple[str, ...]
+
+
+def _import_ref(ref: str) -> typing.Any:
+    module_name, _, attr = ref.partition(":")
+    value = importlib.import_module(module_name)
+    if attr:
+        for name in attr.split("."):
+            value = getattr(value, name)
+    return value
+
+
+def load_forms(refs: typing.Iterable[str]) -> typing.Dict[str, typing.Type[Form]]:
+    """Import form classes by references
+
+    :param refs: references to form classes as `module:ClassName`, or `module` for
+        all the form classes defined in the module
+    :return: map from qualified name to form class
+    """
+    forms: typing.Dict[str, typing.Type[Form]] = {}
+    for ref in refs:
+        value = _import_ref(ref)
+        if inspect.ismodule(value):
+            classes = [
+                cls
+                for _, cls in inspect.getmembers(value, inspect.isclass)
+                if issubclass(cls, Form) and cls.__module__ == value.__name__
+            ]
+        elif isinstance(value, type) and issubclass(value, Form):
+            classes = [value]
+        else:
+            raise ValueError(f"{ref} is not a form class or a module")
+        for cls in classes:
+            forms[f"{cls.__module__}.{cls.__qualname__}"] = cls
+    return forms
+
+
+def load_layouts(
+    refs: typing.Iterable[str], profile_paths: typing.Iterable[str]
+) -> typing.Dict[str, RendererContext]:
+    """Import layouts by references and load layout profile files
+
+    :param refs: references to layouts as `module:attr`, the attribute is either a
+        context or a mapping from layout name to context
+    :param profile_paths: paths of layout profile files
+    :return: map from layout name to context
+    """
+    layouts: typing.Dict[str, RendererContext] = {}
+
+    def add(name: str, context: typing.Any):
+        if not isinstance(context, RendererContext):
+            raise ValueError(f"Layout {name} is not a RendererContext")
+        if name in layouts:
+            raise ValueError(f"Duplicate layout name {name}")
+        layouts[name] = context
+
+    for ref in refs:
+        value = _import_ref(ref)
+        if isinstance(value, RendererContext):
+            add(ref.rpartition(":")[2].rpartition(".")[2], value)
+        elif isinstance(value, (collections.abc.Mapping, LayoutProfiles)):
+            for name in value:
+                add(name, value[name])
+        else:
+            raise ValueError(f"{ref} is not a context or a mapping of contexts")
+    profile_paths = list(profile_paths)
+    if profile_paths:
+        profiles = LayoutProfiles.load(*profile_paths)
+        for name in profiles:
+            add(name, profiles[name])
+    if not layouts:
+        layouts[DEFAULT_LAYOUT_NAME] = RendererContext()
+    return layouts
+
+
+def fragment_name(form_name: str, layout_name: str) -> str:
+    return f"{form_name}.{layout_name}.html"
+
+
+# Forms and layouts loaded in the worker process
+_worker_state: typing.Optional[
+    typing.Tuple[typing.Dict[str, typing.Type[Form]], typing.Dict[str, RendererContext]]
+] = None
+
+
+def _init_worker(spec: PrerenderSpec):
+    global _worker_state
+    _worker_state = (
+        load_forms(spec.forms),
+        load_layouts(spec.layouts, spec.profiles),
+    )
+
+
+def _render_fragment(task: typing.Tuple[str, str]) -> typing.Tuple[str, str]:
+    form_name, layout_name = task
+    forms, layouts = _worker_state
+    # CSRF token needs a request, it cannot be pre-rendered
+    form = forms[form_name](meta=dict(csrf=False))
+    html = layouts[layout_name].render(form)
+    return fragment_name(form_name, layout_name), str(html)
+
+
+def _read_manifest(output_dir: pathlib.Path) -> typing.Dict[str, typing.Any]:
+    try:
+        return json.loads((output_dir / MANIFEST_NAME).read_text())
+    except FileNotFoundError:
+        return dict(fragments={})
+
+
+def _write_atomic(path: pathlib.Path, content: str):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(content, encoding="utf8")
+    os.replace(tmp_path, path)
+
+
+def prerender(
+    spec: PrerenderSpec, output_dir: typing.Union[str, os.PathLike], jobs: int = 0
+) -> PrerenderResult:
+    """Render every combination of given forms and layouts into HTML fragment
+    files, with a manifest of their content hashes. Fragments with the same hash as
+    in the previous manifest are not rewritten.
+
+    :param spec: the forms and layouts to render
+    :param output_dir: the directory to write fragments and manifest into
+    :param jobs: number of worker processes, 0 means the number of CPUs, 1 renders
+        in the current process
+    :return: result of the build
+    """
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    forms = load_forms(spec.forms)
+    layouts = load_layouts(spec.layouts, spec.profiles)
+    tasks = [(form_name, layout_name) for form_name in forms for layout_name in layouts]
+
+    if jobs == 1:
+        _init_worker(spec)
+        rendered = map(_render_fragment, tasks)
+        executor = None
+    else:
+        max_workers = jobs or os.cpu_count() or 1
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(spec,)
+        )
+        rendered = executor.map(
+            _render_fragment,
+            tasks,
+            chunksize=max(1, len(tasks) // (max_workers * 4)),
+        )
+
+    previous = _read_manifest(output_dir)["fragments"]
+    fragments: typing.Dict[str, typing.Dict[str, str]] = {}
+    written: typing.List[str] = []
+    unchanged: typing.List[str] = []
+    try:
+        for (form_name, layout_name), (name, html) in zip(tasks, rendered):
+            digest = hashlib.sha256(html.encode("utf8")).hexdigest()
+            fragments[name] = dict(form=form_name, layout=layout_name, sha256=digest)
+            path = output_dir / name
+            if previous.get(name, {}).get("sha256") == digest and path.exists():
+                unchanged.append(name)
+                continue
+            _write_atomic(path, html)
+            written.append(name)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    removed = []
+    for name in previous:
+        # only remove files directly in the output directory
+        if name not in fragments and pathlib.Path(name).name == name:
+            (output_dir / name).unlink(missing_ok=True)
+            removed.append(name)
+    _write_atomic(
+        output_dir / MANIFEST_NAME,
+        json.dumps(dict(fragments=fragments), indent=2, sort_keys=True),
+    )
+    return PrerenderResult(
+        written=tuple(written), unchanged=tuple(unchanged), removed=tuple(removed)
+    )
+
+
+def main(argv: typing.Optional[typing.List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Pre-render forms with layouts into static HTML fragments"
+    )
+    parser.add_argument(
+        "-f",
+        "--form",
+        action="append",
+        required=True,
+        help="form class as module:ClassName, or module for all its form classes",
+    )
+    parser.add_argument(
+        "-l",
+        "--layout",
+        action="append",
+        default=[],
+        help="layout as module:attr, a context or a mapping from name to context",
+    )
+    parser.add_argument(
+        "-p",
+        "--profiles",
+        action="append",
+        default=[],
+        help="TOML or JSON layout profiles file",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=pathlib.Path,
+        required=True,
+        help="directory to write the fragments and manifest into",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=0,
+        help="number of worker processes, default to the number of CPUs",
+    )
+    args = parser.parse_args(argv)
+    # allow importing forms from the current directory like `python -m` does
+    if "" not in sys.path and os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    spec = PrerenderSpec(
+        forms=tuple(args.form),
+        layouts=tuple(args.layout),
+        profiles=tuple(args.profiles),
+    )
+    result = prerender(spec, output_dir=args.output, jobs=args.jobs)
+    print(
+        f"{len(result.written)} written, {len(result.unchanged)} unchanged, "
+        f"{len(result.removed)} removed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import typing
+
+from .context import FieldOptions
+from .context import FormOptions
+from .context import RendererContext
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as tomllib  # type: ignore
+    except ImportError:
+        tomllib = None  # type: ignore
+
+# Keys allowed in a profile
+PROFILE_KEYS = frozenset(["extends", "form", "default_field", "fields", "submit"])
+
+Profile = typing.Dict[str, typing.Any]
+
+
+class ProfileError(ValueError):
+    pass
+
+
+def _option_types(options_cls: typing.Type) -> typing.Dict[str, typing.Any]:
+    return typing.get_type_hints(options_cls)
+
+
+_FORM_OPTION_TYPES = _option_types(FormOptions)
+_FIELD_OPTION_TYPES = _option_types(FieldOptions)
+
+
+def _check_type(value: typing.Any, hint: typing.Any) -> bool:
+    origin = typing.get_origin(hint)
+    if origin is typing.Union:
+        return any(_check_type(value, arg) for arg in typing.get_args(hint))
+    if origin is dict:
+        key_type, value_type = typing.get_args(hint)
+        # attribute values could also be numbers or booleans in the files
+        return isinstance(value, dict) and all(
+            isinstance(key, key_type) and isinstance(item, (str, int, float, bool))
+            for key, item in value.items()
+        )
+    if hint is type(None):
+        return value is None
+    if hint is int or hint is str:
+        # bool is a subclass of int, but it's not a valid value
+        return isinstance(value, hint) and not isinstance(value, bool)
+    return isinstance(value, hint)
+
+
+def _validate_options(
+    profile_name: str,
+    section: str,
+    options: typing.Any,
+    option_types: typing.Dict[str, typing.Any],
+):
+    if not isinstance(options, dict):
+        raise ProfileError(f"Profile {profile_name!r}: {section} must be a table")
+    for key, value in options.items():
+        hint = option_types.get(key)
+        if hint is None:
+            raise ProfileError(
+                f"Profile {profile_name!r}: unknown option {key!r} in {section}"
+            )
+        if not _check_type(value, hint):
+            raise ProfileError(
+                f"Profile {profile_name!r}: invalid value {value!r} for option "
+                f"{key!r} in {section}"
+            )
+
+
+def validate_profile(name: str, profile: typing.Any):
+    """Check that given profile only contains known keys and options with values
+    of the right types
+
+    :param name: name of the profile, for error messages
+    :param profile: the profile to validate
+    """
+    if not isinstance(profile, dict):
+        raise ProfileError(f"Profile {name!r} must be a table")
+    unknown_keys = set(profile) - PROFILE_KEYS
+    if unknown_keys:
+        raise ProfileError(
+            f"Profile {name!r}: unknown keys {', '.join(sorted(unknown_keys))}"
+        )
+    extends = profile.get("extends")
+    if extends is not None and not isinstance(extends, str):
+        raise ProfileError(f"Profile {name!r}: extends must be a profile name")
+    _validate_options(name, "form", profile.get("form", {}), _FORM_OPTION_TYPES)
+    _validate_options(
+        name, "default_field", profile.get("default_field", {}), _FIELD_OPTION_TYPES
+    )
+    fields = profile.get("fields", {})
+    if not isinstance(fields, dict):
+        raise ProfileError(f"Profile {name!r}: fields must be a table")
+    for field_name, options in fields.items():
+        _validate_options(name, f"fields.{field_name}", options, _FIELD_OPTION_TYPES)
+    submit = profile.get("submit", False)
+    if not isinstance(submit, (bool, dict)):
+        raise ProfileError(
+            f"Profile {name!r}: submit must be a boolean or a table of arguments"
+        )
+
+
+def _merge_profiles(parent: Profile, child: Profile) -> Profile:
+    fields = {name: dict(options) for name, options in parent["fields"].items()}
+    for name, options in child.get("fields", {}).items():
+        fields[name] = dict(fields.get(name, {}), **options)
+    return dict(
+        form=dict(parent["form"], **child.get("form", {})),
+        default_field=dict(parent["default_field"], **child.get("default_field", {})),
+        fields=fields,
+        submit=child.get("submit", parent["submit"]),
+    )
+
+
+def _build_context(base: RendererContext, profile: Profile) -> RendererContext:
+    context = base.copy()
+    context.form(**profile["form"])
+    context.default_field(**profile["default_field"])
+    for name, options in profile["fields"].items():
+        context.field(name, **options)
+    submit = profile["submit"]
+    if submit:
+        context.add_submit(**(submit if isinstance(submit, dict) else {}))
+    return context.freeze()
+
+
+class LayoutProfiles:
+    def __init__(
+        self,
+        profiles: typing.Mapping[str, Profile],
+        base: typing.Optional[RendererContext] = None,
+    ):
+        """Validate and compile layout profiles into frozen context presets
+
+        :param profiles: map from profile name to the profile
+        :param base: the context to derive all the presets from
+        """
+        for name, profile in profiles.items():
+            validate_profile(name, profile)
+        if base is None:
+            base = RendererContext()
+        self._profiles = dict(profiles)
+        self._merged: typing.Dict[str, Profile] = {}
+        self._contexts: typing.Dict[str, RendererContext] = {
+            name: _build_context(base, self._merge(name, ())) for name in self._profiles
+        }
+
+    def _merge(self, name: str, chain: typing.Tuple[str, ...]) -> Profile:
+        merged = self._merged.get(name)
+        if merged is not None:
+            return merged
+        if name in chain:
+            cycle = " -> ".join(chain + (name,))
+            raise ProfileError(f"Circular inheritance between profiles: {cycle}")
+        profile = self._profiles.get(name)
+        if profile is None:
+            raise ProfileError(
+                f"Profile {chain[-1]!r} extends unknown profile {name!r}"
+            )
+        extends = profile.get("extends")
+        if extends is None:
+            parent = dict(form={}, default_field={}, fields={}, submit=False)
+        else:
+            parent = self._merge(extends, chain + (name,))
+        merged = self._merged[name] = _merge_profiles(parent, profile)
+        return merged
+
+    @classmethod
+    def load(
+        cls,
+        *paths: typing.Union[str, os.PathLike],
+        base: typing.Optional[RendererContext] = None,
+    ) -> LayoutProfiles:
+        """Load layout profiles from TOML or JSON files, the format is determined
+        by the file extension. Profiles in later files replace the ones with the
+        same name in earlier files.
+
+        :param paths: paths of the profile files
+        :param base: the context to derive all the presets from
+        :return: the loaded profiles
+        """
+        profiles: typing.Dict[str, Profile] = {}
+        for path in paths:
+            path = pathlib.Path(path)
+            if path.suffix == ".toml":
+                if tomllib is None:
+                    raise ImportError(
+                        "tomli is required for loading TOML profiles before "
+                        "Python 3.11"
+                    )
+                with path.open("rb") as fo:
+                    content = tomllib.load(fo)
+            elif path.suffix == ".json":
+                with path.open("rb") as fo:
+                    content = json.load(fo)
+            else:
+                raise ProfileError(f"Unsupported profile file format {path}")
+            if not isinstance(content, dict):
+                raise ProfileError(f"Profile file {path} must contain a table")
+            profiles.update(content)
+        return cls(profiles, base=base)
+
+    def __getitem__(self, name: str) -> RendererContext:
+        return self._contexts[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._contexts
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._contexts)
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def get(
+        self, name: str, default: typing.Optional[RendererContext] = None
+    ) -> typing.Optional[RendererContext]:
+        return self._contexts.get(name, default)
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
 import dataclasses
+import types
 import typing
 
 from markupsafe import Markup
 from wtforms import Field
 from wtforms import Form
 
-from .helpers import traverse_base_classes
+from .helpers import primary_base_classes
 
 # Union type of form element
 FormElement = typing.Union[Field, Form]
-# Type for form element renderer
-FormElementRenderer = typing.Callable[["RenderContext", FormElement], Markup]
+# Type for form element renderer, it either returns the whole rendered markup or
+# yields the rendered HTML chunks one by one
+FormElementRenderer = typing.Callable[
+    ["RenderContext", FormElement], typing.Union[Markup, typing.Iterable[str]]
+]
 
 
 @dataclasses.dataclass
@@ -26,29 +30,207 @@ class ClassMetadata:
     )
 
 
+class DispatchCacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    currsize: int
+
+
 class RendererRegistry:
     def __init__(self):
         self.class_metadata: ClassMetadata = ClassMetadata(cls=object)
+        # Index from registered class to its metadata node in the tree
+        self.class_index: typing.Dict[typing.Type, ClassMetadata] = {
+            object: self.class_metadata
+        }
+        # Bumped whenever a renderer is added, so that anything derived from the
+        # registry content can tell it's outdated
+        self.version: int = 0
+        self._dispatch_cache: typing.Dict[
+            typing.Type, typing.Optional[FormElementRenderer]
+        ] = {}
+        self._cache_hits: int = 0
+        self._cache_misses: int = 0
+        self._frozen: typing.Optional[FrozenRendererRegistry] = None
 
     def add(
         self,
         renderer: FormElementRenderer,
         target_cls: typing.Type,
     ):
-        base_class_paths: typing.List[typing.Tuple] = traverse_base_classes(
-            cls=target_cls
+        # Notice: only the first base class path is used for dispatching, so we only
+        # need to build the tree along it instead of every possible path
+        current_metadata = self.class_metadata
+        for cls in reversed(primary_base_classes(target_cls)):
+            if cls not in current_metadata.subclasses:
+                new_metadata = ClassMetadata(cls=cls)
+                current_metadata.subclasses[cls] = new_metadata
+                current_metadata = new_metadata
+            else:
+                current_metadata = current_metadata.subclasses[cls]
+        current_metadata.renderers.append(renderer)
+        self.class_index[target_cls] = current_metadata
+        self.version += 1
+        self._dispatch_cache.clear()
+
+    def resolve(self, cls: typing.Type) -> typing.Optional[FormElementRenderer]:
+        """Find the renderer for given form element class
+
+        The result is memoized per class, the cache gets invalidated whenever a new
+        renderer is added to the registry.
+
+        :param cls: class of form element to find renderer for
+        :returns: the renderer or None if there's no renderer for the class
+        """
+        try:
+            renderer = self._dispatch_cache[cls]
+        except KeyError:
+            self._cache_misses += 1
+            renderer = self._lookup(cls)
+            self._dispatch_cache[cls] = renderer
+            return renderer
+        self._cache_hits += 1
+        return renderer
+
+    def warm(self, *classes: typing.Type):
+        """Resolve renderers of given form element classes ahead of time, so that
+        the dispatch cache is filled before forking worker processes
+
+        :param classes: classes of form elements to resolve renderers for
+        """
+        for cls in classes:
+            self.resolve(cls)
+
+    def freeze(self) -> FrozenRendererRegistry:
+        """Take an immutable snapshot of the registry for lookups. The snapshot
+        stores the renderer of each registered class in a flat table instead of the
+        class tree. Adding renderers to this registry afterward doesn't change it.
+
+        :return: the frozen snapshot
+        """
+        frozen = self._frozen
+        if frozen is None or frozen.version != self.version:
+            frozen = self._frozen = FrozenRendererRegistry(
+                renderers={
+                    cls: metadata.renderers[0]
+                    for cls, metadata in self.class_index.items()
+                    if metadata.renderers
+                },
+                version=self.version,
+            )
+        return frozen
+
+    def cache_info(self) -> DispatchCacheInfo:
+        return DispatchCacheInfo(
+            hits=self._cache_hits,
+            misses=self._cache_misses,
+            currsize=len(self._dispatch_cache),
         )
-        for path in base_class_paths:
-            current_metadata = self.class_metadata
-            for cls in reversed(path):
-                if cls not in current_metadata.subclasses:
-                    new_metadata = ClassMetadata(cls=cls)
-                    current_metadata.subclasses[cls] = new_metadata
-                    current_metadata = new_metadata
-                else:
-                    current_metadata = current_metadata.subclasses[cls]
-            current_metadata.renderers.append(renderer)
 
+    def cache_clear(self):
+        self._dispatch_cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _lookup(self, cls: typing.Type) -> typing.Optional[FormElementRenderer]:
+        # The most derived class along the first base class path with a renderer wins
+        for base_cls in primary_base_classes(cls) + (object,):
+            metadata = self.class_index.get(base_cls)
+            if metadata is not None and metadata.renderers:
+                return metadata.renderers[0]
+        return None
+
+
+class FrozenRendererRegistry:
+    """Immutable snapshot of a renderer registry, made by `RendererRegistry.freeze`"""
+
+    __slots__ = (
+        "renderers",
+        "_renderers",
+        "version",
+        "_dispatch_cache",
+        "_cache_hits",
+        "_cache_misses",
+    )
+
+    def __init__(
+        self,
+        renderers: typing.Dict[typing.Type, FormElementRenderer],
+        version: int = 0,
+    ):
+        self._renderers = dict(renderers)
+        # Read-only map from registered class to its renderer
+        self.renderers: typing.Mapping[
+            typing.Type, FormElementRenderer
+        ] = types.MappingProxyType(self._renderers)
+        # Version of the registry this snapshot was taken from
+        self.version: int = version
+        self._dispatch_cache: typing.Dict[
+            typing.Type, typing.Optional[FormElementRenderer]
+        ] = {}
+        self._cache_hits: int = 0
+        self._cache_misses: int = 0
+
+    def add(
+        self,
+        renderer: FormElementRenderer,
+        target_cls: typing.Type,
+    ):
+        raise TypeError(
+            "Cannot add renderer to a frozen registry, add it to the RendererRegistry "
+            "and call freeze again instead"
+        )
+
+    def freeze(self) -> FrozenRendererRegistry:
+        return self
+
+    def resolve(self, cls: typing.Type) -> typing.Optional[FormElementRenderer]:
+        """Find the renderer for given form element class, the result is memoized
+        per class
+
+        :param cls: class of form element to find renderer for
+        :returns: the renderer or None if there's no renderer for the class
+        """
+        try:
+            renderer = self._dispatch_cache[cls]
+        except KeyError:
+            self._cache_misses += 1
+            renderer = self._lookup(cls)
+            self._dispatch_cache[cls] = renderer
+            return renderer
+        self._cache_hits += 1
+        return renderer
+
+    def warm(self, *classes: typing.Type):
+        for cls in classes:
+            self.resolve(cls)
+
+    def cache_info(self) -> DispatchCacheInfo:
+        return DispatchCacheInfo(
+            hits=self._cache_hits,
+            misses=self._cache_misses,
+            currsize=len(self._dispatch_cache),
+        )
+
+    def cache_clear(self):
+        self._dispatch_cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _lookup(self, cls: typing.Type) -> typing.Optional[FormElementRenderer]:
+        # Same as following `primary_base_classes`, but stops at the first class
+        # with a renderer without building the whole path
+        renderers = self._renderers
+        while cls is not object:
+            renderer = renderers.get(cls)
+            if renderer is not None:
+                return renderer
+            cls = cls.__bases__[0]
+        return renderers.get(object)
+
+
+# Either the mutable registry or its frozen snapshot
+AnyRendererRegistry = typing.Union[RendererRegistry, FrozenRendererRegistry]
 
 DEFAULT_REGISTRY = RendererRegistry()
 
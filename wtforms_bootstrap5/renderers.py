@@ -4,27 +4,40 @@ from markupsafe import escape
 from markupsafe import Markup
 from wtforms import BooleanField
 from wtforms import Field
+from wtforms import FieldList
 from wtforms import Form
+from wtforms import FormField
 from wtforms import HiddenField
+from wtforms import RadioField
 from wtforms import SelectField
 from wtforms import SelectMultipleField
 from wtforms import SubmitField
-from wtforms.widgets import html_params as raw_html_params
+from wtforms.widgets import CheckboxInput
+from wtforms.widgets import ListWidget
+from wtforms.widgets import RadioInput
 
 from .context import FieldOptions
 from .context import RendererContext
+from .helpers import close_tag
+from .helpers import html_params
+from .helpers import open_tag
+from .helpers import typed_items
+from .labels import LABEL_CACHE
+from .layout import compile_field
+from .layout import CompiledForm
+from .layout import compiles
+from .layout import FIELD_ID_PLACEHOLDER
+from .layout import FieldLayout
 from .registry import FormElement
 from .registry import register
+from .validation import client_validation_attrs
+from .widgets import render_choices
+from .widgets import render_input
+from .widgets import render_widget
 
 
 def _field_option(context: RendererContext, name: str) -> FieldOptions:
-    return context.field_options.get(name, context.default_field_options)
-
-
-def html_params(**kwargs) -> str:
-    if not kwargs:
-        return ""
-    return " " + raw_html_params(**kwargs)
+    return context.resolve_field_options(name)
 
 
 def wrap_with(
@@ -45,46 +58,61 @@ def wrap_with(
     """
     if not enabled:
         return Markup(html)
-    kwargs = {}
-    if class_name is not None:
-        kwargs["class"] = class_name
-    kwargs.update(attrs)
-    return Markup(f"<{tag}{html_params(**kwargs)}>{html}</{tag}>")
+    opening = open_tag(enabled=True, class_name=class_name, attrs=attrs, tag=tag)
+    closing = close_tag(enabled=True, tag=tag)
+    return Markup(f"{opening}{html}{closing}")
+
+
+def _iter_form_fields(context: RendererContext, form: Form) -> typing.Iterator[Field]:
+    yield from form._fields.values()
+    for extra_field in context.extra_fields:
+        yield extra_field.field.bind(form=form, name=extra_field.name)
 
 
 @register(target_cls=Form)
-def render_form(context: RendererContext, element: FormElement) -> Markup:
+def render_form(context: RendererContext, element: FormElement) -> typing.Iterator[str]:
+    form: Form = element
+    tags = context.form_options.tags
+    yield tags.form_open
+    for index, field in enumerate(_iter_form_fields(context, form)):
+        if index:
+            yield "\n"
+        yield from context.iter_render(field)
+    yield tags.form_close
+
+
+@compiles(render_form)
+def compile_form(context: RendererContext, element: FormElement) -> CompiledForm:
     form: Form = element
-    form_options = context.form_options
-    fields = [context.render(field) for field in form._fields.values()]
+    tags = context.form_options.tags
+    extra_fields = []
     for extra_field in context.extra_fields:
         field = extra_field.field.bind(form=form, name=extra_field.name)
-        fields.append(context.render(field))
-    content = "\n".join(fields)
-    base_attrs = {}
-    if form_options.action is not None:
-        base_attrs["action"] = form_options.action
-    if form_options.method is not None:
-        base_attrs["method"] = form_options.method
-    if form_options.enctype is not None:
-        base_attrs["enctype"] = form_options.enctype
-    return wrap_with(
-        content,
-        enabled=form_options.form_enabled,
-        class_name=form_options.form_class,
-        attrs=dict(base_attrs, **form_options.form_attrs),
-        tag="form",
+        extra_fields.append((extra_field, compile_field(context, field)))
+    return CompiledForm(
+        form_cls=form.__class__,
+        context=context,
+        renderer=render_form,
+        open_tag=tags.form_open,
+        close_tag=tags.form_close,
+        separator="\n",
+        fields={
+            field.name: compile_field(context, field) for field in form._fields.values()
+        },
+        extra_fields=tuple(extra_fields),
     )
 
 
-@register(target_cls=Field)
-def render_field(context: RendererContext, element: FormElement) -> Markup:
-    field: Field = element
-    is_checkbox = isinstance(field, BooleanField)
-    is_select = isinstance(field, (SelectField, SelectMultipleField))
-
-    field_kwargs: typing.Dict[str, str] = {}
-    field_options: FieldOptions = _field_option(context, name=field.name)
+def _field_kwargs(
+    field: Field,
+    field_options: FieldOptions,
+    is_checkbox: bool,
+    is_select: bool,
+    is_invalid: bool,
+) -> typing.Dict[str, typing.Any]:
+    field_kwargs: typing.Dict[str, typing.Any] = {}
+    if field_options.client_validation_enabled:
+        field_kwargs.update(client_validation_attrs(field))
     field_classes = []
     if field_options.field_class is not None:
         if is_checkbox:
@@ -93,111 +121,187 @@ def render_field(context: RendererContext, element: FormElement) -> Markup:
             field_classes.append(field_options.select_field_class)
         else:
             field_classes.append(field_options.field_class)
-    if field.errors:
+    if is_invalid:
         field_classes.append(field_options.field_invalid_class)
     if field_classes:
         field_kwargs["class"] = " ".join(field_classes)
     field_kwargs.update(field_options.field_attrs)
+    return field_kwargs
 
-    field_content = [field(**field_kwargs)]
-    if field.description:
-        help_message = escape(field.description)
-        field_content.append(
-            wrap_with(
-                help_message,
-                enabled=True,
-                class_name=field_options.help_class,
-                attrs=field_options.help_attrs,
-            )
-        )
 
-    if field.errors:
-        error_message = escape(field_options.error_separator.join(field.errors))
-        field_content.append(
-            wrap_with(
-                error_message,
-                enabled=True,
-                class_name=field_options.error_class,
-                attrs=field_options.error_attrs,
-            )
-        )
+def _render_label(
+    field: Field,
+    field_options: FieldOptions,
+    is_checkbox: bool,
+    field_id: typing.Optional[str] = None,
+) -> typing.Optional[Markup]:
+    if field.label is None or not field_options.label_enabled:
+        return None
+    label_kwargs = {"for": field.id if field_id is None else field_id}
+    if field_options.label_class is not None:
+        if is_checkbox:
+            label_kwargs["class"] = field_options.checkbox_label_class
+        else:
+            label_kwargs["class"] = field_options.label_class
+    label_kwargs.update(field_options.label_attrs)
+    return LABEL_CACHE.render(field, label_kwargs)
 
-    field_html = "".join(field_content)
-    field_html = wrap_with(
-        field_html,
-        enabled=field_options.field_wrapper_enabled,
-        class_name=field_options.field_wrapper_class,
-        attrs=field_options.field_wrapper_attrs,
-    )
 
-    content = [field_html]
-
-    if field.label is not None and field_options.label_enabled:
-        label_kwargs = {"for": field.name}
-        if field_options.label_class is not None:
-            if is_checkbox:
-                label_kwargs["class"] = field_options.checkbox_label_class
-            else:
-                label_kwargs["class"] = field_options.label_class
-        label_kwargs.update(field_options.label_attrs)
-        label_html = field.label(**label_kwargs)
+def _render_help(field: Field, field_options: FieldOptions) -> str:
+    if not field.description:
+        return ""
+    tags = field_options.tags
+    return f"{tags.help_open}{escape(field.description)}{tags.help_close}"
+
+
+def _field_skeleton(
+    field: Field,
+    field_options: FieldOptions,
+    is_checkbox: bool,
+    field_id: typing.Optional[str] = None,
+) -> typing.Tuple[typing.List[str], typing.List[str]]:
+    """Build the static HTML parts before and after the input element of a field"""
+    tags = field_options.tags
+    checkbox_wrapper_enabled = is_checkbox and field_options.checkbox_wrapper_enabled
+    prefix = [
+        tags.row_open,
+        tags.wrapper_open,
+        tags.checkbox_wrapper_open if checkbox_wrapper_enabled else "",
+    ]
+    suffix = [tags.field_wrapper_close]
+    label_html = _render_label(
+        field, field_options, is_checkbox=is_checkbox, field_id=field_id
+    )
+    if label_html is not None:
         if not is_checkbox and field_options.label_first:
-            content.insert(0, label_html)
+            prefix.append(label_html)
         else:
-            content.append(label_html)
-
-    content_html = "".join(content)
-    content_html = wrap_with(
-        content_html,
-        enabled=is_checkbox and field_options.checkbox_wrapper_enabled,
-        class_name=field_options.checkbox_wrapper_class,
-        attrs=field_options.checkbox_wrapper_attrs,
-    )
-    content_html = wrap_with(
-        content_html,
-        enabled=field_options.wrapper_enabled,
-        class_name=field_options.wrapper_class,
-        attrs=field_options.wrapper_attrs,
+            suffix.append(label_html)
+    prefix.append(tags.field_wrapper_open)
+    suffix.append(tags.checkbox_wrapper_close if checkbox_wrapper_enabled else "")
+    suffix.append(tags.wrapper_close)
+    suffix.append(tags.row_close)
+    return prefix, suffix
+
+
+@register(target_cls=Field)
+def render_field(context: RendererContext, element: FormElement) -> Markup:
+    field: Field = element
+    is_checkbox = isinstance(field, BooleanField)
+    is_select = isinstance(field, (SelectField, SelectMultipleField))
+
+    field_options: FieldOptions = _field_option(context, name=field.name)
+    field_kwargs = _field_kwargs(
+        field,
+        field_options,
+        is_checkbox=is_checkbox,
+        is_select=is_select,
+        is_invalid=bool(field.errors),
     )
-    return wrap_with(
-        content_html,
-        enabled=field_options.row_enabled,
-        class_name=field_options.row_class,
-        attrs=field_options.row_attrs,
+    prefix, suffix = _field_skeleton(field, field_options, is_checkbox=is_checkbox)
+
+    content = prefix
+    content.append(
+        render_input(field, field_kwargs, native=field_options.native_input_enabled)
     )
+    content.append(_render_help(field, field_options))
+    if field.errors:
+        tags = field_options.tags
+        content.append(tags.error_open)
+        content.append(escape(field_options.error_separator.join(field.errors)))
+        content.append(tags.error_close)
+    content.extend(suffix)
+    return Markup("".join(content))
 
 
-@register(target_cls=SubmitField)
-def render_submit(context: RendererContext, element: FormElement) -> Markup:
-    field: SubmitField = element
+@compiles(render_field)
+def compile_field_layout(context: RendererContext, element: FormElement) -> FieldLayout:
+    field: Field = element
+    is_checkbox = isinstance(field, BooleanField)
+    is_select = isinstance(field, (SelectField, SelectMultipleField))
+    field_options: FieldOptions = _field_option(context, name=field.name)
+    prefix, suffix = _field_skeleton(
+        field, field_options, is_checkbox=is_checkbox, field_id=FIELD_ID_PLACEHOLDER
+    )
+    return FieldLayout(
+        field_cls=field.__class__,
+        label_text=field.label.text if field.label is not None else None,
+        description=field.description,
+        prefix="".join(prefix),
+        suffix="".join(suffix),
+        help_html=_render_help(field, field_options),
+        input_kwargs=_field_kwargs(
+            field,
+            field_options,
+            is_checkbox=is_checkbox,
+            is_select=is_select,
+            is_invalid=False,
+        ),
+        invalid_input_kwargs=_field_kwargs(
+            field,
+            field_options,
+            is_checkbox=is_checkbox,
+            is_select=is_select,
+            is_invalid=True,
+        ),
+        errors_enabled=True,
+        error_open=field_options.tags.error_open,
+        error_close=field_options.tags.error_close,
+        error_separator=field_options.error_separator,
+        native_input=field_options.native_input_enabled,
+    )
+
 
+def _submit_field_kwargs(field_options: FieldOptions) -> typing.Dict[str, str]:
     field_kwargs: typing.Dict[str, str] = {}
-    field_options: FieldOptions = _field_option(context, name=field.name)
     if field_options.submit_field_class is not None:
         field_kwargs["class"] = field_options.submit_field_class
     field_kwargs.update(field_options.field_attrs)
+    return field_kwargs
 
-    field_html = field.widget(field, **field_kwargs)
-    field_html = wrap_with(
-        field_html,
-        enabled=field_options.field_wrapper_enabled,
-        class_name=field_options.field_wrapper_class,
-        attrs=field_options.field_wrapper_attrs,
-    )
 
-    content = [field_html]
-    content_html = "".join(content)
-    content_html = wrap_with(
-        content_html,
-        enabled=field_options.wrapper_enabled,
-        class_name=field_options.wrapper_class,
-        attrs=field_options.wrapper_attrs,
+@register(target_cls=SubmitField)
+def render_submit(context: RendererContext, element: FormElement) -> Markup:
+    field: SubmitField = element
+
+    field_options: FieldOptions = _field_option(context, name=field.name)
+    field_kwargs = _submit_field_kwargs(field_options)
+    tags = field_options.tags
+    return Markup(
+        "".join(
+            [
+                tags.row_open,
+                tags.wrapper_open,
+                tags.field_wrapper_open,
+                render_widget(
+                    field, field_kwargs, native=field_options.native_input_enabled
+                ),
+                tags.field_wrapper_close,
+                tags.wrapper_close,
+                tags.row_close,
+            ]
+        )
     )
-    return wrap_with(
-        content_html,
-        enabled=field_options.row_enabled,
-        class_name=field_options.row_class,
-        attrs=field_options.row_attrs,
+
+
+@compiles(render_submit)
+def compile_submit_layout(
+    context: RendererContext, element: FormElement
+) -> FieldLayout:
+    field: SubmitField = element
+    field_options: FieldOptions = _field_option(context, name=field.name)
+    field_kwargs = _submit_field_kwargs(field_options)
+    tags = field_options.tags
+    return FieldLayout(
+        field_cls=field.__class__,
+        label_text=field.label.text if field.label is not None else None,
+        description=field.description,
+        prefix="".join([tags.row_open, tags.wrapper_open, tags.field_wrapper_open]),
+        suffix="".join([tags.field_wrapper_close, tags.wrapper_close, tags.row_close]),
+        input_kwargs=field_kwargs,
+        invalid_input_kwargs=field_kwargs,
+        use_widget=True,
+        native_input=field_options.native_input_enabled,
     )
 
 
@@ -208,5 +312,198 @@ def render_hidden(context: RendererContext, element: FormElement) -> Markup:
     field_kwargs: typing.Dict[str, str] = {}
     field_options: FieldOptions = _field_option(context, name=field.name)
     field_kwargs.update(field_options.field_attrs)
-    field_html = field.widget(field, **field_kwargs)
+    field_html = render_widget(
+        field, field_kwargs, native=field_options.native_input_enabled
+    )
     return field_html
+
+
+@compiles(render_hidden)
+def compile_hidden_layout(
+    context: RendererContext, element: FormElement
+) -> FieldLayout:
+    field: HiddenField = element
+    field_options: FieldOptions = _field_option(context, name=field.name)
+    field_kwargs = dict(field_options.field_attrs)
+    return FieldLayout(
+        field_cls=field.__class__,
+        label_text=field.label.text if field.label is not None else None,
+        description=field.description,
+        prefix="",
+        suffix="",
+        input_kwargs=field_kwargs,
+        invalid_input_kwargs=field_kwargs,
+        use_widget=True,
+        native_input=field_options.native_input_enabled,
+    )
+
+
+def _render_legend(field: Field, field_options: FieldOptions) -> str:
+    if field.label is None or not field_options.label_enabled:
+        return ""
+    legend_kwargs = {}
+    if field_options.label_class is not None:
+        legend_kwargs["class"] = field_options.label_class
+    legend_kwargs.update(field_options.label_attrs)
+    return f"<legend{html_params(**legend_kwargs)}>{escape(field.label.text)}</legend>"
+
+
+def _render_fieldset(
+    context: RendererContext, field: Field, errors: typing.List[str]
+) -> typing.Iterator[str]:
+    """Render the entries of a FieldList or the fields of a FormField one by one in
+    a fieldset, each of them is rendered with the options resolved by its own name
+    """
+    field_options: FieldOptions = _field_option(context, name=field.name)
+    tags = field_options.tags
+    yield tags.row_open
+    yield tags.wrapper_open
+    yield f"<fieldset{html_params(id=field.id)}>"
+    yield _render_legend(field, field_options)
+    yield tags.field_wrapper_open
+    for index, entry in enumerate(field):
+        if index:
+            yield "\n"
+        yield from context.iter_render(entry)
+    yield tags.field_wrapper_close
+    yield _render_help(field, field_options)
+    if errors:
+        yield tags.error_open
+        yield escape(field_options.error_separator.join(errors))
+        yield tags.error_close
+    yield "</fieldset>"
+    yield tags.wrapper_close
+    yield tags.row_close
+
+
+@register(target_cls=FieldList)
+def render_field_list(
+    context: RendererContext, element: FormElement
+) -> typing.Iterator[str]:
+    field: FieldList = element
+    # errors of entries are rendered with the entries, only keep the list's own ones
+    errors = [error for error in field.errors if isinstance(error, str)]
+    yield from _render_fieldset(context, field, errors=errors)
+
+
+@register(target_cls=FormField)
+def render_form_field(
+    context: RendererContext, element: FormElement
+) -> typing.Iterator[str]:
+    field: FormField = element
+    # errors of the enclosed form are rendered with its fields
+    yield from _render_fieldset(context, field, errors=[])
+
+
+def _is_choice_list(field: SelectField, option_widget_cls: typing.Type) -> bool:
+    return isinstance(field.widget, ListWidget) and isinstance(
+        field.option_widget, option_widget_cls
+    )
+
+
+def _render_choice_list(context: RendererContext, field: SelectField) -> Markup:
+    """Render the choices of a radio or checkbox list as Bootstrap form checks in a
+    fieldset, errors are rendered in the last form check so that they are shown
+    """
+    field_options: FieldOptions = _field_option(context, name=field.name)
+    tags = field_options.tags
+    input_kwargs = _field_kwargs(
+        field,
+        field_options,
+        is_checkbox=True,
+        is_select=False,
+        is_invalid=bool(field.errors),
+    )
+    label_kwargs = {}
+    if field_options.checkbox_label_class is not None:
+        label_kwargs["class"] = field_options.checkbox_label_class
+    choice_open = tags.choice_wrapper_open
+    choice_close = tags.choice_wrapper_close
+
+    def render_choice(choice: Field) -> str:
+        return (
+            f"{choice_open}{choice(**input_kwargs)}"
+            f"{choice.label(**label_kwargs)}{choice_close}"
+        )
+
+    choices_html = render_choices(
+        field,
+        render_choice,
+        key=(
+            typed_items(input_kwargs),
+            typed_items(label_kwargs),
+            choice_open,
+            choice_close,
+        ),
+    )
+    errors_html = ""
+    if field.errors:
+        errors_html = "".join(
+            [
+                tags.error_open,
+                escape(field_options.error_separator.join(field.errors)),
+                tags.error_close,
+            ]
+        )
+        if choices_html and choice_close:
+            # put the errors in the last choice wrapper
+            last_choice = choices_html[-1]
+            choices_html[-1] = "".join(
+                [last_choice[: -len(choice_close)], errors_html, choice_close]
+            )
+            errors_html = ""
+    return Markup(
+        "".join(
+            [
+                tags.row_open,
+                tags.wrapper_open,
+                f"<fieldset{html_params(id=field.id)}>",
+                _render_legend(field, field_options),
+                tags.field_wrapper_open,
+                *choices_html,
+                errors_html,
+                tags.field_wrapper_close,
+                _render_help(field, field_options),
+                "</fieldset>",
+                tags.wrapper_close,
+                tags.row_close,
+            ]
+        )
+    )
+
+
+@register(target_cls=RadioField)
+def render_radio(context: RendererContext, element: FormElement) -> Markup:
+    field: RadioField = element
+    if not _is_choice_list(field, RadioInput):
+        return render_field(context, field)
+    return _render_choice_list(context, field)
+
+
+@compiles(render_radio)
+def compile_radio_layout(
+    context: RendererContext, element: FormElement
+) -> typing.Optional[FieldLayout]:
+    field: RadioField = element
+    if not _is_choice_list(field, RadioInput):
+        return compile_field_layout(context, field)
+    # choices are cached by the renderer already
+    return None
+
+
+@register(target_cls=SelectMultipleField)
+def render_select_multiple(context: RendererContext, element: FormElement) -> Markup:
+    field: SelectMultipleField = element
+    if not _is_choice_list(field, CheckboxInput):
+        return render_field(context, field)
+    return _render_choice_list(context, field)
+
+
+@compiles(render_select_multiple)
+def compile_select_multiple_layout(
+    context: RendererContext, element: FormElement
+) -> typing.Optional[FieldLayout]:
+    field: SelectMultipleField = element
+    if not _is_choice_list(field, CheckboxInput):
+        return compile_field_layout(context, field)
+    return None
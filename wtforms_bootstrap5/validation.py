@@ -0,0 +1,137 @@
+import re
+import threading
+import typing
+
+from wtforms import Field
+from wtforms import validators
+
+# Takes a validator and returns the HTML5 validation attributes equivalent to it
+ValidatorAttributes = typing.Callable[[typing.Any], typing.Dict[str, typing.Any]]
+# Map from validator class to the function producing its validation attributes
+VALIDATION_ATTRIBUTES: typing.Dict[typing.Type, ValidatorAttributes] = {}
+# Regular expression syntax which is specific to Python and cannot be used in the
+# HTML pattern attribute
+_PYTHON_ONLY_REGEX = re.compile(r"\(\?[^:=!]|\\[AZ]")
+# Max number of cached validation attributes
+MAX_CACHED_ATTRIBUTES = 4096
+
+_cached_attributes: typing.Dict[
+    int, typing.Tuple[typing.Any, typing.Type, typing.Dict[str, typing.Any]]
+] = {}
+_cached_attributes_lock = threading.Lock()
+
+
+def clear_cache():
+    with _cached_attributes_lock:
+        _cached_attributes.clear()
+
+
+def validation_attributes(validator_cls: typing.Type):
+    """Register decorated function as the producer of HTML5 validation attributes
+    for given validator class and its subclasses
+
+    :param validator_cls: the validator class
+    """
+
+    def decorator(func: ValidatorAttributes) -> ValidatorAttributes:
+        VALIDATION_ATTRIBUTES[validator_cls] = func
+        clear_cache()
+        return func
+
+    return decorator
+
+
+@validation_attributes(validators.DataRequired)
+@validation_attributes(validators.InputRequired)
+def _required_attributes(validator: typing.Any) -> typing.Dict[str, typing.Any]:
+    return dict(required=True)
+
+
+@validation_attributes(validators.Length)
+def _length_attributes(validator: validators.Length) -> typing.Dict[str, typing.Any]:
+    attrs: typing.Dict[str, typing.Any] = {}
+    if validator.min is not None and validator.min >= 0:
+        attrs["minlength"] = validator.min
+    if validator.max is not None and validator.max >= 0:
+        attrs["maxlength"] = validator.max
+    return attrs
+
+
+@validation_attributes(validators.NumberRange)
+def _number_range_attributes(
+    validator: validators.NumberRange,
+) -> typing.Dict[str, typing.Any]:
+    attrs: typing.Dict[str, typing.Any] = {}
+    if validator.min is not None:
+        attrs["min"] = validator.min
+    if validator.max is not None:
+        attrs["max"] = validator.max
+    return attrs
+
+
+@validation_attributes(validators.Regexp)
+def _regexp_attributes(validator: validators.Regexp) -> typing.Dict[str, typing.Any]:
+    regex = validator.regex
+    pattern = regex.pattern
+    if (
+        not isinstance(pattern, str)
+        or regex.flags & ~re.UNICODE
+        or _PYTHON_ONLY_REGEX.search(pattern)
+    ):
+        return {}
+    # Regexp only matches at the beginning of the value while the pattern attribute
+    # needs to match the whole value
+    return dict(pattern=f"(?:{pattern}).*")
+
+
+@validation_attributes(validators.Email)
+def _email_attributes(validator: validators.Email) -> typing.Dict[str, typing.Any]:
+    return dict(type="email")
+
+
+@validation_attributes(validators.URL)
+def _url_attributes(validator: validators.URL) -> typing.Dict[str, typing.Any]:
+    return dict(type="url")
+
+
+def _lookup(validator_cls: typing.Type) -> typing.Optional[ValidatorAttributes]:
+    for cls in validator_cls.__mro__:
+        func = VALIDATION_ATTRIBUTES.get(cls)
+        if func is not None:
+            return func
+    return None
+
+
+def _build_attributes(field: Field) -> typing.Dict[str, typing.Any]:
+    attrs: typing.Dict[str, typing.Any] = {}
+    for validator in field.validators:
+        func = _lookup(validator.__class__)
+        if func is not None:
+            attrs.update(func(validator))
+    # type hints only apply to plain text input
+    if "type" in attrs and getattr(field.widget, "input_type", None) != "text":
+        del attrs["type"]
+    return attrs
+
+
+def client_validation_attrs(field: Field) -> typing.Dict[str, typing.Any]:
+    """Get HTML5 validation attributes of given field derived from its validators.
+    Validators are usually shared by all the instances of a form class, so the
+    attributes are computed once and cached.
+
+    :param field: the field to get validation attributes for
+    :return: the validation attributes, the returned dict should not be modified
+    """
+    validator_list = field.validators
+    widget_cls = field.widget.__class__
+    key = id(validator_list)
+    entry = _cached_attributes.get(key)
+    if entry is not None and entry[0] is validator_list and entry[1] is widget_cls:
+        return entry[2]
+    attrs = _build_attributes(field)
+    with _cached_attributes_lock:
+        if len(_cached_attributes) >= MAX_CACHED_ATTRIBUTES:
+            _cached_attributes.clear()
+        # keep a reference to the validators, so that the id won't be reused
+        _cached_attributes[key] = (validator_list, widget_cls, attrs)
+    return attrs
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import dataclasses
+import gc
+import time
+import tracemalloc
+import typing
+
+from wtforms import Field
+from wtforms import Form
+from wtforms import SelectField
+
+from .helpers import iter_nested_fields
+from .layout import CompiledForm
+from .layout import COMPILERS
+from .validation import client_validation_attrs
+from .widgets import get_option_table
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .context import RendererContext
+
+
+@dataclasses.dataclass(frozen=True)
+class WarmUpReport:
+    # number of form classes warmed up
+    form_count: int
+    # number of fields warmed up, including nested entries and extra fields
+    field_count: int
+    # seconds spent in warming up
+    duration: float
+    # bytes of memory allocated during warm-up and still in use afterward
+    memory: int
+    # peak bytes of memory allocated during warm-up
+    peak_memory: int
+    # compiled layout of each form class, forms with custom renderers are skipped
+    compiled_forms: typing.Dict[typing.Type, CompiledForm]
+
+
+def _warm_field(context: RendererContext, field: Field):
+    field_options = context.resolve_field_options(field.name)
+    # generate the cached tags
+    _ = field_options.tags
+    if field_options.client_validation_enabled:
+        client_validation_attrs(field)
+    if isinstance(field, SelectField):
+        get_option_table(field)
+
+
+def warm_up(
+    context: RendererContext,
+    form_classes: typing.Iterable[typing.Type[Form]],
+    freeze_gc: bool = False,
+) -> WarmUpReport:
+    """Eagerly build everything which can be precomputed for rendering given form
+    classes, such as resolved renderers, option tags, select option tables,
+    validation attributes and compiled layouts
+
+    :param context: the context to render the forms with
+    :param form_classes: the form classes to warm up
+    :param freeze_gc: move all objects into the permanent generation with
+        `gc.freeze` after warming up, so that the garbage collector won't touch them
+        and the memory pages stay shared between forked workers
+    :return: report of the warm-up
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    # reset_peak is only available on Python 3.9+, without it the peak may include
+    # the memory traced before warming up when tracing was already started
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    start_memory, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    try:
+        context = context.freeze()
+        # generate the cached tags
+        _ = context.form_options.tags
+        _ = context.default_field_options.tags
+        compiled_forms: typing.Dict[typing.Type, CompiledForm] = {}
+        field_count = 0
+        form_count = 0
+        for form_cls in form_classes:
+            form_count += 1
+            # CSRF needs a request to generate token, it's not part of the layout
+            form = form_cls(meta=dict(csrf=False))
+            fields = list(iter_nested_fields(form))
+            for extra_field in context.extra_fields:
+                fields.append(extra_field.field.bind(form=form, name=extra_field.name))
+            context.registry.warm(form_cls, *(field.__class__ for field in fields))
+            for field in fields:
+                _warm_field(context, field)
+            field_count += len(fields)
+            if context.registry.resolve(form_cls) in COMPILERS:
+                compiled_forms[form_cls] = context.compile(form)
+        duration = time.perf_counter() - start
+        end_memory, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    if freeze_gc:
+        gc.collect()
+        gc.freeze()
+    return WarmUpReport(
+        form_count=form_count,
+        field_count=field_count,
+        duration=duration,
+        memory=end_memory - start_memory,
+        peak_memory=peak_memory - start_memory,
+        compiled_forms=compiled_forms,
+    )
@@ -0,0 +1,659 @@
+import collections
+import dataclasses
+import itertools
+import operator
+import re
+import threading
+import typing
+
+from markupsafe import escape
+from markupsafe import Markup
+from wtforms import Field
+from wtforms import SelectField
+from wtforms import SelectMultipleField
+from wtforms.meta import clean_key
+from wtforms.meta import DefaultMeta
+from wtforms.widgets import CheckboxInput
+from wtforms.widgets import html_params
+from wtforms.widgets import Input
+from wtforms.widgets import NumberInput
+from wtforms.widgets import PasswordInput
+from wtforms.widgets import RadioInput
+from wtforms.widgets import Select
+from wtforms.widgets import SubmitInput
+from wtforms.widgets import TextArea
+
+from .helpers import typed_items
+
+# Methods of select fields which decide the rendered options, the fast path is only
+# used if none of them is overridden
+_CHOICE_METHODS = ("iter_choices", "has_groups", "iter_groups", "_choices_generator")
+# Types of choice values and labels which are safe to be used as cache key, values
+# of different types in this set never compare equal
+_CACHEABLE_CHOICE_TYPES = frozenset([str, int])
+# Max number of option tables to keep
+MAX_OPTION_TABLES = 256
+
+
+def _selected_indexes(
+    index: typing.Optional[typing.Dict[typing.Any, typing.List[int]]],
+    coerced_values: typing.Tuple[typing.Any, ...],
+    values: typing.Iterable[typing.Any],
+) -> typing.List[int]:
+    indexes: typing.Set[int] = set()
+    for value in values:
+        if index is not None:
+            try:
+                indexes.update(index.get(value, ()))
+                continue
+            except TypeError:
+                pass
+        indexes.update(
+            i
+            for i, coerced_value in enumerate(coerced_values)
+            if coerced_value == value
+        )
+    return sorted(indexes)
+
+
+def _build_index(
+    coerced_values: typing.Iterable[typing.Any],
+) -> typing.Optional[typing.Dict[typing.Any, typing.List[int]]]:
+    index: typing.Dict[typing.Any, typing.List[int]] = {}
+    try:
+        for i, coerced_value in enumerate(coerced_values):
+            index.setdefault(coerced_value, []).append(i)
+    except TypeError:
+        return None
+    return index
+
+
+@dataclasses.dataclass(frozen=True)
+class OptionTable:
+    # pre-escaped HTML of all options and optgroups, with no option selected
+    html: str
+    # start and end offsets of each option in the HTML
+    spans: typing.Tuple[typing.Tuple[int, int], ...]
+    # (value, label, render_kw) of each option
+    choices: typing.Tuple[typing.Tuple[typing.Any, typing.Any, typing.Dict], ...]
+    # coerced value of each option
+    coerced_values: typing.Tuple[typing.Any, ...]
+    # map coerced value to indexes of the options, None if the values are not
+    # hashable
+    index: typing.Optional[typing.Dict[typing.Any, typing.List[int]]]
+
+    def selected_indexes(self, values: typing.Iterable[typing.Any]) -> typing.List[int]:
+        return _selected_indexes(self.index, self.coerced_values, values)
+
+    def render(self, selected_indexes: typing.List[int]) -> str:
+        """Render the options with given options selected
+
+        :param selected_indexes: sorted indexes of selected options
+        :return: the HTML of options
+        """
+        if not selected_indexes:
+            return self.html
+        parts = []
+        position = 0
+        for i in selected_indexes:
+            start, end = self.spans[i]
+            value, label, render_kw = self.choices[i]
+            parts.append(self.html[position:start])
+            parts.append(Select.render_option(value, label, True, **render_kw))
+            position = end
+        parts.append(self.html[position:])
+        return "".join(parts)
+
+
+_option_tables: "collections.OrderedDict[typing.Hashable, OptionTable]" = (
+    collections.OrderedDict()
+)
+_option_tables_lock = threading.Lock()
+_fast_path_classes: typing.Dict[typing.Type, bool] = {}
+
+
+def _is_fast_path_class(field_cls: typing.Type) -> bool:
+    supported = _fast_path_classes.get(field_cls)
+    if supported is None:
+        base_cls = (
+            SelectMultipleField
+            if issubclass(field_cls, SelectMultipleField)
+            else SelectField
+        )
+        supported = _fast_path_classes[field_cls] = all(
+            getattr(field_cls, name, None) is getattr(base_cls, name, None)
+            for name in _CHOICE_METHODS
+        )
+    return supported
+
+
+def _flat_choices_key(choices: typing.Any) -> typing.Optional[typing.Tuple]:
+    if not choices:
+        return ()
+    if isinstance(choices[0], (list, tuple)):
+        key = tuple(map(tuple, choices))
+        items = itertools.chain.from_iterable(key)
+    else:
+        key = tuple(choices)
+        items = key
+    if not _CACHEABLE_CHOICE_TYPES.issuperset(map(type, items)):
+        return None
+    return key
+
+
+def _choices_key(choices: typing.Any) -> typing.Optional[typing.Tuple]:
+    if isinstance(choices, dict):
+        groups = []
+        for group, group_choices in choices.items():
+            group_key = _flat_choices_key(group_choices)
+            if type(group) not in _CACHEABLE_CHOICE_TYPES or group_key is None:
+                return None
+            groups.append((group, group_key))
+        return ("groups", tuple(groups))
+    return _flat_choices_key(choices)
+
+
+def _build_option_table(field: SelectField) -> OptionTable:
+    parts: typing.List[str] = []
+    spans: typing.List[typing.Tuple[int, int]] = []
+    choices = []
+    coerced_values = []
+    position = 0
+
+    def add(html: str):
+        nonlocal position
+        parts.append(html)
+        position += len(html)
+
+    def add_choices(group_choices: typing.Iterable[typing.Tuple]):
+        for choice in group_choices:
+            value, label = choice[0], choice[1]
+            render_kw = choice[3] if len(choice) > 3 else {}
+            start = position
+            add(Select.render_option(value, label, False, **render_kw))
+            spans.append((start, position))
+            choices.append((value, label, render_kw))
+            coerced_values.append(field.coerce(value))
+
+    if field.has_groups():
+        for group, group_choices in field.iter_groups():
+            add(f"<optgroup {html_params(label=group)}>")
+            add_choices(group_choices)
+            add("</optgroup>")
+    else:
+        add_choices(field.iter_choices())
+
+    return OptionTable(
+        html="".join(parts),
+        spans=tuple(spans),
+        choices=tuple(choices),
+        coerced_values=tuple(coerced_values),
+        index=_build_index(coerced_values),
+    )
+
+
+def get_option_table(field: SelectField) -> typing.Optional[OptionTable]:
+    """Get the cached options HTML for the choices of given select field
+
+    :param field: the select field
+    :return: the option table, or None if the choices cannot be cached
+    """
+    try:
+        choices_key = _choices_key(field.choices)
+    except (TypeError, ValueError):
+        return None
+    if choices_key is None:
+        return None
+    key = (field.coerce, choices_key)
+    try:
+        with _option_tables_lock:
+            table = _option_tables.get(key)
+            if table is not None:
+                _option_tables.move_to_end(key)
+                return table
+    except TypeError:
+        # unhashable coerce function
+        return None
+    table = _build_option_table(field)
+    with _option_tables_lock:
+        _option_tables[key] = table
+        while len(_option_tables) > MAX_OPTION_TABLES:
+            _option_tables.popitem(last=False)
+    return table
+
+
+def clear_option_tables():
+    with _option_tables_lock:
+        _option_tables.clear()
+
+
+# Placeholders of field id and name in cached choice HTML, they are filled in when
+# rendering, so that fields with different ids and names, such as FieldList entries
+# or forms rendered many times with id prefix, share the same choices
+_CHOICE_ID_PLACEHOLDER = "\x00choice-field-id\x00"
+_CHOICE_NAME_PLACEHOLDER = "\x00choice-field-name\x00"
+
+
+# Pattern splitting choice HTML into static pieces and placeholders
+_CHOICE_PLACEHOLDER_PATTERN = re.compile(
+    f"({re.escape(_CHOICE_ID_PLACEHOLDER)}|{re.escape(_CHOICE_NAME_PLACEHOLDER)})"
+)
+# Values of the slots in choice HTML pieces
+_CHOICE_ID_SLOT = 0
+_CHOICE_NAME_SLOT = 1
+_CHOICE_EMPTY_SLOT = 2
+
+
+@dataclasses.dataclass(frozen=True)
+class _FilledChoices:
+    # HTML of each choice when it's not checked
+    unchecked: typing.Tuple[str, ...]
+    # HTML pieces of all the choices with the slots filled
+    parts: typing.List[str]
+    # HTML of the choices rendered as checked so far, by index
+    checked: typing.Dict[int, str]
+
+
+@dataclasses.dataclass(frozen=True)
+class ChoiceTable:
+    # HTML pieces of all the choices of a radio or checkbox list when none of them
+    # is checked, the items at odd indexes are slots for field id and name, the
+    # choices are separated by empty slots
+    unchecked: typing.Tuple[str, ...]
+    # HTML pieces of each choice when it's checked, with the same slots as the
+    # unchecked ones
+    checked: typing.Tuple[typing.Tuple[str, ...], ...]
+    # start index of each choice in unchecked pieces
+    offsets: typing.Tuple[int, ...]
+    # what each slot is filled with, one of `_CHOICE_*_SLOT`
+    slots: typing.Tuple[int, ...]
+    # coerced value of each choice
+    coerced_values: typing.Tuple[typing.Any, ...]
+    # map coerced value to indexes of the choices, None if the values are not
+    # hashable
+    index: typing.Optional[typing.Dict[typing.Any, typing.List[int]]]
+
+    def __post_init__(self):
+        if len(self.slots) == 1:
+            slot = self.slots[0]
+            fill_slots = lambda values: (values[slot],)  # noqa: E731
+        else:
+            # picks all the slot values in one C call
+            fill_slots = operator.itemgetter(*self.slots)
+        object.__setattr__(self, "_fill_slots", fill_slots)
+        # choices filled with recently rendered field ids and names
+        object.__setattr__(self, "_filled", {})
+
+    def _fill(self, field_id: str, field_name: str) -> _FilledChoices:
+        key = (field_id, field_name)
+        filled = self._filled.get(key)
+        if filled is not None:
+            return filled
+        parts = list(self.unchecked)
+        if self.slots:
+            # escaped the same way as attribute values
+            parts[1::2] = self._fill_slots(
+                (str(escape(field_id)), str(escape(field_name)), "")
+            )
+        filled = _FilledChoices(
+            unchecked=tuple(
+                "".join(parts[start : start + len(checked)])
+                for start, checked in zip(self.offsets, self.checked)
+            ),
+            parts=parts,
+            checked={},
+        )
+        if len(self._filled) >= MAX_FILLED_CHOICES:
+            self._filled.clear()
+        self._filled[key] = filled
+        return filled
+
+    def render(
+        self, values: typing.Iterable[typing.Any], field_id: str, field_name: str
+    ) -> typing.List[str]:
+        """Render the choices with the ones of given values checked
+
+        :param values: the coerced values to check
+        :param field_id: id of the field
+        :param field_name: name of the field
+        :return: the HTML of each choice
+        """
+        filled = self._fill(field_id, field_name)
+        choices = list(filled.unchecked)
+        for i in _selected_indexes(self.index, self.coerced_values, values):
+            html = filled.checked.get(i)
+            if html is None:
+                # same slots as the unchecked choice, which are filled already
+                parts = list(self.checked[i])
+                start = self.offsets[i]
+                parts[1::2] = filled.parts[start + 1 : start + len(parts) : 2]
+                html = filled.checked[i] = "".join(parts)
+            choices[i] = html
+        return choices
+
+
+_choice_tables: "collections.OrderedDict[typing.Hashable, ChoiceTable]" = (
+    collections.OrderedDict()
+)
+_choice_tables_lock = threading.Lock()
+_choice_list_classes: typing.Dict[typing.Type, bool] = {}
+# Methods and attributes of select fields which decide the choice subfields
+_CHOICE_LIST_ATTRIBUTES = _CHOICE_METHODS + ("__iter__", "_Option")
+# Max number of choice tables to keep
+MAX_CHOICE_TABLES = 1024
+# Max number of field ids and names to keep filled choices for in each table
+MAX_FILLED_CHOICES = 16
+
+
+def _is_choice_list_class(field_cls: typing.Type) -> bool:
+    supported = _choice_list_classes.get(field_cls)
+    if supported is None:
+        base_cls = (
+            SelectMultipleField
+            if issubclass(field_cls, SelectMultipleField)
+            else SelectField
+        )
+        supported = _choice_list_classes[field_cls] = all(
+            getattr(field_cls, name, None) is getattr(base_cls, name, None)
+            for name in _CHOICE_LIST_ATTRIBUTES
+        )
+    return supported
+
+
+def _choice_table_key(
+    field: SelectField, key: typing.Hashable
+) -> typing.Optional[typing.Hashable]:
+    option_widget = field.option_widget
+    if (
+        option_widget.__class__ not in (RadioInput, CheckboxInput)
+        or vars(option_widget)
+        or not _is_choice_list_class(field.__class__)
+        or getattr(field.meta.render_field, "__func__", None)
+        is not DefaultMeta.render_field
+        or not isinstance(field.id, str)
+        or not isinstance(field.name, str)
+    ):
+        return None
+    try:
+        choices_key = _choices_key(field.choices)
+    except (TypeError, ValueError):
+        return None
+    if choices_key is None:
+        return None
+    render_kw = field.render_kw or {}
+    # id and name are not part of the key, they are placeholders in the table
+    table_key = (
+        field.__class__,
+        option_widget.__class__,
+        field.coerce,
+        choices_key,
+        typed_items(render_kw),
+        tuple(sorted(typed_items(vars(field.flags)))),
+        key,
+    )
+    try:
+        hash(table_key)
+    except TypeError:
+        return None
+    return table_key
+
+
+def _build_choice_table(
+    field: SelectField, render_choice: typing.Callable[[Field], str]
+) -> typing.Optional[ChoiceTable]:
+    unchecked: typing.List[str] = []
+    checked = []
+    offsets = []
+    slots: typing.List[int] = []
+    coerced_values = []
+    for choice in field:
+        # the subfield id is the field id followed by the choice index
+        choice.id = f"{_CHOICE_ID_PLACEHOLDER}{choice.id[len(field.id):]}"
+        choice.name = _CHOICE_NAME_PLACEHOLDER
+        choice.label.field_id = choice.id
+        choice.checked = False
+        unchecked_parts = _CHOICE_PLACEHOLDER_PATTERN.split(render_choice(choice))
+        choice.checked = True
+        checked_parts = _CHOICE_PLACEHOLDER_PATTERN.split(render_choice(choice))
+        if checked_parts[1::2] != unchecked_parts[1::2]:
+            return None
+        if unchecked:
+            unchecked.append("")
+            slots.append(_CHOICE_EMPTY_SLOT)
+        offsets.append(len(unchecked))
+        unchecked.extend(unchecked_parts)
+        slots.extend(
+            _CHOICE_ID_SLOT if part == _CHOICE_ID_PLACEHOLDER else _CHOICE_NAME_SLOT
+            for part in unchecked_parts[1::2]
+        )
+        checked.append(tuple(checked_parts))
+        coerced_values.append(field.coerce(choice.data))
+    return ChoiceTable(
+        unchecked=tuple(unchecked),
+        checked=tuple(checked),
+        offsets=tuple(offsets),
+        slots=tuple(slots),
+        coerced_values=tuple(coerced_values),
+        index=_build_index(coerced_values),
+    )
+
+
+def render_choices(
+    field: SelectField,
+    render_choice: typing.Callable[[Field], str],
+    key: typing.Hashable,
+) -> typing.List[str]:
+    """Render each choice of a radio or checkbox list field. The HTML of choices is
+    cached, only the checked state, field id and name are filled in for each render.
+
+    :param field: the radio or checkbox list field
+    :param render_choice: function rendering the HTML of a choice subfield
+    :param key: hashable value of everything affecting `render_choice` output other
+        than the subfield itself
+    :return: the HTML of each choice
+    """
+    table_key = _choice_table_key(field, key)
+    if table_key is None:
+        return [render_choice(choice) for choice in field]
+    with _choice_tables_lock:
+        table = _choice_tables.get(table_key)
+        if table is not None:
+            _choice_tables.move_to_end(table_key)
+    if table is None:
+        table = _build_choice_table(field, render_choice)
+        if table is None:
+            # the checked state changes more than the checked attribute
+            return [render_choice(choice) for choice in field]
+        with _choice_tables_lock:
+            _choice_tables[table_key] = table
+            while len(_choice_tables) > MAX_CHOICE_TABLES:
+                _choice_tables.popitem(last=False)
+    if isinstance(field, SelectMultipleField):
+        values = field.data if field.data is not None else ()
+    else:
+        values = (field.data,)
+    return table.render(values, field_id=field.id, field_name=field.name)
+
+
+def clear_choice_tables():
+    with _choice_tables_lock:
+        _choice_tables.clear()
+
+
+def _merge_render_kw(
+    field: Field, kwargs: typing.Dict[str, typing.Any]
+) -> typing.Dict[str, typing.Any]:
+    # same as DefaultMeta.render_field
+    render_kw = {clean_key(k): v for k, v in kwargs.items()}
+    other_kw = getattr(field, "render_kw", None)
+    if other_kw is not None:
+        other_kw = {clean_key(k): v for k, v in other_kw.items()}
+        render_kw = dict(other_kw, **render_kw)
+    return render_kw
+
+
+def _add_validation_attrs(
+    widget: typing.Any, field: Field, render_kw: typing.Dict[str, typing.Any]
+):
+    # same as the flags loop in WTForms widgets, flags are stored as instance
+    # attributes, so there's no need to go through `dir`
+    validation_attrs = getattr(widget, "validation_attrs", ())
+    flags = getattr(getattr(field, "flags", None), "__dict__", {})
+    for k, v in flags.items():
+        if k in validation_attrs and k not in render_kw:
+            render_kw[k] = v
+
+
+def _render_select(
+    field: SelectField, kwargs: typing.Dict[str, typing.Any]
+) -> typing.Optional[Markup]:
+    widget = field.widget
+    if widget.__class__ is not Select or not _is_fast_path_class(field.__class__):
+        return None
+    render_field = getattr(field.meta.render_field, "__func__", None)
+    if render_field is not DefaultMeta.render_field:
+        return None
+    table = get_option_table(field)
+    if table is None:
+        return None
+
+    render_kw = _merge_render_kw(field, kwargs)
+    # same as Select.__call__
+    render_kw.setdefault("id", field.id)
+    if widget.multiple:
+        render_kw["multiple"] = True
+    _add_validation_attrs(widget, field, render_kw)
+    select_params = html_params(name=field.name, **render_kw)
+
+    if isinstance(field, SelectMultipleField):
+        values = field.data if field.data is not None else ()
+    else:
+        values = (field.data,)
+    options_html = table.render(table.selected_indexes(values))
+    return Markup(f"<select {select_params}>{options_html}</select>")
+
+
+def _native_input(
+    widget: Input, field: Field, render_kw: typing.Dict[str, typing.Any]
+) -> Markup:
+    # same as Input.__call__
+    render_kw.setdefault("id", field.id)
+    render_kw.setdefault("type", widget.input_type)
+    if "value" not in render_kw:
+        render_kw["value"] = field._value()
+    _add_validation_attrs(widget, field, render_kw)
+    return Markup(f"<input {html_params(name=field.name, **render_kw)}>")
+
+
+def _native_password_input(
+    widget: PasswordInput, field: Field, render_kw: typing.Dict[str, typing.Any]
+) -> Markup:
+    if widget.hide_value:
+        render_kw["value"] = ""
+    return _native_input(widget, field, render_kw)
+
+
+def _native_checkbox_input(
+    widget: CheckboxInput, field: Field, render_kw: typing.Dict[str, typing.Any]
+) -> Markup:
+    if getattr(field, "checked", field.data):
+        render_kw["checked"] = True
+    return _native_input(widget, field, render_kw)
+
+
+def _native_number_input(
+    widget: NumberInput, field: Field, render_kw: typing.Dict[str, typing.Any]
+) -> Markup:
+    if widget.step is not None:
+        render_kw.setdefault("step", widget.step)
+    if widget.min is not None:
+        render_kw.setdefault("min", widget.min)
+    if widget.max is not None:
+        render_kw.setdefault("max", widget.max)
+    return _native_input(widget, field, render_kw)
+
+
+def _native_submit_input(
+    widget: SubmitInput, field: Field, render_kw: typing.Dict[str, typing.Any]
+) -> Markup:
+    render_kw.setdefault("value", field.label.text)
+    return _native_input(widget, field, render_kw)
+
+
+def _native_textarea(
+    widget: TextArea, field: Field, render_kw: typing.Dict[str, typing.Any]
+) -> Markup:
+    # same as TextArea.__call__
+    render_kw.setdefault("id", field.id)
+    _add_validation_attrs(widget, field, render_kw)
+    textarea_params = html_params(name=field.name, **render_kw)
+    return Markup(
+        f"<textarea {textarea_params}>\r\n{escape(field._value())}</textarea>"
+    )
+
+
+# Map the `__call__` method of WTForms widgets to the native function generating
+# the same HTML, widget classes not overriding `__call__` are supported too
+_NATIVE_WIDGETS: typing.Dict[typing.Callable, typing.Callable[..., Markup]] = {
+    Input.__call__: _native_input,
+    PasswordInput.__call__: _native_password_input,
+    CheckboxInput.__call__: _native_checkbox_input,
+    NumberInput.__call__: _native_number_input,
+    SubmitInput.__call__: _native_submit_input,
+    TextArea.__call__: _native_textarea,
+}
+
+
+def _native_widget(field: Field) -> typing.Optional[typing.Callable[..., Markup]]:
+    widget = field.widget
+    native = _NATIVE_WIDGETS.get(getattr(widget.__class__, "__call__", None))
+    if native is None or getattr(widget, "html_params", html_params) is not html_params:
+        return None
+    return native
+
+
+def render_input(
+    field: Field, kwargs: typing.Dict[str, typing.Any], native: bool = False
+) -> Markup:
+    """Render the input element of given field, the same as calling the field with
+    given keyword arguments. The options of select fields are rendered from cache.
+
+    :param field: the field to render
+    :param kwargs: HTML attributes of the input element
+    :param native: generate the HTML of common input elements directly instead of
+        going through the WTForms widget, the output is the same
+    :return: the rendered input element
+    """
+    if isinstance(field, SelectField):
+        html = _render_select(field, kwargs)
+        if html is not None:
+            return html
+    elif (
+        native
+        and field.__class__.__call__ is Field.__call__
+        and getattr(field.meta.render_field, "__func__", None)
+        is DefaultMeta.render_field
+    ):
+        native_widget = _native_widget(field)
+        if native_widget is not None:
+            return native_widget(field.widget, field, _merge_render_kw(field, kwargs))
+    return field(**kwargs)
+
+
+def render_widget(
+    field: Field, kwargs: typing.Dict[str, typing.Any], native: bool = False
+) -> Markup:
+    """Render the input element of given field with its widget directly, the same as
+    `field.widget(field, **kwargs)`
+
+    :param field: the field to render
+    :param kwargs: HTML attributes of the input element
+    :param native: generate the HTML of common input elements directly instead of
+        going through the WTForms widget, the output is the same
+    :return: the rendered input element
+    """
+    if native:
+        native_widget = _native_widget(field)
+        if native_widget is not None:
+            return native_widget(field.widget, field, dict(kwargs))
+    return field.widget(field, **kwargs)